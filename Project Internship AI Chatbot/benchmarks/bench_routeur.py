@@ -0,0 +1,64 @@
+# ----------------------------
+# Fichier : benchmarks/bench_routeur.py
+# Description : Mesure de la latence et de la précision du routeur d'intentions
+#               sur un corpus de questions étiquetées (questions_routeur.csv)
+# Usage : python benchmarks/bench_routeur.py [repetitions]   (depuis le dossier du chatbot)
+# ----------------------------
+
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import store
+from routeur import Routeur
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions_routeur.csv")
+
+
+def charger_corpus(chemin=CORPUS):
+    with open(chemin, newline="", encoding="utf-8") as f:
+        return [(ligne["question"], ligne["intention"] or None) for ligne in csv.DictReader(f)]
+
+
+def percentile(valeurs, p):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(round(p / 100 * (len(valeurs) - 1))))]
+
+
+def main(repetitions=200):
+    corpus = charger_corpus()
+
+    debut = time.perf_counter()
+    routeur = Routeur(store)
+    construction = time.perf_counter() - debut
+
+    # Précision
+    erreurs = []
+    for question, attendue in corpus:
+        obtenue = routeur.analyser(question)["intention"]
+        if obtenue != attendue:
+            erreurs.append((question, attendue, obtenue))
+
+    # Latence (µs par question)
+    durees = []
+    for _ in range(repetitions):
+        for question, _ in corpus:
+            t0 = time.perf_counter()
+            routeur.analyser(question)
+            durees.append((time.perf_counter() - t0) * 1e6)
+
+    justes = len(corpus) - len(erreurs)
+    print(f"Construction du routeur : {construction * 1000:.1f} ms")
+    print(f"Précision : {justes}/{len(corpus)} ({justes / len(corpus) * 100:.1f} %)")
+    print(f"Latence ({len(durees)} analyses) : p50 {percentile(durees, 50):.1f} µs | "
+          f"p95 {percentile(durees, 95):.1f} µs | p99 {percentile(durees, 99):.1f} µs")
+    for question, attendue, obtenue in erreurs:
+        print(f"  ✗ {question!r} : attendu {attendue}, obtenu {obtenue}")
+    return len(erreurs)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 200) else 0)
@@ -0,0 +1,137 @@
+# ----------------------------
+# Fichier : benchmarks/generer_donnees.py
+# Description : Générateur de données synthétiques au schéma exact de data/ (produits.csv,
+#               stock_AAAA-MM-JJ.csv, commandes_AAAA-MM-JJ.csv, en-tête avec BOM UTF-8)
+#               pour mesurer le chatbot à l'échelle de la production
+# Usage : python benchmarks/generer_donnees.py DOSSIER [--jours 90] [--produits 2000] [--sites 3]
+#               [--commandes 500] [--debut 2025-01-01] [--graine 0]
+# ----------------------------
+
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+COLONNES_PRODUITS = ["Référence_Produit", "Désignation", "Famille", "Fournisseur_Principal",
+                     "Délai_Livraison_Jours", "Seuil_Réappro", "Coût_Unitaire", "Poids_Unitaire"]
+COLONNES_STOCK = ["Date", "Référence_Produit", "Stock_Initial", "Entrées", "Sorties", "Stock_Final",
+                  "Statut", "Site"]
+COLONNES_COMMANDES = ["Type_Commande", "Num_Commande", "Date_Commande", "Référence_Produit", "Quantité",
+                      "Date_Livraison_Prévue", "Date_Livraison_Réelle", "Statut_Commande", "Contrepartie"]
+
+# Familles du fichier réel : (famille, désignation, fournisseur, délai, seuil, coût, poids)
+FAMILLES = [
+    ("Câble", "Fil électrique {n}mm²", "Yazaki", 7, 50, 5.5, 0.02),
+    ("Connecteur", "Connecteur {n} broches", "TE Connectivity", 10, 100, 2.2, 0.01),
+    ("Terminal", "Terminal {n} broches", "FCI", 5, 200, 1.5, 0.005),
+    ("Plastique", "Boîtier plastique {n}x50x20", "Plastico", 15, 30, 3.0, 0.05),
+    ("Métal", "Support métallique {n}", "MetalPro", 20, 10, 4.5, 0.1),
+]
+STATUTS_COMMANDE = ["Livrée", "Retard", "En préparation"]
+
+
+def reference(i):
+    """P001, P002, ... (même format que produits.csv, au-delà de 999 : P1000)."""
+    return f"P{i:03d}"
+
+
+def nom_site(i):
+    return f"Entrepot_{chr(ord('A') + i)}" if i < 26 else f"Entrepot_{i + 1}"
+
+
+def _ecrire(df, chemin):
+    df.to_csv(chemin, index=False, encoding="utf-8-sig")
+
+
+def generer_produits(nb_produits):
+    familles = [FAMILLES[i % len(FAMILLES)] for i in range(nb_produits)]
+    return pd.DataFrame({
+        "Référence_Produit": [reference(i + 1) for i in range(nb_produits)],
+        "Désignation": [f[1].format(n=i + 1) for i, f in enumerate(familles)],
+        "Famille": [f[0] for f in familles],
+        "Fournisseur_Principal": [f[2] for f in familles],
+        "Délai_Livraison_Jours": [f[3] for f in familles],
+        "Seuil_Réappro": [f[4] for f in familles],
+        "Coût_Unitaire": [f[5] for f in familles],
+        "Poids_Unitaire": [f[6] for f in familles],
+    }, columns=COLONNES_PRODUITS)
+
+
+def generer(dossier, jours=90, nb_produits=2000, nb_sites=3, commandes_par_jour=500,
+            debut="2025-01-01", graine=0):
+    """
+    Écrit dans `dossier` : produits.csv, puis pour chaque jour un fichier de stock
+    (produits × sites, le stock initial reprenant le stock final de la veille) et
+    un fichier de commandes. Retourne le nombre total de lignes écrites.
+    """
+    rng = np.random.default_rng(graine)
+    os.makedirs(dossier, exist_ok=True)
+    produits = generer_produits(nb_produits)
+    _ecrire(produits, os.path.join(dossier, "produits.csv"))
+
+    refs = np.repeat(produits["Référence_Produit"].to_numpy(), nb_sites)
+    sites = np.tile([nom_site(i) for i in range(nb_sites)], nb_produits)
+    seuils = np.repeat(produits["Seuil_Réappro"].to_numpy(), nb_sites)
+    stock = rng.integers(0, 300, len(refs))
+    total = len(produits)
+    numero = 0
+
+    for jour in pd.date_range(debut, periods=jours, freq="D"):
+        texte_jour = jour.strftime("%Y-%m-%d")
+
+        # Stock : entrées / sorties du jour, statut déduit du stock final
+        entrees = rng.integers(0, 60, len(refs)) * (rng.random(len(refs)) < 0.4)
+        sorties = np.minimum(rng.integers(0, 50, len(refs)), stock + entrees)
+        final = stock + entrees - sorties
+        statut = np.where(final == 0, "RUPTURE", np.where(final < seuils, "URGENT", "OK"))
+        _ecrire(pd.DataFrame({
+            "Date": texte_jour, "Référence_Produit": refs, "Stock_Initial": stock, "Entrées": entrees,
+            "Sorties": sorties, "Stock_Final": final, "Statut": statut, "Site": sites,
+        }, columns=COLONNES_STOCK), os.path.join(dossier, f"stock_{texte_jour}.csv"))
+        stock = final
+        total += len(refs)
+
+        # Commandes : livrées, en retard ou en préparation (sans date de livraison réelle)
+        n = commandes_par_jour
+        client = rng.random(n) < 0.6
+        statut_cmd = rng.choice(STATUTS_COMMANDE, n, p=[0.6, 0.25, 0.15])
+        prevue = jour + pd.to_timedelta(rng.integers(2, 16, n), unit="D")
+        ecart = np.where(statut_cmd == "Retard", rng.integers(1, 11, n), -rng.integers(0, 4, n))
+        reelle = (prevue + pd.to_timedelta(ecart, unit="D")).strftime("%Y-%m-%d").to_numpy(dtype=object)
+        reelle[statut_cmd == "En préparation"] = ""
+        numeros = np.arange(numero + 1, numero + n + 1)
+        numero += n
+        _ecrire(pd.DataFrame({
+            "Type_Commande": np.where(client, "Client", "Fournisseur"),
+            "Num_Commande": [f"{'C' if c else 'F'}{k:03d}" for c, k in zip(client, numeros)],
+            "Date_Commande": texte_jour,
+            "Référence_Produit": produits["Référence_Produit"].to_numpy()[rng.integers(0, nb_produits, n)],
+            "Quantité": rng.integers(1, 121, n),
+            "Date_Livraison_Prévue": prevue.strftime("%Y-%m-%d"),
+            "Date_Livraison_Réelle": reelle,
+            "Statut_Commande": statut_cmd,
+            "Contrepartie": np.where(client, np.char.add("Client_", rng.choice(list("ABCDEFGHIJ"), n)),
+                                     np.char.add("Fournisseur_", rng.choice(list("XYZ"), n))),
+        }, columns=COLONNES_COMMANDES), os.path.join(dossier, f"commandes_{texte_jour}.csv"))
+        total += n
+
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des données synthétiques au format de data/.")
+    parser.add_argument("dossier")
+    parser.add_argument("--jours", type=int, default=90)
+    parser.add_argument("--produits", type=int, default=2000)
+    parser.add_argument("--sites", type=int, default=3)
+    parser.add_argument("--commandes", type=int, default=500, help="commandes par jour")
+    parser.add_argument("--debut", default="2025-01-01")
+    parser.add_argument("--graine", type=int, default=0)
+    args = parser.parse_args(argv)
+    total = generer(args.dossier, args.jours, args.produits, args.sites, args.commandes, args.debut, args.graine)
+    print(f"{total} lignes écrites dans {args.dossier}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
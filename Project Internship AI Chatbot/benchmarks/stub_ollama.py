@@ -0,0 +1,97 @@
+# ----------------------------
+# Fichier : benchmarks/stub_ollama.py
+# Description : Serveur factice reproduisant le protocole d'Ollama (/api/tags, /api/generate
+#               en flux NDJSON ou en réponse unique) pour tester le chatbot sans modèle
+# Usage : python benchmarks/stub_ollama.py [--port 11435] [--delai 0.05] [--premier 0.5]
+#         puis OLLAMA_URL=http://localhost:11435 streamlit run interface_streamlit.py
+# ----------------------------
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPONSE = (
+    "Voici une réponse de test générée par le serveur factice : "
+    "les données de stock et de commandes ont bien été reçues."
+)
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.0"  # fin du flux = fermeture de la connexion
+    delai = 0.05    # secondes entre deux tokens
+    premier = 0.5   # délai avant le premier token (évaluation du prompt)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, code, contenu):
+        corps = json.dumps(contenu).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._json(200, {"models": [{"name": "llama3.2:3b"}]})
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._json(404, {"error": "not found"})
+            return
+        longueur = int(self.headers.get("Content-Length", 0))
+        requete = json.loads(self.rfile.read(longueur) or b"{}")
+        modele = requete.get("model", "llama3.2:3b")
+        tokens = [mot + " " for mot in REPONSE.split()]
+        # Comme Ollama : le contexte renvoyé = contexte reçu + prompt + réponse,
+        # et seul le nouveau prompt est évalué
+        evalues = len(requete.get("prompt", "")) // 4
+        contexte = list(requete.get("context") or [])
+        fin = {
+            "model": modele, "response": "", "done": True,
+            "context": contexte + list(range(evalues + len(tokens))),
+            "prompt_eval_count": evalues,
+            "eval_count": len(tokens),
+        }
+        print(f"keep_alive={requete.get('keep_alive')} contexte reçu={len(contexte)} tokens évalués={evalues}")
+
+        time.sleep(self.premier)
+        if not requete.get("stream", True):
+            fin["response"] = "".join(tokens)
+            self._json(200, fin)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            for token in tokens:
+                ligne = {"model": modele, "response": token, "done": False}
+                self.wfile.write((json.dumps(ligne) + "\n").encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(self.delai)
+            self.wfile.write((json.dumps(fin) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            print("⏹ Génération annulée par le client")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur Ollama factice (flux NDJSON)")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--delai", type=float, default=0.05, help="secondes entre deux tokens")
+    parser.add_argument("--premier", type=float, default=0.5, help="secondes avant le premier token")
+    args = parser.parse_args()
+
+    StubOllama.delai = args.delai
+    StubOllama.premier = args.premier
+    serveur = ThreadingHTTPServer(("127.0.0.1", args.port), StubOllama)
+    print(f"Ollama factice sur http://127.0.0.1:{args.port}")
+    serveur.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
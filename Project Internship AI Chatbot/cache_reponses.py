@@ -0,0 +1,123 @@
+# ----------------------------
+# Fichier : cache_reponses.py
+# Description : Cache des réponses d'Ollama, par question normalisée et tampon des données
+#               (éviction LRU + durée de vie, persistance facultative sur disque)
+# ----------------------------
+
+from collections import OrderedDict
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from fichiers import ecrire_atomique
+from ingestion import CACHE_DIR
+
+CACHE_FILE = "reponses.jsonl"
+MAX_ENTREES = 256
+DUREE_VIE = 6 * 3600  # secondes
+
+
+def normaliser_question(question):
+    """
+    Forme canonique d'une question : minuscules, sans accents ni ponctuation, espaces
+    regroupés. L'ordre et la répétition des mots sont conservés ("stock de A vers B"
+    et "stock de B vers A" restent deux questions).
+    """
+    texte = unicodedata.normalize("NFKD", question.lower())
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    return " ".join(re.findall(r"\w+", texte))
+
+
+class CacheReponses:
+    """
+    Réponses déjà générées, indexées par (question normalisée, tampon des données).
+    Un nouveau fichier ingéré change le tampon : les anciennes réponses ne sont plus
+    jamais servies et finissent évincées (LRU au-delà de `max_entrees`, ou après `duree_vie`).
+    Partagé entre les sessions Streamlit : accès protégé par un verrou.
+    Sur disque, un journal JSON Lines : chaque réponse enregistrée y est ajoutée en une
+    ligne, et le journal n'est réécrit (compacté) que lorsqu'il dépasse deux fois
+    `max_entrees` lignes.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entrees=MAX_ENTREES, duree_vie=DUREE_VIE, persistant=True):
+        self.max_entrees = max_entrees
+        self.duree_vie = duree_vie
+        self.chemin = os.path.join(cache_dir, CACHE_FILE) if persistant else None
+        self._entrees = OrderedDict()  # cle -> (horodatage, réponse)
+        self._verrou = threading.Lock()
+        self._lignes_journal = 0
+        self.succes = 0
+        self.echecs = 0
+        if self.chemin and os.path.exists(self.chemin):
+            with open(self.chemin, "r", encoding="utf-8") as f:
+                for ligne in f:
+                    try:
+                        cle, horodatage, reponse = json.loads(ligne)
+                    except (ValueError, TypeError):
+                        continue  # ligne interrompue (arrêt pendant une écriture) : ignorée
+                    self._entrees[tuple(cle)] = (horodatage, reponse)
+                    self._entrees.move_to_end(tuple(cle))
+                    self._lignes_journal += 1
+            self._purger(time.time())
+
+    def _purger(self, maintenant):
+        for cle in [cle for cle, (horodatage, _) in self._entrees.items() if maintenant - horodatage > self.duree_vie]:
+            del self._entrees[cle]
+        while len(self._entrees) > self.max_entrees:
+            self._entrees.popitem(last=False)
+
+    @staticmethod
+    def _ligne(cle, horodatage, reponse):
+        return json.dumps([list(cle), horodatage, reponse], ensure_ascii=False) + "\n"
+
+    def _ajouter_au_journal(self, cle, horodatage, reponse):
+        """Ajoute une entrée en fin de journal ; le compacte s'il est devenu trop long."""
+        if not self.chemin:
+            return
+        os.makedirs(os.path.dirname(self.chemin), exist_ok=True)
+        if self._lignes_journal >= 2 * self.max_entrees:
+            self._compacter()
+            return
+        with open(self.chemin, "a", encoding="utf-8") as f:
+            f.write(self._ligne(cle, horodatage, reponse))
+        self._lignes_journal += 1
+
+    def _compacter(self):
+        """Réécrit le journal avec les seules entrées gardées en mémoire."""
+        if not self.chemin:
+            return
+        os.makedirs(os.path.dirname(self.chemin), exist_ok=True)
+        ecrire_atomique(self.chemin, "".join(self._ligne(cle, *entree) for cle, entree in self._entrees.items()))
+        self._lignes_journal = len(self._entrees)
+
+    def lire(self, question, tampon):
+        """Réponse en cache pour `question` avec les données `tampon`, ou None."""
+        cle = (normaliser_question(question), tampon)
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None or time.time() - entree[0] > self.duree_vie:
+                self.echecs += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return entree[1]
+
+    def enregistrer(self, question, tampon, reponse):
+        cle = (normaliser_question(question), tampon)
+        with self._verrou:
+            horodatage = time.time()
+            self._entrees[cle] = (horodatage, reponse)
+            self._entrees.move_to_end(cle)
+            self._purger(horodatage)
+            self._ajouter_au_journal(cle, horodatage, reponse)
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self._compacter()
+
+
+# Instance unique partagée (comme le DataStore)
+cache_reponses = CacheReponses()
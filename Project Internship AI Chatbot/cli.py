@@ -0,0 +1,69 @@
+# ----------------------------
+# Fichier : cli.py
+# Description : Chatbot en ligne de commande, sans Streamlit : questions en arguments,
+#               lot de questions depuis un fichier, ou saisie interactive
+# Usage : python cli.py "Quel est le stock final du produit P001 ?" [...]
+#         python cli.py --lot questions.txt [--json]     (une question par ligne, - pour stdin)
+#         python cli.py                                  (interactif, "quitter" pour sortir)
+# ----------------------------
+
+import argparse
+from contextlib import redirect_stdout
+import json
+import sys
+
+
+def _afficher(question, reponse, en_json):
+    if en_json:
+        print(json.dumps({"question": question, "reponse": reponse}, ensure_ascii=False))
+    else:
+        print(reponse)
+
+
+def _lire_questions(chemin):
+    fichier = sys.stdin if chemin == "-" else open(chemin, encoding="utf-8")
+    with fichier:
+        return [ligne.strip() for ligne in fichier if ligne.strip()]
+
+
+def interactif(bot):
+    """Boucle question / réponse (réponse d'Ollama affichée au fil de la génération)."""
+    while True:
+        try:
+            question = input("❓ ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return
+        if question.lower() in ("quitter", "exit", "quit"):
+            return
+        if question:
+            for fragment in bot.ask_flux(question):
+                print(fragment, end="", flush=True)
+            print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chatbot en ligne de commande.")
+    parser.add_argument("questions", nargs="*")
+    parser.add_argument("--lot", help="fichier de questions (une par ligne, - pour l'entrée standard)")
+    parser.add_argument("--json", action="store_true", help="une ligne JSON {question, reponse} par réponse")
+    args = parser.parse_args(argv)
+
+    questions = list(args.questions)
+    if args.lot:
+        questions += _lire_questions(args.lot)
+    # Messages de chargement et de calcul sur la sortie d'erreur : stdout ne contient que les réponses
+    with redirect_stdout(sys.stderr):
+        from faqbot import FAQBot  # importé ici : le chargement des données suit la redirection
+        bot = FAQBot()
+        reponses = bot.ask_lot(questions) if questions else None
+    if not questions:
+        interactif(bot)
+        return 0
+    for question, reponse in zip(questions, reponses):
+        _afficher(question, reponse, args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,24 @@
 # commandes_utils.py
 import pandas as pd
-from datetime import datetime
-from data_loader import commandes_global  # utiliser le dataframe déjà chargé
+from data_store import store, formater_date  # utiliser le dataframe déjà chargé et indexé
+from rendu import formater_lignes
 
 # Fonctions pour le FAQBot
 def get_commande_info(num_commande):
     """
     Retourne toutes les informations d'une commande à partir de son numéro.
     """
-    df = commandes_global[commandes_global['Num_Commande'].str.upper() == num_commande.upper()]
-    if df.empty:
+    info = store.premiere_ligne("commandes", "Num_Commande", num_commande)  # accès direct par l'index
+    if info is None:
         return f"❌ Commande {num_commande} non trouvée."
-    return df.to_dict(orient='records')[0]  # dictionnaire complet de la ligne
+    return info  # dictionnaire complet de la ligne
 
 def commandes_par_num_commande(num_commande):
     """
     Retourne toutes les lignes correspondant à un numéro de commande.
     Utile si une commande regroupe plusieurs produits.
     """
-    df = commandes_global[commandes_global['Num_Commande'].str.upper() == num_commande.upper()]
+    df = store.lignes("commandes", {"Num_Commande": num_commande})
     if df.empty:
         return f"❌ Aucune commande trouvée pour le numéro {num_commande}."
     return df.to_dict(orient='records')
@@ -38,14 +38,14 @@ def get_date_livraison_prevue(num_commande):
     """
     info = get_commande_info(num_commande)
     if isinstance(info, dict):
-        return info.get('Date_Livraison_Prévue', 'Information non disponible')
+        return formater_date(info.get('Date_Livraison_Prévue', 'Information non disponible'))
     return info
 
 def get_date_livraison_reelle(num_commande):
     """ Retourne la date de livraison réelle."""
     info = get_commande_info(num_commande)
     if isinstance(info, dict):
-        return info.get('Date_Livraison_Réelle', 'Information non disponible')
+        return formater_date(info.get('Date_Livraison_Réelle', 'Information non disponible'))
     return info
 
 def get_quantite_commande(num_commande):
@@ -69,13 +69,11 @@ def get_contrepartie(num_commande):
         return info.get('Contrepartie', 'Information non disponible')
     return info
 
-def commandes_en_retard():
+def commandes_en_retard(page=1):
     """Retourne toutes les commandes dont la date de livraison prévue est passée et qui ne sont pas encore livrées."""
+    commandes_global = store.commandes  # lecture seule : les dates sont déjà typées au chargement
     if commandes_global.empty:
         return "Aucune commande disponible."
-    commandes_global["Date_Livraison_Prévue"] = pd.to_datetime(commandes_global["Date_Livraison_Prévue"], errors='coerce').dt.date
-    commandes_global["Date_Livraison_Réelle"] = pd.to_datetime(commandes_global["Date_Livraison_Réelle"], errors='coerce').dt.date
-    today = datetime.today().date()
     retard = commandes_global[
         (commandes_global["Statut_Commande"].str.lower() == "retard")
     ]
@@ -83,26 +81,41 @@ def commandes_en_retard():
         return "Aucune commande en retard."
 
      # ---- Formatage propre ----
-    lignes = []
-    for _, row in retard.iterrows():
-        lignes.append(
-            f"📦 {row['Type_Commande']} {row['Num_Commande']} "
-            f"({row['Référence_Produit']}, Qté: {row['Quantité']}) "
-            f"prévue le {row['Date_Livraison_Prévue']} "
-            f"➡ Statut: {row['Statut_Commande']}, Contrepartie: {row['Contrepartie']}"
-        )
-    return "\n".join(lignes)
+    return formater_lignes(
+        retard,
+        "📦 {Type_Commande} {Num_Commande} ({Référence_Produit}, Qté: {Quantité}) "
+        "prévue le {Date_Livraison_Prévue} ➡ Statut: {Statut_Commande}, Contrepartie: {Contrepartie}",
+        page,
+    )
 
 def commandes_par_produit(ref):
     """Retourne toutes les commandes pour un produit donné."""
-    df = commandes_global[commandes_global['Référence_Produit'].str.upper() == ref.upper()]
+    df = store.lignes("commandes", {"Référence_Produit": ref})
     if df.empty:
         return f"❌ Aucune commande trouvée pour le produit {ref}."
     return df.to_dict(orient='records')
 
 def commandes_par_type(type_commande):
     """Retourne toutes les commandes selon le type (Client / Fournisseur)."""
+    commandes_global = store.commandes
     df = commandes_global[commandes_global['Type_Commande'].str.lower() == type_commande.lower()]
     if df.empty:
         return f"❌ Aucune commande trouvée pour le type '{type_commande}'."
     return df.to_dict(orient='records')
+
+def lister_commandes_par_produit(ref, page=1):
+    """Liste lisible (paginée) des commandes d'un produit."""
+    df = store.lignes("commandes", {"Référence_Produit": ref})
+    if df.empty:
+        return f"❌ Aucune commande trouvée pour le produit {ref}."
+    return formater_lignes(df, "📦 {Type_Commande} {Num_Commande} (Qté: {Quantité}, Contrepartie: {Contrepartie})", page)
+
+def lister_commandes_par_type(type_commande, page=1):
+    """Liste lisible (paginée) des commandes d'un type (Client / Fournisseur)."""
+    commandes_global = store.commandes
+    df = commandes_global[commandes_global['Type_Commande'].str.lower() == type_commande.lower()]
+    if df.empty:
+        return f"❌ Aucune commande trouvée pour le type '{type_commande}'."
+    return formater_lignes(
+        df, "📦 {Type_Commande} {Num_Commande} ({Référence_Produit}, Qté: {Quantité}, Contrepartie: {Contrepartie})", page
+    )
\ No newline at end of file
@@ -0,0 +1,131 @@
+# ----------------------------
+# Fichier : contexte_llm.py
+# Description : Contexte compact envoyé à Ollama : uniquement les lignes et colonnes liées
+#               aux entités de la question, encodage tabulaire, budget de tokens
+# ----------------------------
+
+import math
+import pandas as pd
+from data_store import store
+from kpi import kpi_du_jour
+from rendu import lignes_tableau
+
+BUDGET_TOKENS = 700
+RESERVE_NOTE = 40           # place gardée pour la mention "… N lignes omises"
+CARACTERES_PAR_TOKEN = 3.5  # estimation prudente pour du français tabulaire
+MAX_LIGNES = 25             # lignes lues au plus par section (coût indépendant de l'historique)
+
+COLONNES = {
+    "produits": ["Référence_Produit", "Désignation", "Famille", "Fournisseur_Principal",
+                 "Délai_Livraison_Jours", "Seuil_Réappro", "Coût_Unitaire"],
+    "stock": ["Date", "Référence_Produit", "Site", "Stock_Initial", "Entrées", "Sorties", "Stock_Final", "Statut"],
+    "commandes": ["Num_Commande", "Type_Commande", "Date_Commande", "Référence_Produit", "Quantité",
+                  "Date_Livraison_Prévue", "Date_Livraison_Réelle", "Statut_Commande", "Contrepartie"],
+}
+
+
+def estimer_tokens(texte):
+    return math.ceil(len(texte) / CARACTERES_PAR_TOKEN)
+
+
+# ----------------------------
+# 1️⃣ Sélection des lignes pertinentes (accès par index, nombre de lignes borné)
+# ----------------------------
+def _recentes(nom, col, valeur, n=MAX_LIGNES):
+    """
+    Les `n` dernières lignes (ordre d'ingestion = ordre chronologique) pour une clé
+    d'index, et le nombre total de lignes de cette clé.
+    """
+    positions = store.positions(nom, col, valeur)
+    return store.table(nom).iloc[positions[-n:]], len(positions)
+
+
+def _derniere_date(route):
+    if route.get("date"):
+        return route["date"]
+    table = store.kpi_journalier
+    return table.index.max().date() if not table.empty else None
+
+
+def _sections(route):
+    """Liste (titre, DataFrame, colonnes, nombre total de lignes) par ordre de priorité."""
+    sections = []
+    ref, num, site, famille = route.get("ref"), route.get("num"), route.get("site"), route.get("famille")
+    jour = _derniere_date(route)
+    sans_ref = [col for col in COLONNES["stock"] if col != "Référence_Produit"]
+
+    if num:
+        commande = store.lignes("commandes", {"Num_Commande": num})
+        sections.append((f"COMMANDE {num}", commande, COLONNES["commandes"], len(commande)))
+    if ref:
+        produit = store.lignes("produits", {"Référence_Produit": ref})
+        sections.append((f"PRODUIT {ref}", produit, COLONNES["produits"], len(produit)))
+        if route.get("date"):
+            stock = store.lignes("stock", {"Référence_Produit": ref, "Date": route["date"]})
+            total = len(stock)
+        else:
+            stock, total = _recentes("stock", "Référence_Produit", ref)
+        sections.append((f"STOCK {ref}", stock, sans_ref, total))
+        commandes, total = _recentes("commandes", "Référence_Produit", ref)
+        sections.append((f"COMMANDES {ref}", commandes, [c for c in COLONNES["commandes"] if c != "Référence_Produit"], total))
+    if site and jour:
+        stock = store.lignes("stock", {"Site": site, "Date": jour})
+        sections.append((f"STOCK {site} au {jour}", stock, [c for c in COLONNES["stock"] if c not in ("Site", "Date")], len(stock)))
+    if famille and "Famille" in store.produits.columns:
+        produits = store.produits[store.produits["Famille"].str.lower() == famille]
+        sections.append((f"PRODUITS famille {famille}", produits, COLONNES["produits"], len(produits)))
+
+    if not (num or ref or site or famille) and jour:
+        # Question générale : les lignes de stock du jour les plus critiques (stock final croissant)
+        stock = store.lignes("stock", {"Date": jour})
+        sections.append((f"STOCK le plus bas au {jour}", stock.sort_values("Stock_Final"),
+                         [c for c in COLONNES["stock"] if c != "Date"], len(stock)))
+    return sections
+
+
+# ----------------------------
+# 2️⃣ Résumé + sections sous budget
+# ----------------------------
+def _resume(route):
+    table = store.kpi_journalier
+    lignes = ["=== RÉSUMÉ ==="]
+    if not table.empty:
+        lignes.append(f"Période couverte: du {table.index.min().date()} au {table.index.max().date()}")
+    lignes.append(f"Lignes: produits {len(store.produits)}, stock {len(store.stock)}, commandes {len(store.commandes)}")
+    jour = _derniere_date(route)
+    kpis = kpi_du_jour(jour)
+    lignes.append(
+        f"KPI au {jour}: valeur stock {kpis['valeur_stock']} MAD | "
+        f"ruptures {kpis['nb_ruptures']} | à réapprovisionner {kpis['nb_reappro']} | "
+        f"commandes en retard {kpis['nb_commandes_retard']} | taux livraison {kpis['taux_livraison']} %"
+    )
+    return "\n".join(lignes)
+
+
+def construire_contexte(route=None, budget_tokens=BUDGET_TOKENS):
+    """
+    Contexte pour Ollama à partir des entités détectées par le routeur (ref, num,
+    site, famille, date). Les sections sont ajoutées par priorité puis tronquées
+    ligne à ligne pour rester sous `budget_tokens` (estimation par caractères).
+    """
+    route = route or {}
+    budget = int(budget_tokens * CARACTERES_PAR_TOKEN)
+    blocs = [_resume(route)]
+    reste = budget - len(blocs[0])
+
+    for titre, df, colonnes, total in _sections(route):
+        if df.empty or reste <= 0:
+            continue
+        lignes = lignes_tableau(df.head(MAX_LIGNES), colonnes)
+        entete = f"=== {titre} ({total} lignes) ==="
+        longueurs = pd.Series([len(ligne) + 1 for ligne in lignes]).cumsum() + len(entete) + 1
+        gardees = int((longueurs <= reste - RESERVE_NOTE).sum())
+        if gardees <= 1:  # pas la place pour l'en-tête et au moins une ligne
+            continue
+        bloc = "\n".join([entete] + lignes[:gardees])
+        if gardees - 1 < total:
+            bloc += f"\n… {total - (gardees - 1)} lignes omises"
+        blocs.append(bloc)
+        reste -= len(bloc) + 2
+
+    return "\n\n".join(blocs)
@@ -0,0 +1,357 @@
+# ----------------------------
+# Fichier : data_store.py
+# Description : Magasin de données unique (produits, stock, commandes) chargé une seule fois et indexé
+# ----------------------------
+
+from collections import namedtuple
+from datetime import date
+import os
+import threading
+import numpy as np
+import pandas as pd
+from ingestion import (
+    CACHE_DIR, TABLES_JOURNALIERES, Manifeste, date_depuis_nom, ecrire_consolide, fichiers_a_ingerer,
+    lire_consolide, lire_fichiers_journaliers, lister_fichiers, prolonger_table, supprimer_consolide,
+)
+from fichiers import verrou_fichier
+from kpi_journalier import ajouter_kpi_journalier, construire_kpi_journalier
+
+DATA_DIR = "data"
+# Verrou (dans le dossier de cache) pris par le processus qui ingère les fichiers journaliers
+VERROU_INGESTION = "ingestion.lock"
+
+# Colonnes indexées pour chaque table
+INDEX_COLONNES = {
+    "produits": ["Référence_Produit"],
+    "stock": ["Référence_Produit", "Site", "Date"],
+    "commandes": ["Référence_Produit", "Num_Commande", "Date"],
+}
+
+_AUCUNE_POSITION = np.array([], dtype=np.intp)
+_AUCUNE_POSITION.flags.writeable = False
+
+# Données publiées ensemble : un lecteur qui garde cette référence voit des tables,
+# des index et une version cohérents, même pendant une ingestion
+EtatDonnees = namedtuple("EtatDonnees", "version produits stock commandes index kpi_journalier")
+
+
+# ----------------------------
+# 1️⃣ Normalisation des clés
+# ----------------------------
+def normaliser_reference(ref):
+    """Normalise une référence produit (majuscules, sans espaces)"""
+    if isinstance(ref, str):
+        return ref.upper().strip().replace(" ", "")
+    return ref
+
+
+def _normaliser_colonne(serie):
+    """Version vectorisée de normaliser_reference pour une colonne entière (dates inchangées)."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    return serie.astype("string").str.upper().str.replace(" ", "", regex=False)
+
+
+def _cle(valeur):
+    """Clé de recherche dans un index : référence normalisée ou date en Timestamp."""
+    if isinstance(valeur, date):
+        return pd.Timestamp(valeur)
+    return normaliser_reference(valeur)
+
+
+def formater_date(valeur):
+    """Affiche une date AAAA-MM-JJ (valeur inchangée si ce n'est pas une date)."""
+    if isinstance(valeur, date) and not pd.isna(valeur):
+        return valeur.strftime("%Y-%m-%d")
+    if valeur is pd.NaT:
+        return "Non renseignée"
+    return valeur
+
+
+# ----------------------------
+# 2️⃣ Lecture des fichiers
+# ----------------------------
+
+
+def charger_produits(data_dir=DATA_DIR):
+    """Charge le fichier produits.csv (table fixe)."""
+    produits_file = os.path.join(data_dir, "produits.csv")
+    if not os.path.exists(produits_file):
+        print("⚠ produits.csv manquant !")
+        return pd.DataFrame()
+    return pd.read_csv(produits_file)
+
+
+def charger_csv_journalier(prefix, data_dir=DATA_DIR):
+    """
+    Charge tous les fichiers CSV commençant par `prefix` dans le dossier `data_dir`
+    et ajoute une colonne 'Date' extraite du nom de fichier ou utilisant la date du jour.
+    Lecture complète (en parallèle pour un long historique), sans manifeste : le
+    DataStore n'y a pas recours au démarrage. Table typée (voir typer_table).
+    """
+    chemins = [os.path.join(data_dir, file) for file in lister_fichiers(data_dir, prefix)]
+    if chemins:
+        return lire_fichiers_journaliers(chemins, prefix)[0]
+    print(f"⚠ Aucun fichier {prefix} trouvé !")
+    return pd.DataFrame()
+
+
+# ----------------------------
+# 3️⃣ Magasin de données partagé
+# ----------------------------
+def _etendre_index(index_table, df, nom, debut):
+    """
+    Index de la table `nom` (colonne -> clé -> positions) complété avec les lignes de
+    `df` à partir de la position `debut`. `index_table` n'est pas modifié : les
+    dictionnaires touchés sont copiés, l'état publié reste valable pour ses lecteurs.
+    """
+    index_table = dict(index_table) if debut else {}
+    df = df.iloc[debut:]
+    for col in INDEX_COLONNES[nom]:
+        if col not in df.columns:
+            continue
+        index_col = index_table[col] = dict(index_table.get(col, {}))
+        cles = _normaliser_colonne(df[col])
+        for cle, positions in df.groupby(cles, sort=False).indices.items():
+            positions = positions + debut
+            positions = np.concatenate([index_col[cle], positions]) if cle in index_col else positions
+            positions.flags.writeable = False  # partagé par toutes les sessions
+            index_col[cle] = positions
+    return index_table
+
+
+class DataStore:
+    """
+    Charge une seule fois produits, stock et commandes et construit des index
+    (clé normalisée -> positions des lignes) sur les colonnes de INDEX_COLONNES.
+    Le coût de normalisation est payé une fois par chargement ; chaque
+    recherche ensuite est un simple accès dictionnaire.
+    Tous les modules (kpi, *_utils, FAQBot) et toutes les sessions Streamlit lisent
+    les mêmes DataFrames, en lecture seule : les positions des index ne sont pas
+    modifiables et une seule session à la fois actualise les données.
+    Tables, index, KPI et version forment un état (EtatDonnees) jamais modifié : une
+    actualisation en construit un nouveau et le publie en une seule affectation.
+    `kpi_journalier` contient les KPI précalculés de chaque date (voir kpi_journalier.py).
+    """
+
+    def __init__(self, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+        vide = pd.DataFrame()
+        self._etat = EtatDonnees(0, vide, vide, vide, {}, vide)  # version incrémentée à chaque changement
+        self._signature = None
+        self._verrou = threading.Lock()  # une seule actualisation à la fois (sessions concurrentes)
+        self.charger()
+
+    def etat(self):
+        """État courant (version, tables, index, KPI), à lire une fois par calcul."""
+        return self._etat
+
+    @property
+    def version(self):
+        return self._etat.version
+
+    @property
+    def produits(self):
+        return self._etat.produits
+
+    @property
+    def stock(self):
+        return self._etat.stock
+
+    @property
+    def commandes(self):
+        return self._etat.commandes
+
+    @property
+    def index(self):
+        return self._etat.index
+
+    @property
+    def kpi_journalier(self):
+        return self._etat.kpi_journalier
+
+    def charger(self):
+        """
+        Chargement au démarrage : relit l'historique consolidé typé de `cache_dir`
+        (fragments Feather, sans analyse des CSV) puis n'ingère que les fichiers
+        journaliers absents du manifeste.
+        """
+        produits = charger_produits(self.data_dir)
+        # Un seul processus à la fois lit et complète l'historique du dossier de cache
+        with verrou_fichier(self._chemin_verrou()):
+            self.manifeste = Manifeste(self.cache_dir)
+
+            tables = {}
+            for table in TABLES_JOURNALIERES:
+                df = lire_consolide(self.cache_dir, table)
+                if len(df) != self.manifeste.lignes(table):
+                    # Historique incohérent avec le manifeste (écriture interrompue) : on repart de zéro
+                    supprimer_consolide(self.cache_dir, table)
+                    self.manifeste.oublier(table)
+                    df = pd.DataFrame()
+                tables[table] = df
+
+            index = {"produits": _etendre_index({}, produits, "produits", 0)}
+            for table, df in tables.items():
+                index[table] = _etendre_index({}, df, table, 0)
+            etat = EtatDonnees(self.version, produits, tables["stock"], tables["commandes"], index,
+                               construire_kpi_journalier(tables["stock"], tables["commandes"], produits))
+            etat, _ = self._ingerer(etat)
+        self._etat = etat._replace(version=self.version + 1)
+        self._signature = self.signature_sources()
+
+        for table in TABLES_JOURNALIERES:
+            if self.table(table).empty:
+                print(f"⚠ Aucun fichier {table} trouvé !")
+        print(f"Produits chargés : {len(self.produits)}")
+        print(f"Stock chargé : {len(self.stock)} lignes")
+        print(f"Commandes chargées : {len(self.commandes)} lignes")
+
+    def actualiser(self):
+        """
+        Ingère uniquement les fichiers journaliers nouveaux depuis le dernier passage :
+        chacun est lu et typé une fois, ajouté à l'historique en mémoire, puis
+        écrit seul dans un nouveau fragment de l'historique consolidé. Si un fichier déjà ingéré a changé,
+        la table est entièrement relue depuis les CSV. Le nouvel état est publié
+        d'un bloc, avec la version suivante.
+        Retourne la liste des fichiers lus.
+        """
+        etat, lus = self._ingerer(self._etat)
+        if etat is not self._etat:
+            self._etat = etat._replace(version=etat.version + 1)
+        return lus
+
+    def _ingerer(self, etat):
+        """
+        Nouvel état avec les fichiers journaliers absents du manifeste (même état si
+        rien n'a changé) et liste des fichiers lus. `etat` n'est pas modifié.
+        """
+        lus = []
+        tables = {table: getattr(etat, table) for table in TABLES_JOURNALIERES}
+        index = dict(etat.index)
+        kpi = etat.kpi_journalier
+        kpi_a_reconstruire = False
+        for table in TABLES_JOURNALIERES:
+            reconstruire, chemins = fichiers_a_ingerer(self.manifeste, self.data_dir, table, self.cache_dir)
+            if reconstruire:
+                kpi_a_reconstruire = True
+                supprimer_consolide(self.cache_dir, table)
+                self.manifeste.oublier(table)
+                tables[table] = pd.DataFrame()
+                index[table] = {}
+            if not chemins:
+                continue
+
+            ancien = tables[table]
+            # Rattrapage de nombreux fichiers : lecture répartie sur les cœurs
+            ajout, lignes = lire_fichiers_journaliers(chemins, table)
+            for chemin, nb_lignes in zip(chemins, lignes):
+                self.manifeste.enregistrer(chemin, table, nb_lignes)
+                lus.append(os.path.basename(chemin))
+            # Catégories de l'historique étendues des seules valeurs nouvelles (pas de retypage)
+            complet = ajout if ancien.empty else prolonger_table(ancien, ajout)
+            tables[table] = complet
+            ecrire_consolide(self.cache_dir, table, complet, ajout)
+            index[table] = _etendre_index(index[table], complet, table, len(ancien))
+            if not kpi_a_reconstruire:
+                # Seules les dates des nouveaux fichiers sont agrégées
+                kpi = ajouter_kpi_journalier(kpi, table, ajout, etat.produits)
+
+        if kpi_a_reconstruire:
+            kpi = construire_kpi_journalier(tables["stock"], tables["commandes"], etat.produits)
+        self.manifeste.sauvegarder()
+        if not lus and not kpi_a_reconstruire:
+            return etat, lus
+        return etat._replace(index=index, kpi_journalier=kpi, **tables), lus
+
+    def signature_sources(self):
+        """(nom, taille, mtime) de chaque CSV de `data_dir` : simple lecture du répertoire."""
+        signature = []
+        for entree in os.scandir(self.data_dir):
+            if entree.name.endswith(".csv"):
+                st = entree.stat()
+                signature.append((entree.name, st.st_size, st.st_mtime))
+        return tuple(sorted(signature))
+
+    def actualiser_si_necessaire(self):
+        """
+        Vérification bon marché à chaque rerun : ne relit rien si aucun CSV n'a changé.
+        Nouveau fichier journalier -> ingestion incrémentale ; produits.csv modifié ->
+        rechargement complet. Retourne `version`, à utiliser comme clé de cache.
+        """
+        signature = self.signature_sources()
+        if signature == self._signature:
+            return self.version
+        with self._verrou:
+            if signature == self._signature:
+                return self.version  # déjà actualisé par une autre session
+            produits = [entree for entree in signature if entree[0] == "produits.csv"]
+            anciens_produits = [entree for entree in (self._signature or ()) if entree[0] == "produits.csv"]
+            if produits != anciens_produits:
+                self.charger()
+                return self.version
+            with verrou_fichier(self._chemin_verrou()):
+                # Historique déjà complété par un autre processus (même dossier de cache) :
+                # ses fragments sont relus au lieu de réingérer les mêmes fichiers
+                a_jour = Manifeste(self.cache_dir).fichiers == self.manifeste.fichiers
+                if a_jour:
+                    self.actualiser()
+                    self._signature = signature
+            if not a_jour:
+                self.charger()
+        return self.version
+
+    def _chemin_verrou(self):
+        return os.path.join(self.cache_dir, VERROU_INGESTION)
+
+    def tampon_donnees(self):
+        """
+        Tampon des données ingérées, identique d'un redémarrage à l'autre : date du
+        dernier fichier journalier du manifeste et nombre de lignes de chaque table
+        (un fichier réingéré après modification change aussi le tampon).
+        """
+        dates = [date_depuis_nom(nom, entree["table"]) for nom, entree in self.manifeste.fichiers.items()]
+        derniere = max(dates).isoformat() if dates else "aucune"
+        return f"{derniere}#" + "+".join(str(self.manifeste.lignes(table)) for table in TABLES_JOURNALIERES)
+
+    def table(self, nom):
+        """Retourne le DataFrame `nom` ('produits', 'stock' ou 'commandes')."""
+        return getattr(self._etat, nom)
+
+    def positions(self, nom, col, valeur, etat=None):
+        """Positions (iloc) des lignes de `nom` dont la colonne `col` vaut `valeur`."""
+        etat = etat or self._etat
+        return etat.index.get(nom, {}).get(col, {}).get(_cle(valeur), _AUCUNE_POSITION)
+
+    def premiere_ligne(self, nom, col, valeur):
+        """
+        Retourne la première ligne de `nom` dont `col` vaut `valeur` sous forme
+        de dictionnaire, ou None si la clé est absente de l'index.
+        """
+        etat = self._etat
+        positions = self.positions(nom, col, valeur, etat)
+        if len(positions) == 0:
+            return None
+        return getattr(etat, nom).iloc[positions[:1]].to_dict(orient="records")[0]
+
+    def lignes(self, nom, criteres):
+        """
+        Retourne les lignes de la table `nom` qui vérifient tous les `criteres`
+        ({colonne: valeur}) en passant par les index. Les critères None sont ignorés.
+        """
+        etat = self._etat
+        df = getattr(etat, nom)
+        positions = None
+        for col, valeur in criteres.items():
+            if valeur is None:
+                continue
+            pos = self.positions(nom, col, valeur, etat)
+            positions = pos if positions is None else np.intersect1d(positions, pos, assume_unique=True)
+        if positions is None:
+            return df
+        return df.iloc[positions]
+
+
+# Instance unique partagée par tous les modules
+store = DataStore()
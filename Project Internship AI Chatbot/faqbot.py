@@ -0,0 +1,503 @@
+# ----------------------------
+# Fichier : faqbot.py
+# Description : Moteur de réponses du chatbot (routage des intentions, requêtes structurées,
+#               KPI, recherches dans les données, appels à Ollama), sans dépendance à Streamlit
+# ----------------------------
+
+import pandas as pd
+import requests
+import time
+from data_store import store, normaliser_reference
+from rendu import formater_lignes
+from routeur import Routeur
+from requetes import analyser_requete, repondre_requete
+from reponses_lot import repondre_lot
+from cache_reponses import cache_reponses
+from contexte_llm import construire_contexte
+from ollama_client import GENERATE_URL, KEEP_ALIVE, DelaiDepasse, generer_flux
+from kpi import (
+    commandes_clients_ce_mois, commandes_fournisseurs_ce_mois, stock_total_ce_mois, valeur_stock, taux_livraison,
+    produits_a_reapprovisionner, stock_total_produit, kpi_du_jour, evolution_kpi,
+)
+from tableau_bord import tableau_bord
+from traces import traceur, etape, relayer, ajouter as ajouter_duree
+from commandes_utils import (
+    get_contrepartie, get_statut_commande, get_quantite_commande, get_type_commande, get_date_livraison_prevue,
+    get_date_livraison_reelle, commandes_en_retard, lister_commandes_par_produit, lister_commandes_par_type,
+)
+from produits_utils import (
+    get_produit_info, get_fournisseur_principal, get_famille_produit, get_cout_unitaire, get_delai_livraison,
+    get_seuil_reappro, get_poids_unitaire, list_produits_par_famille, produit_plus_cher, list_familles,
+    produits_par_famille,
+)
+from stock_utils import get_stock_initial, get_stock_final, produits_en_rupture, produits_urgents, evolution_stock
+
+# Consignes placées en tête de chaque prompt (préfixe identique d'un appel à l'autre :
+# Ollama réutilise les clés/valeurs déjà calculées pour ce préfixe)
+PREFIXE_PROMPT = """Tu es un assistant expert en analyse de données pour Yazaki.
+Réponds de manière précise et concise en français. Si les données ne permettent pas de répondre, dis-le.
+Utilise les données fournies pour donner une réponse précise.
+
+"""
+
+# Taille maximale du contexte Ollama conservé par conversation (tokens)
+MAX_CONTEXTE_TOKENS = 3000
+
+
+class FAQBot:
+    def __init__(self, data_store=store, cache=cache_reponses, tableau=tableau_bord):
+        self.ollama_url = GENERATE_URL
+        self.model_name = "llama3.2:3b"
+        # Le modèle reste chargé entre deux questions (pas de rechargement ni de KV cache perdu)
+        self.keep_alive = KEEP_ALIVE
+
+        # Données partagées : le bot lit le magasin unique, sans copie
+        self.store = data_store
+        # Routeur d'intentions compilé une seule fois (remplace la cascade de mots-clés)
+        self.routeur = Routeur(data_store)
+        # Réponses d'Ollama déjà générées (partagées entre sessions, invalidées par les nouvelles données)
+        self.cache = cache
+        # KPI du tableau de bord recalculés en arrière-plan (lus sans recalcul)
+        self.tableau = tableau
+
+    @property
+    def produits(self):
+        return self.store.produits
+
+    @property
+    def stock(self):
+        return self.store.stock
+
+    @property
+    def commandes(self):
+        return self.store.commandes
+
+    # ------------ preparer le contexte de data -------------
+
+    def _prepare_data_context(self, route=None):
+        """
+        Prépare le contexte des données pour Ollama : résumé + lignes liées aux
+        entités de la question (référence, commande, site, famille, date), sous budget de tokens.
+        """
+        return construire_contexte(route)
+
+    # -------- Appel à Ollama ---------
+
+    def _prompt_ollama(self, question, context, suite):
+        """
+        Prompt à préfixe stable : les consignes (identiques à chaque appel) viennent
+        en premier, puis les données et la question qui changent. Pour une question
+        de suivi, le préfixe est déjà dans le `context` Ollama de la conversation.
+        """
+        donnees = f"Données utiles:\n{context}\n\nQuestion: {question}\n"
+        return donnees if suite else PREFIXE_PROMPT + donnees
+
+    def _flux_ollama(self, question, context, annulation=None, session=None):
+        """
+        Produit la réponse d'Ollama fragment par fragment (flux NDJSON de /api/generate).
+        `annulation` (threading.Event) interrompt la génération en fermant la connexion.
+        `session` (dictionnaire de la conversation) conserve le `context` renvoyé par
+        Ollama : les questions suivantes le renvoient et le préfixe n'est pas réévalué.
+        Retourne (valeur de `yield from`) la réponse complète, ou None si la génération
+        a été interrompue ou a échoué.
+        """
+        precedent = session.get("ollama_context") if session is not None else None
+        payload = {
+            "model": self.model_name,
+            "prompt": self._prompt_ollama(question, context, suite=bool(precedent)),
+            "keep_alive": self.keep_alive,
+        }
+        if precedent:
+            payload["context"] = precedent
+        morceaux = []
+        termine = False
+        debut, premier = time.perf_counter(), None
+        lecture = 0.0  # temps passé chez le lecteur entre deux fragments (hors génération)
+        try:
+            for morceau in generer_flux(payload, url=self.ollama_url, annulation=annulation):
+                if premier is None:
+                    # Attente (file, chargement du modèle, évaluation du prompt) jusqu'au premier fragment
+                    premier = time.perf_counter()
+                    ajouter_duree("ollama_attente", premier - debut)
+                if morceau.get("response"):
+                    morceaux.append(morceau["response"])
+                    pause = time.perf_counter()
+                    try:
+                        yield morceau["response"]
+                    finally:
+                        lecture += time.perf_counter() - pause
+                if morceau.get("done"):
+                    termine = True
+                    if session is not None:
+                        suivant = morceau.get("context") or []
+                        # Au-delà de la fenêtre du modèle, la conversation repart du préfixe
+                        session["ollama_context"] = suivant if len(suivant) <= MAX_CONTEXTE_TOKENS else None
+            if not morceaux:
+                yield 'Désolé, je n\'ai pas pu générer de réponse.'
+            elif termine:
+                return "".join(morceaux)
+        except requests.exceptions.ConnectionError:
+            yield "❌ Impossible de se connecter à Ollama. Vérifiez Ollama."
+        except DelaiDepasse as e:
+            yield f"⏳ Ollama est très sollicité ({e}). Réessayez dans un instant."
+        except requests.exceptions.ReadTimeout:
+            yield "⏰ Temps de réponse trop long. Essayez une question plus précise."
+        except requests.exceptions.HTTPError as e:
+            yield f"Erreur Ollama: {e}"
+        except Exception as e:
+            yield f"❌ Erreur lors de l'appel à Ollama: {str(e)}"
+        finally:
+            if premier is None:
+                ajouter_duree("ollama_attente", time.perf_counter() - debut)
+            else:
+                ajouter_duree("ollama_generation", time.perf_counter() - premier - lecture)
+
+    def _question_analytique(self, question):
+        """Question reformulée + contexte léger (KPI) pour éviter les timeouts."""
+        # KPI lus dans la table précalculée (aucun recalcul sur l'historique)
+        kpis = kpi_du_jour()
+        context = "Résumé des KPI disponibles:\n"
+        context += f"- Valeur totale du stock: {kpis['valeur_stock']} MAD\n"
+        context += f"- Produits en rupture: {kpis['nb_ruptures']}\n"
+        context += f"- Taux de livraison à temps: {kpis['taux_livraison']} %\n"
+        context += f"- Commandes en retard: {kpis['nb_commandes_retard']}\n"
+        context += f"- Produits à réapprovisionner: {kpis['nb_reappro']}\n"
+        return f"{question}\nDonne une réponse analytique et des recommandations concrètes.", context
+
+
+    # --------- Fonction principale ask ----
+
+    def ask(self, question: str) -> str:
+        return "".join(self.ask_flux(question))
+
+    def ask_flux(self, question: str, annulation=None, session=None, route=None, requete=None):
+        """
+        Réponse sous forme de fragments de texte : en un seul morceau pour les
+        questions traitées sur les données, token par token quand Ollama répond.
+        `session` : dictionnaire de la conversation (réutilisation du contexte Ollama).
+        `route` / `requete` : analyse déjà faite par l'appelant (lot de questions),
+        le routage n'est alors pas refait.
+        """
+        # Durée de chaque étape enregistrée à la fin (y compris si la génération est interrompue) ;
+        # seul le temps de production des fragments compte, pas celui du lecteur entre deux
+        trace = traceur.demarrer()
+        try:
+            yield from relayer(trace, self._flux_reponse(question, trace, annulation, session, route, requete))
+        finally:
+            traceur.terminer(trace)
+
+    def _flux_reponse(self, question, trace, annulation, session, route, requete):
+        """Fragments de la réponse (voir ask_flux), produits sous la trace de la question."""
+        if route is None:
+            # Une seule analyse de la question : intention + entités (réf., commande, date, page)
+            with etape("routage"):
+                route = self.routeur.analyser(question)
+                requete = self._requete_applicable(question, route)
+        if requete is not None:
+            self._intention_trace(trace, "requete")
+            with etape("donnees"):
+                reponse = repondre_requete(requete, route["page"], self.store)
+            yield reponse
+        elif route["message"]:
+            self._intention_trace(trace, "message")
+            yield route["message"]
+        elif route["intention"] is None or route["intention"] == "analytique":
+            # ---------------- Sinon → Ollama ----------------
+            self._intention_trace(trace, route["intention"] or "ollama")
+            yield from self._flux_ollama_en_cache(question, route, annulation, session)
+        else:
+            self._intention_trace(trace, route["intention"])
+            with etape("donnees"):
+                reponse = self.repondre_route(question, route)
+            yield reponse
+
+    @staticmethod
+    def _intention_trace(trace, intention):
+        if trace is not None:
+            trace.intention = intention
+
+    def _requete_applicable(self, question, route):
+        """
+        Requête structurée à exécuter à la place du gestionnaire de l'intention, ou None.
+        Agrégations (filtre, regroupement, top N) calculées directement sur les données :
+        prioritaires sur un mot-clé isolé dès qu'il y a un regroupement ou un filtre site/famille,
+        jamais pour les questions d'analyse.
+        """
+        requete = analyser_requete(question, route)
+        if requete is not None and route["intention"] != "analytique" and (
+                route["intention"] is None or route["message"] or requete["prioritaire"]):
+            return requete
+        return None
+
+    def repondre_route(self, question, route):
+        """Réponse du gestionnaire de l'intention de `route` (sans routage, ni requête, ni Ollama)."""
+        return getattr(self, "_repondre_" + route["intention"])(question, route)
+
+    def ask_lot(self, elements):
+        """
+        Réponses à une liste de questions (texte) ou de tuples (intention, entités),
+        regroupées par intention et calculées en une passe par groupe (voir reponses_lot).
+        """
+        return repondre_lot(self, elements)
+
+    def _flux_ollama_en_cache(self, question, route, annulation=None, session=None):
+        """
+        Réponse d'Ollama, servie depuis le cache si la même question (normalisée) a
+        déjà été posée sur les mêmes données. Une question posée dans une conversation
+        avec contexte Ollama (analytique ou non) dépend de l'échange précédent : elle
+        n'est ni lue ni écrite dans le cache.
+        """
+        analytique = route["intention"] == "analytique"
+        avec_cache = not (session and session.get("ollama_context"))
+        tampon = self.store.tampon_donnees()
+        if avec_cache:
+            with etape("cache"):
+                reponse = self.cache.lire(question, tampon)
+            if reponse is not None:
+                yield reponse
+                return
+
+        with etape("contexte"):
+            if analytique:
+                question_llm, context = self._question_analytique(question)
+            else:
+                question_llm, context = question, self._prepare_data_context(route)
+        reponse = yield from self._flux_ollama(question_llm, context, annulation, session)
+        if reponse and avec_cache:
+            self.cache.enregistrer(question, tampon, reponse)
+
+    # ---------------- Produits ----------------
+    def _repondre_fournisseur_principal(self, question, r):
+        ref = r["ref"]
+        info = get_produit_info(ref)
+        if isinstance(info, str):
+            return info
+        return f" Fournisseur principal de {ref} : {get_fournisseur_principal(ref)}"
+
+    def _repondre_famille_produit(self, question, r):
+        return f" Famille du produit {r['ref']} : {get_famille_produit(r['ref'])}"
+
+    def _repondre_cout_unitaire(self, question, r):
+        ref = r["ref"]
+        info = get_produit_info(ref)
+        if isinstance(info, str):  # Produit non trouvé
+            return info
+        return f" Coût unitaire de {ref} : {get_cout_unitaire(ref)}"
+
+    def _repondre_delai_livraison(self, question, r):
+        ref = r["ref"]
+        info = get_produit_info(ref)
+        if isinstance(info, str):
+            return info
+        return f" Délai de livraison de {ref} : {get_delai_livraison(ref)} jours"
+
+    def _repondre_seuil_reappro(self, question, r):
+        ref = r["ref"]
+        info = get_produit_info(ref)
+        if isinstance(info, str):  # Produit non trouvé
+            return info
+        return f" Seuil de réapprovisionnement du produit {ref} : {get_seuil_reappro(ref)}"
+
+    def _repondre_poids_unitaire(self, question, r):
+        ref = r["ref"]
+        info = get_produit_info(ref)
+        if isinstance(info, str):  # Produit non trouvé
+            return info
+        return f" Poids unitaire du produit {ref} : {get_poids_unitaire(ref)}"
+
+    def _repondre_liste_produits_famille(self, question, r):
+        fam = r["famille"]
+        return f" Produits de la famille {fam} :{list_produits_par_famille(fam)}"
+
+    def _repondre_produit_plus_cher(self, question, r):
+        return f" Produit le plus cher : {produit_plus_cher()}"
+
+    def _repondre_liste_familles(self, question, r):
+        return f" Familles disponibles : {list_familles()}"
+
+    def _repondre_details_famille(self, question, r):
+        fam = r["famille"]
+        produits = produits_par_famille(fam)
+        if not produits:
+            return f"⚠ Aucun produit trouvé pour la famille {fam}."
+        if isinstance(produits, pd.DataFrame):
+            refs = ", ".join(produits['Référence_Produit'].tolist())
+        else:  # Si c'est déjà une liste de dicts
+            refs = ", ".join([p['Référence_Produit'] for p in produits])
+        return f" Produits de la famille {fam} : {refs}"
+
+    # ---------------- Commandes ----------------
+    def _repondre_contrepartie(self, question, r):
+        info = get_contrepartie(r["num"])
+        if isinstance(info, str):
+            return info
+        return f" Contrepartie de la commande {r['num']} : {info}"
+
+    def _repondre_statut_commande(self, question, r):
+        info = get_statut_commande(r["num"])
+        if isinstance(info, str):
+            return info
+        return f" Statut de la commande {r['num']} : {info}"
+
+    def _repondre_quantite_commande(self, question, r):
+        info = get_quantite_commande(r["num"])
+        if isinstance(info, str):
+            return info
+        return f" Quantité de la commande {r['num']} : {info}"
+
+    def _repondre_type_commande(self, question, r):
+        info = get_type_commande(r["num"])
+        if isinstance(info, str):
+            return info
+        return f" Type de la commande {r['num']} : {info}"
+
+    def _repondre_livraison_prevue(self, question, r):
+        info = get_date_livraison_prevue(r["num"])
+        if isinstance(info, str):
+            return info
+        return f" Livraison prévue de la commande {r['num']} : {info}"
+
+    def _repondre_livraison_reelle(self, question, r):
+        info = get_date_livraison_reelle(r["num"])
+        if isinstance(info, str):
+            return info
+        return f" Livraison réelle de {r['num']} : {info}"
+
+    def _repondre_commandes_retard(self, question, r):
+        return f"⏰ Commandes en retard :\n{commandes_en_retard(page=r['page'])}"
+
+    def _repondre_commandes_par_produit(self, question, r):
+        info = lister_commandes_par_produit(r["ref"], page=r["page"])
+        if info.startswith("❌"):
+            return info
+        return f"📦 Commandes pour le produit {r['ref']} :\n" + info
+
+    def _repondre_commandes_par_type(self, question, r):
+        info = lister_commandes_par_type(r["type_commande"], page=r["page"])
+        if info.startswith("❌"):
+            return info
+        return f"📦 Commandes de type {r['type_commande']} :\n" + info
+
+    def _repondre_details_commande_client(self, question, r):
+        # --- Détails complets d'une commande pour un client ---
+        client = r["code"]
+        if 'Num_Commande' not in self.commandes.columns:
+            return "❌ La colonne 'Num_Commande' n'existe pas dans les commandes."
+
+        # Filtrer toutes les commandes de ce client
+        commandes_client = self.commandes[
+            self.commandes['Num_Commande'].str.strip().str.upper().str.contains(client)
+        ]
+        if commandes_client.empty:
+            return f"❌ Aucune commande trouvée pour le client {client}."
+
+        # Construire un texte détaillé
+        return formater_lignes(
+            commandes_client,
+            "📦 Commande {Num_Commande} :\n "
+            "Produit {Référence_Produit} \n, "
+            "Quantité: {Quantité} \n, "
+            "Statut: {Statut_Commande} \n, "
+            "Type: {Type_Commande} \n, "
+            "Livraison prévue: {Date_Livraison_Prévue}\n, "
+            "Livraison réelle: {Date_Livraison_Réelle}\n,"
+            "Contrepartie : {Contrepartie}",
+            r["page"],
+        )
+
+    # ---------------- Stock ----------------
+    def _repondre_stock_initial(self, question, r):
+        ref, date_filter = r["ref"], r["date"]
+        result = get_stock_initial(ref, date_filter, site=r["site"])
+        if isinstance(result, str):  # si la fonction renvoie un message d'erreur
+            return result
+        site_str = f" ({r['site']})" if r["site"] else ""
+        date_str = f" au {date_filter}" if date_filter else ""
+        return f" Stock initial de {ref}{site_str}{date_str} : {result}"
+
+    def _repondre_stock_final(self, question, r):
+        ref, date_filter = r["ref"], r["date"]
+        stock = get_stock_final(ref, date_filter, site=r["site"])
+        if isinstance(stock, str):
+            return stock
+        site_str = f" ({r['site']})" if r["site"] else ""
+        date_str = f" au {date_filter}" if date_filter else ""
+        return f" Stock final de {ref}{site_str}{date_str} : {stock}"
+
+    def _repondre_produits_rupture(self, question, r):
+        return f" Produits en rupture :\n{produits_en_rupture(page=r['page'])}"
+
+    def _repondre_produits_urgents(self, question, r):
+        return f" Produits urgents :\n{produits_urgents(date=r['date'], page=r['page'])}"
+
+    def _repondre_evolution_stock(self, question, r):
+        return f"📊 Évolution du stock pour {r['ref']} :\n{evolution_stock(r['ref'], page=r['page'])}"
+
+    # ---------------- Informations complètes ----------------
+    def _repondre_infos_completes(self, question, r):
+        q = question.lower()
+        date_filter, page = r["date"], r["page"]
+        # Cas spécifiques rupture / urgents
+        if "produits en rupture" in q:
+            return f"⚠ Produits en rupture : {produits_en_rupture(date=date_filter, page=page)}"
+        if "produits urgents" in q:
+            return f"⚠ Produits urgents : {produits_urgents(date=date_filter, page=page)}"
+
+        ref = r["ref"]
+        if not ref:
+            return "❌ Référence produit introuvable dans la question."
+        date_str = f" le {date_filter}" if date_filter else ""
+        infos = {
+            "Fournisseur": get_fournisseur_principal(ref),
+            "Famille": get_famille_produit(ref),
+            "Coût unitaire": get_cout_unitaire(ref),
+            "Stock initial": get_stock_initial(ref, date_filter),
+            "Stock final": get_stock_final(ref, date_filter),
+            "Évolution stock": evolution_stock(ref)
+        }
+        return " Informations complètes du produit {}{} :\n{}".format(ref, date_str, "\n".join(f"{k}: {v}" for k, v in infos.items()))
+
+    # ---------------- KPI ----------------
+    def _repondre_tendance_kpi(self, question, r):
+        # Tendance historique d'un KPI (table précalculée par date)
+        indicateur, libelle, unite = ("taux_livraison", "Taux de livraison à temps", "%") if "taux" in question.lower() else ("valeur_stock", "Valeur du stock", "MAD")
+        serie = evolution_kpi(indicateur)
+        if serie.empty:
+            return "📈 Pas de données disponibles"
+        lignes = [f"📅 {jour.date()} : {valeur} {unite}" for jour, valeur in serie.items()]
+        return f"📈 {libelle} par date :\n" + "\n".join(lignes)
+
+    def _repondre_valeur_stock(self, question, r):
+        if r["date"]:
+            return f"💰 Valeur totale du stock : {valeur_stock(date=r['date'])} MAD"
+        return f"💰 Valeur totale du stock : {self.tableau.valeur('valeur_stock', valeur_stock)} MAD"
+
+    def _repondre_taux_livraison(self, question, r):
+        if r["date"]:
+            result = taux_livraison(date=r["date"])
+        else:
+            result = self.tableau.valeur("taux_livraison", taux_livraison)
+        return f"🚚 Taux de livraison à temps : {result}%" if result is not None else "🚚 Pas de données disponibles"
+
+    def _repondre_produits_a_reapprovisionner(self, question, r):
+        return f"📦 Produits à réapprovisionner : {produits_a_reapprovisionner(date=r['date'])}"
+
+    def _repondre_commandes_clients_mois(self, question, r):
+        result = self.tableau.valeur("commandes_clients_ce_mois", lambda: commandes_clients_ce_mois(self.commandes))
+        return f"🛒 Commandes clients ce mois : {result}"
+
+    def _repondre_commandes_fournisseurs_mois(self, question, r):
+        result = self.tableau.valeur("commandes_fournisseurs_ce_mois", lambda: commandes_fournisseurs_ce_mois(self.commandes))
+        return f"📦 Commandes fournisseurs ce mois : {result}"
+
+    def _repondre_stock_total_mois(self, question, r):
+        result = self.tableau.valeur("stock_total_ce_mois", lambda: stock_total_ce_mois(self.stock))
+        return f"📊 Stock total disponible ce mois : {result}"
+
+    def _repondre_stock_total_produit(self, question, r):
+        ref = r["ref"]
+        result = stock_total_produit(ref, self.stock, date=r["date"])
+        return f"📊 Stock total du produit {ref} : {result}"
+
+    # -------------------------------------------------
+    normaliser_reference = staticmethod(normaliser_reference)
@@ -0,0 +1,45 @@
+# ----------------------------
+# Fichier : fichiers.py
+# Description : Écritures sûres dans le dossier de cache, partagé par plusieurs processus
+#               (fichier temporaire propre au processus puis renommage atomique, verrou
+#               entre processus pour l'ingestion)
+# ----------------------------
+
+from contextlib import contextmanager
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus (un seul processus y écrit le cache)
+    fcntl = None
+
+
+def chemin_temporaire(chemin):
+    """Fichier temporaire à côté de `chemin`, propre au processus (deux écrivains ne se mélangent pas)."""
+    return f"{chemin}.{os.getpid()}.tmp"
+
+
+def ecrire_atomique(chemin, contenu):
+    """Écrit `contenu` dans un fichier temporaire puis le renomme (pas de fichier à moitié écrit)."""
+    tmp = chemin_temporaire(chemin)
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(contenu)
+    os.replace(tmp, chemin)
+
+
+@contextmanager
+def verrou_fichier(chemin):
+    """
+    Verrou exclusif entre processus (flock sur `chemin`, créé au besoin), relâché à la
+    sortie du bloc. Un même processus ne doit pas le reprendre dans le bloc.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    with open(chemin, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -1,16 +1,267 @@
 import json
 import os
+import sqlite3
+import threading
 
-HISTORIQUE_FILE = "historique.json"
+HISTORIQUE_FILE = "historique.json"   # ancien format (importé une fois dans la base)
+HISTORIQUE_DB = "historique.db"
 
-def charger_historique():
-    """Charge l'historique depuis un fichier JSON"""
-    if os.path.exists(HISTORIQUE_FILE):
-        with open(HISTORIQUE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+# Compactage (VACUUM) après ce nombre de messages supprimés
+SEUIL_COMPACTAGE = 500
 
-def sauvegarder_historique(historique):
-    """Sauvegarde l'historique dans un fichier JSON"""
-    with open(HISTORIQUE_FILE, "w", encoding="utf-8") as f:
-        json.dump(historique, f, indent=4, ensure_ascii=False)
+# Espace des conversations créées avant la séparation par utilisateur (ancien historique.json)
+UTILISATEUR_LOCAL = "local"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    utilisateur TEXT NOT NULL,
+    id          TEXT NOT NULL,
+    titre       TEXT NOT NULL,
+    cree        TEXT NOT NULL,
+    PRIMARY KEY (utilisateur, id)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    num             INTEGER PRIMARY KEY AUTOINCREMENT,
+    utilisateur     TEXT NOT NULL,
+    conversation_id TEXT NOT NULL,
+    role            TEXT NOT NULL,
+    contenu         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_conversation ON messages (utilisateur, conversation_id, num);
+CREATE INDEX IF NOT EXISTS conversations_utilisateur ON conversations (utilisateur);
+CREATE TABLE IF NOT EXISTS meta (
+    cle     TEXT PRIMARY KEY,
+    valeur  TEXT
+);
+
+-- Compteurs par utilisateur tenus à jour à chaque écriture : lecture en O(1)
+CREATE TABLE IF NOT EXISTS compteurs (
+    utilisateur   TEXT PRIMARY KEY,
+    conversations INTEGER NOT NULL DEFAULT 0,
+    messages      INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS compter_conversation AFTER INSERT ON conversations BEGIN
+    INSERT OR IGNORE INTO compteurs (utilisateur) VALUES (NEW.utilisateur);
+    UPDATE compteurs SET conversations = conversations + 1 WHERE utilisateur = NEW.utilisateur;
+END;
+CREATE TRIGGER IF NOT EXISTS decompter_conversation AFTER DELETE ON conversations BEGIN
+    UPDATE compteurs SET conversations = conversations - 1 WHERE utilisateur = OLD.utilisateur;
+END;
+CREATE TRIGGER IF NOT EXISTS compter_message AFTER INSERT ON messages BEGIN
+    INSERT OR IGNORE INTO compteurs (utilisateur) VALUES (NEW.utilisateur);
+    UPDATE compteurs SET messages = messages + 1 WHERE utilisateur = NEW.utilisateur;
+END;
+CREATE TRIGGER IF NOT EXISTS decompter_message AFTER DELETE ON messages BEGIN
+    UPDATE compteurs SET messages = messages - 1 WHERE utilisateur = OLD.utilisateur;
+END;
+"""
+
+
+class Historique:
+    """
+    Historique des conversations dans SQLite (journal WAL) : chaque message est
+    une ligne ajoutée dans sa propre transaction, donc enregistrer un message coûte
+    le même prix quelle que soit la taille de l'historique, et deux sessions qui
+    écrivent en même temps ne s'écrasent pas. Les messages d'une conversation ne
+    sont lus que lorsqu'on l'ouvre.
+    Chaque utilisateur a son propre espace de conversations (voir `espace`).
+    """
+
+    def __init__(self, chemin=HISTORIQUE_DB, ancien_json=HISTORIQUE_FILE):
+        self.chemin = chemin
+        self._local = threading.local()  # une connexion par thread (sessions Streamlit)
+        self._supprimes = 0
+        with self._connexion() as conn:
+            self._migrer(conn)
+            conn.executescript(SCHEMA)
+            self._initialiser_compteurs(conn)
+        self._importer_json(ancien_json)
+
+    def _connexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.chemin, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # WAL : durable au checkpoint, jamais corrompu
+            self._local.conn = conn
+        return conn
+
+    def _migrer(self, conn):
+        """Base créée avant les espaces utilisateur : ses conversations passent dans l'espace local."""
+        colonnes = {ligne[1] for ligne in conn.execute("PRAGMA table_info(conversations)")}
+        if not colonnes or "utilisateur" in colonnes:
+            return
+        conn.executescript(
+            "ALTER TABLE conversations RENAME TO conversations_v1;"
+            "ALTER TABLE messages RENAME TO messages_v1;"
+            "DROP INDEX messages_conversation;"
+            + SCHEMA +
+            f"INSERT INTO conversations SELECT '{UTILISATEUR_LOCAL}', id, titre, cree FROM conversations_v1 ORDER BY rowid;"
+            f"INSERT INTO messages SELECT num, '{UTILISATEUR_LOCAL}', conversation_id, role, contenu FROM messages_v1;"
+            "DROP TABLE conversations_v1;"
+            "DROP TABLE messages_v1;"
+        )
+
+    def _initialiser_compteurs(self, conn):
+        """Base créée avant les compteurs : ils sont calculés une fois, puis tenus par les triggers."""
+        if conn.execute("SELECT 1 FROM meta WHERE cle = 'compteurs'").fetchone():
+            return
+        conn.executescript(
+            "DELETE FROM compteurs;"
+            "INSERT INTO compteurs (utilisateur, conversations) "
+            "SELECT utilisateur, COUNT(*) FROM conversations GROUP BY utilisateur;"
+            "INSERT OR IGNORE INTO compteurs (utilisateur) SELECT DISTINCT utilisateur FROM messages;"
+            "UPDATE compteurs SET messages = "
+            "(SELECT COUNT(*) FROM messages WHERE messages.utilisateur = compteurs.utilisateur);"
+            "INSERT INTO meta (cle, valeur) VALUES ('compteurs', '1');"
+        )
+
+    def _importer_json(self, ancien_json):
+        """Reprend une seule fois l'ancien historique.json dans l'espace local (le fichier n'est pas modifié)."""
+        conn = self._connexion()
+        if conn.execute("SELECT 1 FROM meta WHERE cle = 'import_json'").fetchone():
+            return
+        with conn:
+            if ancien_json and os.path.exists(ancien_json):
+                with open(ancien_json, "r", encoding="utf-8") as f:
+                    for chat_id, chat in json.load(f).items():
+                        conn.execute(
+                            "INSERT OR IGNORE INTO conversations (utilisateur, id, titre, cree) VALUES (?, ?, ?, ?)",
+                            (UTILISATEUR_LOCAL, chat_id, chat.get("title", ""), chat.get("created", "")),
+                        )
+                        conn.executemany(
+                            "INSERT INTO messages (utilisateur, conversation_id, role, contenu) VALUES (?, ?, ?, ?)",
+                            [(UTILISATEUR_LOCAL, chat_id, m["role"], m["content"]) for m in chat.get("messages", [])],
+                        )
+            conn.execute("INSERT INTO meta (cle, valeur) VALUES ('import_json', ?)", (ancien_json or "",))
+
+    def espace(self, utilisateur):
+        """Vue de l'historique limitée aux conversations de `utilisateur`."""
+        return EspaceHistorique(self, utilisateur)
+
+    # ---- Lecture ----
+    def lister(self, utilisateur, limite=-1, decalage=0, sauf=None):
+        """
+        Conversations (sans leurs messages) : {id: {'title', 'created'}}, la plus récente
+        d'abord. `limite` / `decalage` lisent une seule page ; `sauf` exclut un identifiant.
+        """
+        lignes = self._connexion().execute(
+            "SELECT id, titre, cree FROM conversations WHERE utilisateur = ? AND id IS NOT ? "
+            "ORDER BY rowid DESC LIMIT ? OFFSET ?",
+            (utilisateur, sauf, limite, decalage),
+        )
+        return {chat_id: {"title": titre, "created": cree} for chat_id, titre, cree in lignes}
+
+    def compteurs(self, utilisateur):
+        """{'conversations': n, 'messages': n} de l'utilisateur (compteurs tenus à jour, sans comptage)."""
+        ligne = self._connexion().execute(
+            "SELECT conversations, messages FROM compteurs WHERE utilisateur = ?", (utilisateur,)
+        ).fetchone()
+        conversations, messages = ligne or (0, 0)
+        return {"conversations": conversations, "messages": messages}
+
+    def messages(self, utilisateur, chat_id):
+        """Messages d'une conversation (chargés à la demande)."""
+        lignes = self._connexion().execute(
+            "SELECT role, contenu FROM messages WHERE utilisateur = ? AND conversation_id = ? ORDER BY num",
+            (utilisateur, chat_id),
+        )
+        return [{"role": role, "content": contenu} for role, contenu in lignes]
+
+    # ---- Écriture (une transaction chacune) ----
+    def creer(self, utilisateur, chat_id, titre, cree):
+        """Crée (ou remet à zéro) une conversation."""
+        with self._connexion() as conn:
+            self._effacer_messages(conn, utilisateur, chat_id)
+            conn.execute(
+                "INSERT INTO conversations (utilisateur, id, titre, cree) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (utilisateur, id) DO UPDATE SET titre = excluded.titre, cree = excluded.cree",
+                (utilisateur, chat_id, titre, cree),
+            )
+
+    def ajouter_message(self, utilisateur, chat_id, role, contenu):
+        """Ajoute un message à la fin d'une conversation : une seule ligne insérée."""
+        with self._connexion() as conn:
+            conn.execute(
+                "INSERT INTO messages (utilisateur, conversation_id, role, contenu) VALUES (?, ?, ?, ?)",
+                (utilisateur, chat_id, role, contenu),
+            )
+
+    def archiver(self, utilisateur, chat_id, nouvel_id, titre):
+        """Renomme une conversation (ex: le chat principal archivé lors d'un « Nouveau chat »)."""
+        with self._connexion() as conn:
+            conn.execute(
+                "UPDATE conversations SET id = ?, titre = ? WHERE utilisateur = ? AND id = ?",
+                (nouvel_id, titre, utilisateur, chat_id),
+            )
+            conn.execute(
+                "UPDATE messages SET conversation_id = ? WHERE utilisateur = ? AND conversation_id = ?",
+                (nouvel_id, utilisateur, chat_id),
+            )
+
+    def vider(self, utilisateur, chat_id):
+        with self._connexion() as conn:
+            self._effacer_messages(conn, utilisateur, chat_id)
+        self._compacter_si_necessaire()
+
+    def supprimer(self, utilisateur, chat_id):
+        with self._connexion() as conn:
+            self._effacer_messages(conn, utilisateur, chat_id)
+            conn.execute("DELETE FROM conversations WHERE utilisateur = ? AND id = ?", (utilisateur, chat_id))
+        self._compacter_si_necessaire()
+
+    def _effacer_messages(self, conn, utilisateur, chat_id):
+        self._supprimes += conn.execute(
+            "DELETE FROM messages WHERE utilisateur = ? AND conversation_id = ?", (utilisateur, chat_id)
+        ).rowcount
+
+    # ---- Compactage ----
+    def compacter(self):
+        """Récupère la place des messages supprimés et vide le journal WAL."""
+        conn = self._connexion()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+        self._supprimes = 0
+
+    def _compacter_si_necessaire(self):
+        if self._supprimes >= SEUIL_COMPACTAGE:
+            self.compacter()
+
+
+class EspaceHistorique:
+    """
+    Conversations d'un seul utilisateur : mêmes méthodes que Historique, sans le
+    paramètre `utilisateur`. Une session ne peut ni lire ni réécrire celles des autres.
+    """
+
+    def __init__(self, historique, utilisateur):
+        self.historique = historique
+        self.utilisateur = utilisateur
+
+    def lister(self, limite=-1, decalage=0, sauf=None):
+        return self.historique.lister(self.utilisateur, limite, decalage, sauf)
+
+    def messages(self, chat_id):
+        return self.historique.messages(self.utilisateur, chat_id)
+
+    def compteurs(self):
+        return self.historique.compteurs(self.utilisateur)
+
+    def creer(self, chat_id, titre, cree):
+        self.historique.creer(self.utilisateur, chat_id, titre, cree)
+
+    def ajouter_message(self, chat_id, role, contenu):
+        self.historique.ajouter_message(self.utilisateur, chat_id, role, contenu)
+
+    def archiver(self, chat_id, nouvel_id, titre):
+        self.historique.archiver(self.utilisateur, chat_id, nouvel_id, titre)
+
+    def vider(self, chat_id):
+        self.historique.vider(self.utilisateur, chat_id)
+
+    def supprimer(self, chat_id):
+        self.historique.supprimer(self.utilisateur, chat_id)
+
+
+# Instance unique partagée par les sessions
+historique = Historique()
@@ -0,0 +1,337 @@
+# ----------------------------
+# Fichier : ingestion.py
+# Description : Ingestion incrémentale des fichiers journaliers (stock_*.csv / commandes_*.csv)
+#               avec un manifeste des fichiers déjà lus et un historique consolidé typé sur disque
+# ----------------------------
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import hashlib
+from itertools import repeat
+import json
+import os
+import shutil
+import pandas as pd
+from pandas.api.types import union_categoricals
+from fichiers import chemin_temporaire, ecrire_atomique
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow absent : historique consolidé en CSV, lecture sur un seul cœur
+    pa = pa_csv = feather = None
+
+CACHE_DIR = "cache"
+MANIFESTE_FILE = "manifeste.json"
+TABLES_JOURNALIERES = ("stock", "commandes")
+
+# Schéma typé des tables journalières (les CSV restent la source de vérité)
+COLONNES_CATEGORIE = ["Référence_Produit", "Site", "Statut", "Type_Commande", "Statut_Commande"]
+COLONNES_DATE = ["Date", "Date_Commande", "Date_Livraison_Prévue", "Date_Livraison_Réelle"]
+COLONNES_QUANTITE = ["Stock_Initial", "Entrées", "Sorties", "Stock_Final", "Quantité"]
+
+# À partir de ce nombre de fichiers à lire (rattrapage d'historique), lecture en parallèle
+SEUIL_LECTURE_PARALLELE = 16
+# Au-delà de ce nombre de fragments Feather, l'historique d'une table est regroupé en un seul
+MAX_FRAGMENTS = 32
+
+
+# ----------------------------
+# 1️⃣ Lecture d'un fichier journalier
+# ----------------------------
+def date_depuis_nom(file, prefix):
+    """Extrait la date AAAA-MM-JJ du nom de fichier, ou la date du jour à défaut."""
+    try:
+        date_str = file.replace(prefix, "").replace(".csv", "").replace("_", "")
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return datetime.today().date()  # fallback si date non trouvée
+
+
+def lire_fichier_journalier(chemin, prefix):
+    """Lit un CSV journalier et ajoute la colonne 'Date' déduite du nom du fichier."""
+    df = pd.read_csv(chemin)
+    df["Date"] = date_depuis_nom(os.path.basename(chemin), prefix)
+    return df
+
+
+def typer_table(df, categories=True):
+    """
+    Applique le schéma typé : catégories pour les références/sites/statuts,
+    datetime64 pour les dates, int32 pour les quantités (Int32 si valeurs manquantes).
+    Sans effet sur une colonne déjà au bon type.
+    """
+    for col in COLONNES_CATEGORIE if categories else []:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in COLONNES_DATE:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col in COLONNES_QUANTITE:
+        if col in df.columns:
+            valeurs = pd.to_numeric(df[col], errors="coerce")
+            df[col] = valeurs.astype("Int32" if valeurs.isna().any() else "int32")
+    return df
+
+
+def prolonger_table(ancien, ajout):
+    """
+    Historique typé `ancien` suivi du bloc typé `ajout`, sans retyper l'historique :
+    les catégories de chaque colonne sont réunies (union_categoricals : celles de
+    l'ancien bloc d'abord, puis les seules nouvelles valeurs du bloc ajouté), les
+    autres colonnes gardent leur type. `ancien` n'est pas modifié.
+    """
+    categories = [col for col in COLONNES_CATEGORIE
+                  if col in ancien.columns and isinstance(ancien[col].dtype, pd.CategoricalDtype)]
+    try:
+        reunies = {}
+        for col in categories:
+            bloc = ajout[col] if col in ajout.columns else pd.Series(pd.Categorical.from_codes(
+                [-1] * len(ajout), categories=ancien[col].cat.categories))
+            reunies[col] = union_categoricals([ancien[col], bloc.astype("category")], ignore_order=True)
+    except TypeError:
+        # Catégories de types différents (ex: texte / nombres) : concaténation puis typage complet
+        return typer_table(pd.concat([ancien, ajout], ignore_index=True))
+    complet = pd.concat([ancien.drop(columns=categories), ajout.drop(columns=categories, errors="ignore")],
+                        ignore_index=True)
+    for col, valeurs in reunies.items():
+        complet[col] = valeurs
+    return complet[list(dict.fromkeys([*ancien.columns, *ajout.columns]))]
+
+
+def _lire_bloc_arrow(chemin, prefix):
+    """
+    Lecture d'un fichier dans un processus de lecture : CSV analysé par pyarrow, colonne
+    Date, dates et quantités typées ; les catégories sont créées après concaténation
+    (un seul dictionnaire pour toute la table). Renvoyé en table Arrow (transfert sans
+    sérialisation ligne à ligne).
+    """
+    # Un seul thread par processus (les processus occupent déjà les cœurs) ; dates lues en texte
+    # et champs vides -> valeurs manquantes, comme pd.read_csv : même conversion dans typer_table
+    table = pa_csv.read_csv(
+        chemin,
+        read_options=pa_csv.ReadOptions(use_threads=False),
+        convert_options=pa_csv.ConvertOptions(column_types=dict.fromkeys(COLONNES_DATE, pa.string()),
+                                              strings_can_be_null=True),
+    )
+    df = table.to_pandas()
+    df["Date"] = date_depuis_nom(os.path.basename(chemin), prefix)
+    df = typer_table(df, categories=False)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def lire_fichiers_journaliers(chemins, prefix, processus=None):
+    """
+    Lit et type les fichiers journaliers `chemins`. Retourne (DataFrame typé, nombre de
+    lignes de chaque fichier). À partir de SEUIL_LECTURE_PARALLELE fichiers, ils sont
+    analysés dans `processus` processus (un par cœur par défaut) ; les tables Arrow
+    sont concaténées sans copie puis converties une seule fois en DataFrame.
+    """
+    processus = processus or os.cpu_count() or 1
+    if pa is None or len(chemins) < SEUIL_LECTURE_PARALLELE or processus < 2:
+        blocs = [lire_fichier_journalier(chemin, prefix) for chemin in chemins]
+        if not blocs:
+            return pd.DataFrame(), []
+        return typer_table(pd.concat(blocs, ignore_index=True)), [len(df) for df in blocs]
+
+    processus = min(processus, len(chemins))
+    with ProcessPoolExecutor(max_workers=processus) as pool:
+        tables = list(pool.map(_lire_bloc_arrow, chemins, repeat(prefix),
+                               chunksize=max(1, len(chemins) // (processus * 4))))
+    lignes = [table.num_rows for table in tables]
+    try:
+        df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Colonne de types incompatibles d'un fichier à l'autre (ex: texte / vide) : concaténation pandas
+        df = pd.concat([table.to_pandas() for table in tables], ignore_index=True)
+    return typer_table(df), lignes
+
+
+def lister_fichiers(data_dir, prefix):
+    """Liste triée des fichiers CSV de `data_dir` commençant par `prefix`."""
+    return sorted(
+        file for file in os.listdir(data_dir)
+        if file.startswith(prefix) and file.endswith(".csv")
+    )
+
+
+# ----------------------------
+# 2️⃣ Manifeste des fichiers ingérés
+# ----------------------------
+def _empreinte(chemin):
+    """Hash SHA-256 du contenu d'un fichier."""
+    h = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+class Manifeste:
+    """
+    Liste des fichiers déjà ingérés : nom -> table, taille, mtime, sha256, nombre de lignes.
+    Un fichier dont la taille et le mtime n'ont pas changé n'est ni relu ni hashé.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.chemin = os.path.join(cache_dir, MANIFESTE_FILE)
+        self.fichiers = {}
+        self.modifie = False
+        if os.path.exists(self.chemin):
+            with open(self.chemin, "r", encoding="utf-8") as f:
+                self.fichiers = json.load(f).get("fichiers", {})
+
+    def sauvegarder(self):
+        """Écrit le manifeste sur disque s'il a changé depuis la dernière sauvegarde."""
+        if not self.modifie:
+            return
+        os.makedirs(os.path.dirname(self.chemin), exist_ok=True)
+        ecrire_atomique(self.chemin, json.dumps({"fichiers": self.fichiers}, indent=2, ensure_ascii=False))
+        self.modifie = False
+
+    def oublier(self, table):
+        """Retire du manifeste tous les fichiers d'une table (avant reconstruction)."""
+        for nom in self.fichiers_de(table):
+            del self.fichiers[nom]
+        self.modifie = True
+
+    def enregistrer(self, chemin, table, lignes):
+        self.modifie = True
+        st = os.stat(chemin)
+        self.fichiers[os.path.basename(chemin)] = {
+            "table": table,
+            "taille": st.st_size,
+            "mtime": st.st_mtime,
+            "sha256": _empreinte(chemin),
+            "lignes": lignes,
+        }
+
+    def etat(self, chemin):
+        """
+        Compare un fichier au manifeste : 'nouveau', 'inchangé' ou 'modifié'.
+        Le hash n'est calculé que si la taille ou le mtime ont changé.
+        """
+        entree = self.fichiers.get(os.path.basename(chemin))
+        if entree is None:
+            return "nouveau"
+        st = os.stat(chemin)
+        if st.st_size == entree["taille"] and st.st_mtime == entree["mtime"]:
+            return "inchangé"
+        if _empreinte(chemin) == entree["sha256"]:
+            entree["mtime"] = st.st_mtime  # simple "touch" : contenu identique
+            self.modifie = True
+            return "inchangé"
+        return "modifié"
+
+    def fichiers_de(self, table):
+        return [nom for nom, entree in self.fichiers.items() if entree["table"] == table]
+
+    def lignes(self, table):
+        """Nombre total de lignes ingérées pour une table."""
+        return sum(entree["lignes"] for entree in self.fichiers.values() if entree["table"] == table)
+
+
+# ----------------------------
+# 3️⃣ Historique consolidé sur disque (fragments Feather ajoutés à chaque ingestion, CSV sans pyarrow)
+# ----------------------------
+def chemin_consolide(cache_dir, table):
+    """Dossier des fragments Feather de `table` (fichier CSV unique sans pyarrow)."""
+    return os.path.join(cache_dir, table if feather is not None else f"{table}.csv")
+
+
+def _fragments(dossier):
+    """Fragments Feather d'un historique, dans l'ordre d'ingestion."""
+    if not os.path.isdir(dossier):
+        return []
+    return sorted(os.path.join(dossier, nom) for nom in os.listdir(dossier) if nom.endswith(".feather"))
+
+
+def _ecrire_fragment(dossier, numero, df):
+    chemin = os.path.join(dossier, f"{numero:06d}.feather")
+    tmp = chemin_temporaire(chemin)
+    feather.write_feather(df.reset_index(drop=True), tmp)
+    os.replace(tmp, chemin)
+
+
+def lire_consolide(cache_dir, table):
+    """
+    Relit l'historique consolidé typé d'une table (DataFrame vide s'il n'existe pas).
+    Les fragments Feather sont lus sans analyse de texte (types du schéma conservés)
+    puis convertis une fois en DataFrame : to_pandas copie les colonnes en mémoire.
+    """
+    chemin = chemin_consolide(cache_dir, table)
+    if feather is None:
+        return typer_table(pd.read_csv(chemin)) if os.path.exists(chemin) else pd.DataFrame()
+    tables = [feather.read_table(fragment, memory_map=True) for fragment in _fragments(chemin)]
+    if not tables:
+        return pd.DataFrame()
+    try:
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Schémas incompatibles d'un fragment à l'autre : concaténation pandas puis typage
+        return typer_table(pd.concat([t.to_pandas() for t in tables], ignore_index=True))
+
+
+def ecrire_consolide(cache_dir, table, df, ajout):
+    """
+    Met à jour l'historique consolidé après ingestion : seul le bloc `ajout` est écrit,
+    dans un nouveau fragment Feather (écriture atomique) ou en fin du CSV de secours.
+    Au-delà de MAX_FRAGMENTS fragments, l'historique complet `df` est réécrit en un seul.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    chemin = chemin_consolide(cache_dir, table)
+    if feather is None:
+        # Ajout en fin de fichier, sous le verrou d'ingestion du DataStore (un seul écrivain)
+        ajout.reindex(columns=df.columns).to_csv(chemin, mode="a", index=False, header=not os.path.exists(chemin))
+        return
+    os.makedirs(chemin, exist_ok=True)
+    fragments = _fragments(chemin)
+    numero = int(os.path.basename(fragments[-1]).split(".")[0]) + 1 if fragments else 1
+    if len(fragments) < MAX_FRAGMENTS:
+        _ecrire_fragment(chemin, numero, ajout)
+        return
+    # Regroupement : le nouveau fragment contient tout, les anciens sont ensuite supprimés
+    # (arrêt entre les deux : lignes en double, détectées au démarrage par le manifeste)
+    _ecrire_fragment(chemin, numero, df)
+    for fragment in fragments:
+        os.remove(fragment)
+
+
+def supprimer_consolide(cache_dir, table):
+    chemin = chemin_consolide(cache_dir, table)
+    if os.path.isdir(chemin):
+        shutil.rmtree(chemin)
+    elif os.path.exists(chemin):
+        os.remove(chemin)
+
+
+# ----------------------------
+# 4️⃣ Détection des nouveaux fichiers
+# ----------------------------
+def fichiers_a_ingerer(manifeste, data_dir, table, cache_dir=CACHE_DIR):
+    """
+    Retourne (reconstruire, nouveaux) pour une table :
+    - reconstruire=True si un fichier déjà ingéré a été modifié ou supprimé, ou si
+      l'historique consolidé a disparu : il faut alors tout relire ;
+    - nouveaux : chemins des fichiers à lire (tous si reconstruction).
+    """
+    fichiers = lister_fichiers(data_dir, table)
+    chemins = [os.path.join(data_dir, file) for file in fichiers]
+
+    deja_ingeres = manifeste.fichiers_de(table)
+    reconstruire = bool(deja_ingeres) and (
+        not os.path.exists(chemin_consolide(cache_dir, table))
+        or any(nom not in fichiers for nom in deja_ingeres)
+    )
+    nouveaux = []
+    for chemin in chemins:
+        etat = manifeste.etat(chemin)
+        if etat == "modifié":
+            reconstruire = True
+        elif etat == "nouveau":
+            nouveaux.append(chemin)
+
+    if reconstruire:
+        return True, chemins
+    return False, nouveaux
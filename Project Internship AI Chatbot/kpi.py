@@ -1,16 +1,21 @@
 import pandas as pd
 from datetime import datetime
-from concat_data import produits, stock_global, commandes_global
+from data_store import store
+from kpi_journalier import attribut_produit
+from series_stock import series_stock
+from rendu import formater_lignes
 
 
 # =========================
 # Utilitaires
 # =========================
-def _ensure_datetime(df, col):
-    """Convertit une colonne en datetime si nécessaire (sécurisé)."""
-    if not df.empty and col in df.columns:
-        df[col] = pd.to_datetime(df[col], errors="coerce")
-    return df
+# Les dates sont converties en datetime64 une seule fois au chargement (data_store) :
+# les KPI ne font que filtrer, sans copier ni modifier les DataFrames partagés.
+def _colonne_datetime(df, col):
+    """Retourne la colonne en datetime64, sans modifier le DataFrame."""
+    if pd.api.types.is_datetime64_any_dtype(df[col]):
+        return df[col]
+    return pd.to_datetime(df[col], errors="coerce")
 
 
 def convert_to_date(date_obj):
@@ -24,29 +29,31 @@ def convert_to_date(date_obj):
     return date_obj
 
 
+def _kpi_table():
+    """Table des KPI précalculés par date (une ligne par jour, triée)."""
+    return store.kpi_journalier
+
+
+def _stock_du_jour(date=None):
+    """Lignes de stock d'une date (via l'index Date), ou tout l'historique."""
+    if date:
+        return store.lignes("stock", {"Date": convert_to_date(date)})
+    return store.stock
+
+
 # =========================
 # 1. Valeur totale du stock
 # =========================
 def valeur_stock(date=None):
     try:
-        if stock_global.empty or produits.empty:
+        if store.stock.empty or store.produits.empty:
             return 0
 
-        df = stock_global.copy()
-        df = df.merge(
-            produits[["Référence_Produit", "Coût_Unitaire"]],
-            on="Référence_Produit",
-            how="left",
-        )
-
-        df = _ensure_datetime(df, "Date")
-
+        table = _kpi_table()
         if date:
-            date_obj = convert_to_date(date)
-            df = df[df["Date"].dt.date == date_obj]
-
-        df["Valeur_Stock"] = df["Stock_Final"] * df["Coût_Unitaire"]
-        return round(df["Valeur_Stock"].sum(), 2)
+            jour = pd.Timestamp(convert_to_date(date))
+            return round(table.at[jour, "valeur_stock"], 2) if jour in table.index else 0
+        return round(table["valeur_stock"].sum(), 2)
     except Exception as e:
         print(f"Erreur valeur_stock: {e}")
         return 0
@@ -55,25 +62,17 @@ def valeur_stock(date=None):
 # =========================
 # 2. Produits en rupture
 # =========================
-def produits_en_rupture(date=None):
+def produits_en_rupture(date=None, page=1):
     try:
-        df = stock_global.copy()
-        df = _ensure_datetime(df, "Date")
-
-        if date:
-            date_obj = convert_to_date(date)
-            df = df[df["Date"].dt.date == date_obj]  # <-- ne filtre que si date fournie
+        df = _stock_du_jour(date)  # <-- ne filtre que si date fournie
 
         # Filtrer tous les produits en rupture
         ruptures = df[df["Stock_Final"] == 0]
 
         if ruptures.empty:
             return "✅ Aucun produit en rupture."
-        
-        resultats = []
-        for _, row in ruptures.iterrows():
-            resultats.append(f"📦 {row['Référence_Produit']} | 📍 {row['Entrepot']} | 📅 {row['Date'].date()}")
-        return "\n".join(resultats)
+
+        return formater_lignes(ruptures, "📦 {Référence_Produit} | 📍 {Site} | 📅 {Date}", page)
     except Exception as e:
         print(f"Erreur produits_en_rupture: {e}")
         return []
@@ -85,23 +84,14 @@ def produits_en_rupture(date=None):
 # =========================
 def taux_livraison(date=None):
     try:
-        df = commandes_global.copy()
-        df = _ensure_datetime(df, "Date")
-        df = _ensure_datetime(df, "Date_Livraison_Prévue")
-        df = _ensure_datetime(df, "Date_Livraison_Réelle")
-
+        # Colonnes cumulées : dernière ligne à la date demandée ou avant
+        table = _kpi_table()
         if date:
-            date_obj = convert_to_date(date)
-            df = df[df["Date"].dt.date <= date_obj]
+            table = table.loc[:pd.Timestamp(convert_to_date(date))]
 
-        total = len(df)
-        if total == 0:
+        if table.empty or table["nb_commandes_cumul"].iloc[-1] == 0:
             return None
-
-        on_time = len(
-            df[df["Date_Livraison_Réelle"] <= df["Date_Livraison_Prévue"]]
-        )
-        return round(on_time / total * 100, 2)
+        return float(table["taux_livraison"].iloc[-1])
     except Exception as e:
         print(f"Erreur taux_livraison: {e}")
         return None
@@ -112,14 +102,10 @@ def taux_livraison(date=None):
 # =========================
 def commandes_en_retard(date=None):
     try:
-        df = commandes_global.copy()
-        df = _ensure_datetime(df, "Date")
-        df = _ensure_datetime(df, "Date_Livraison_Prévue")
-        df = _ensure_datetime(df, "Date_Livraison_Réelle")
+        df = store.commandes
 
         if date:
-            date_obj = convert_to_date(date)
-            df = df[df["Date"].dt.date <= date_obj]
+            df = df[df["Date"] <= pd.Timestamp(convert_to_date(date))]
 
         retard = df[df["Date_Livraison_Réelle"] > df["Date_Livraison_Prévue"]]
         return retard[["Num_Commande", "Référence_Produit"]].values.tolist()
@@ -133,20 +119,9 @@ def commandes_en_retard(date=None):
 # =========================
 def produits_a_reapprovisionner(date=None):
     try:
-        df = stock_global.copy()
-        df = df.merge(
-            produits[["Référence_Produit", "Seuil_Réappro"]],
-            on="Référence_Produit",
-            how="left",
-        )
-        df = _ensure_datetime(df, "Date")
-
-        if date:
-            date_obj = convert_to_date(date)
-            df = df[df["Date"].dt.date == date_obj]
-
-        df = df[df["Stock_Final"] < df["Seuil_Réappro"]]
-        return df["Référence_Produit"].tolist()
+        df = _stock_du_jour(date)
+        seuils = attribut_produit(df["Référence_Produit"], store.produits, "Seuil_Réappro")
+        return df.loc[df["Stock_Final"] < seuils, "Référence_Produit"].tolist()
     except Exception as e:
         print(f"Erreur produits_a_reapprovisionner: {e}")
         return []
@@ -159,13 +134,13 @@ def commandes_clients_ce_mois(commandes_df):
     if commandes_df.empty:
         return 0
 
-    commandes_df = _ensure_datetime(commandes_df, "Date_Commande")
+    date_commande = _colonne_datetime(commandes_df, "Date_Commande")
 
     now = datetime.now()
     debut_mois = datetime(now.year, now.month, 1)
 
     commandes_mois = commandes_df[
-        (commandes_df["Date_Commande"] >= debut_mois)
+        (date_commande >= debut_mois)
         & (commandes_df["Type_Commande"].str.lower() == "client")
     ]
     return len(commandes_mois)
@@ -178,43 +153,44 @@ def stock_total_ce_mois(stock_df: pd.DataFrame) -> int:
     if stock_df.empty:
         return 0
 
-    stock_df = _ensure_datetime(stock_df, "Date")
-
     debut_mois = pd.to_datetime(datetime.today().strftime("%Y-%m-01"))
     fin_mois = pd.to_datetime(datetime.today())
 
-    df_mois = stock_df[
-        (stock_df["Date"] >= debut_mois) & (stock_df["Date"] <= fin_mois)
-    ]
+    if stock_df is store.stock:
+        # Dernier relevé du mois de chaque (produit, site), par les séries triées
+        return series_stock.total_au(fin_mois, depuis=debut_mois)
+
+    dates = _colonne_datetime(stock_df, "Date")
+
+    df_mois = stock_df[(dates >= debut_mois) & (dates <= fin_mois)]
 
     if df_mois.empty:
         return 0
 
-    dernier_stock = df_mois.sort_values("Date").groupby("Référence_Produit").tail(1)
+    dernier_stock = df_mois.sort_values("Date").groupby("Référence_Produit", observed=True).tail(1)
     return int(dernier_stock["Stock_Final"].sum())
 
 
 # =========================
 # 8. Commandes fournisseurs du mois
 # =========================
-def commandes_fournisseurs_ce_mois(commandes_df: pd.DataFrame) -> int:
+def commandes_fournisseurs_ce_mois(commandes_df: pd.DataFrame, reference_date=None) -> int:
     if commandes_df.empty:
         return 0
 
-    commandes_df = _ensure_datetime(commandes_df, "Date_Commande")
+    date_commande = _colonne_datetime(commandes_df, "Date_Commande")
 
     if reference_date is None:
         reference_date = pd.to_datetime(datetime.today())
-        
+
     debut_mois = reference_date.replace(day=1)
     fin_mois = reference_date
 
     df_mois = commandes_df[
-        (commandes_df["Date_Commande"] >= debut_mois)
-        & (commandes_df["Date_Commande"] <= fin_mois)
+        (date_commande >= debut_mois)
+        & (date_commande <= fin_mois)
         & (commandes_df["Type_Commande"].str.lower().str.contains("fournisseur"))
     ]
-    print(f"Commandes trouvées: {len(df_mois)}")
     return len(df_mois)
 
 
@@ -222,19 +198,57 @@ def commandes_fournisseurs_ce_mois(commandes_df: pd.DataFrame) -> int:
 # 9. Stock total d’un produit
 # =========================
 def stock_total_produit(ref_produit, stock_df, date=None):
-    ref_produit = ref_produit.upper().replace(" ", "")
-    df = stock_df.copy()
-    df = _ensure_datetime(df, "Date")
-
-    df = df[
-        df["Référence_Produit"].str.upper().str.replace(" ", "") == ref_produit
-    ]
-
-    if date:
-        date_obj = convert_to_date(date)
-        df = df[df["Date"].dt.date == date_obj]
+    if stock_df is store.stock:
+        # Historique partagé : accès direct par les index produit / date
+        criteres = {"Référence_Produit": ref_produit, "Date": convert_to_date(date) if date else None}
+        df = store.lignes("stock", criteres)
+    else:
+        ref_produit = ref_produit.upper().replace(" ", "")
+        df = stock_df[
+            stock_df["Référence_Produit"].str.upper().str.replace(" ", "") == ref_produit
+        ]
+        if date:
+            df = df[_colonne_datetime(df, "Date") == pd.Timestamp(convert_to_date(date))]
 
     if df.empty:
         return 0
 
-    return int(df["Stock_Final"].sum())
\ No newline at end of file
+    return int(df["Stock_Final"].sum())
+
+
+# =========================
+# 10. Tous les KPI d'une date (table précalculée)
+# =========================
+def kpi_du_jour(date=None):
+    """
+    Retourne les KPI d'une date (ou de tout l'historique si None) en lisant
+    une seule ligne de la table précalculée : valeur du stock, nombre de
+    produits en rupture / à réapprovisionner, commandes en retard, taux de livraison.
+    """
+    table = _kpi_table()
+    if date:
+        jour = pd.Timestamp(convert_to_date(date))
+        journalier = table.loc[jour] if jour in table.index else None
+        cumul = table.loc[:jour]
+    else:
+        journalier = table.sum() if not table.empty else None
+        cumul = table
+
+    dernier = cumul.iloc[-1] if not cumul.empty else None
+    return {
+        "valeur_stock": round(float(journalier["valeur_stock"]), 2) if journalier is not None else 0,
+        "nb_ruptures": int(journalier["nb_ruptures"]) if journalier is not None else 0,
+        "nb_reappro": int(journalier["nb_reappro"]) if journalier is not None else 0,
+        "nb_commandes_retard": int(dernier["nb_retard_cumul"]) if dernier is not None else 0,
+        "taux_livraison": taux_livraison(date),
+    }
+
+
+def evolution_kpi(indicateur, debut=None, fin=None):
+    """Série temporelle d'un KPI de la table précalculée (ex: 'valeur_stock', 'taux_livraison')."""
+    table = _kpi_table()
+    if indicateur not in table.columns:
+        return pd.Series(dtype=float)
+    debut = pd.Timestamp(convert_to_date(debut)) if debut else None
+    fin = pd.Timestamp(convert_to_date(fin)) if fin else None
+    return table.loc[debut:fin, indicateur]
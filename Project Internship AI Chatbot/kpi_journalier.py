@@ -0,0 +1,83 @@
+# ----------------------------
+# Fichier : kpi_journalier.py
+# Description : Table des KPI précalculés par date (une ligne par jour),
+#               complétée à chaque ingestion de fichiers journaliers
+# ----------------------------
+
+import pandas as pd
+
+# KPI additifs calculés jour par jour
+COLONNES_STOCK = ["valeur_stock", "nb_ruptures", "nb_reappro", "nb_lignes_stock"]
+COLONNES_COMMANDES = ["nb_commandes", "nb_a_temps", "nb_retard"]
+
+# KPI cumulés (toutes les commandes jusqu'à la date incluse), comme kpi.taux_livraison
+COLONNES_CUMULEES = ["nb_commandes_cumul", "nb_a_temps_cumul", "nb_retard_cumul", "taux_livraison"]
+
+
+def attribut_produit(refs, produits, col):
+    """Associe à chaque référence la valeur `col` de `produits` (sans fusion de tables)."""
+    valeurs = produits.set_index("Référence_Produit")[col]
+    valeurs = valeurs[~valeurs.index.duplicated()]
+    return refs.map(valeurs).astype(float)
+
+
+def kpi_stock_par_date(stock, produits):
+    """KPI de stock de chaque date présente dans `stock` (valeur, ruptures, à réapprovisionner)."""
+    if stock.empty or produits.empty:
+        return pd.DataFrame(columns=COLONNES_STOCK, dtype=float)
+    refs = stock["Référence_Produit"]
+    calcul = pd.DataFrame({
+        "Date": stock["Date"],
+        "valeur_stock": stock["Stock_Final"] * attribut_produit(refs, produits, "Coût_Unitaire"),
+        "nb_ruptures": stock["Stock_Final"] == 0,
+        "nb_reappro": stock["Stock_Final"] < attribut_produit(refs, produits, "Seuil_Réappro"),
+        "nb_lignes_stock": 1,
+    })
+    return calcul.groupby("Date").sum()
+
+
+def kpi_commandes_par_date(commandes):
+    """Nombre de commandes, livrées à temps et en retard, pour chaque date de fichier."""
+    if commandes.empty:
+        return pd.DataFrame(columns=COLONNES_COMMANDES, dtype=float)
+    reelle = commandes["Date_Livraison_Réelle"]
+    prevue = commandes["Date_Livraison_Prévue"]
+    calcul = pd.DataFrame({
+        "Date": commandes["Date"],
+        "nb_commandes": 1,
+        "nb_a_temps": reelle <= prevue,
+        "nb_retard": reelle > prevue,
+    })
+    return calcul.groupby("Date").sum()
+
+
+def _finaliser(table):
+    """Trie par date et recalcule les colonnes cumulées (quelques centaines de lignes au plus)."""
+    table = table.reindex(columns=COLONNES_STOCK + COLONNES_COMMANDES).fillna(0).sort_index()
+    table["nb_commandes_cumul"] = table["nb_commandes"].cumsum()
+    table["nb_a_temps_cumul"] = table["nb_a_temps"].cumsum()
+    table["nb_retard_cumul"] = table["nb_retard"].cumsum()
+    taux = table["nb_a_temps_cumul"] / table["nb_commandes_cumul"].where(table["nb_commandes_cumul"] > 0) * 100
+    table["taux_livraison"] = taux.round(2)
+    table.index.name = "Date"
+    return table
+
+
+def construire_kpi_journalier(stock, commandes, produits):
+    """Construit la table complète à partir de l'historique chargé."""
+    return _finaliser(pd.concat(
+        [kpi_stock_par_date(stock, produits), kpi_commandes_par_date(commandes)], axis=1
+    ))
+
+
+def ajouter_kpi_journalier(table, nom, ajout, produits):
+    """
+    Complète la table avec un bloc de lignes nouvellement ingéré (`nom` = 'stock'
+    ou 'commandes') : seules les nouvelles lignes sont agrégées.
+    """
+    if nom == "stock":
+        partiel = kpi_stock_par_date(ajout, produits)
+    else:
+        partiel = kpi_commandes_par_date(ajout)
+    base = table.reindex(columns=COLONNES_STOCK + COLONNES_COMMANDES)
+    return _finaliser(pd.concat([base, partiel]).groupby(level=0).sum())
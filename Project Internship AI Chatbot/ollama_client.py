@@ -0,0 +1,229 @@
+# ----------------------------
+# Fichier : ollama_client.py
+# Description : Appels HTTP à Ollama (/api/generate) en mode flux NDJSON : connexions
+#               réutilisées (Session), nombre d'appels simultanés borné, délai maximal
+#               par requête, métriques de file d'attente
+# ----------------------------
+
+import asyncio
+import json
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# URL de base configurable (ex: serveur factice de benchmarks/stub_ollama.py)
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434").rstrip("/")
+GENERATE_URL = OLLAMA_URL + "/api/generate"
+TAGS_URL = OLLAMA_URL + "/api/tags"
+
+# Durée pendant laquelle Ollama garde le modèle en mémoire après une requête
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# (connexion, lecture) : en flux, le délai de lecture s'applique entre deux fragments
+TIMEOUT_FLUX = (10, 120)
+
+# Appels simultanés envoyés à Ollama (les suivants attendent leur tour)
+MAX_EN_VOL = int(os.environ.get("OLLAMA_MAX_EN_VOL", "2"))
+# Délai maximal d'une requête, attente dans la file comprise (secondes)
+DELAI_MAX = float(os.environ.get("OLLAMA_DELAI_MAX", "180"))
+
+
+class DelaiDepasse(requests.exceptions.ReadTimeout):
+    """Le délai maximal de la requête est écoulé (dans la file d'attente ou pendant la génération)."""
+
+
+# ----------------------------
+# 1️⃣ Métriques de la file d'attente
+# ----------------------------
+class Metriques:
+    """Compteurs partagés entre threads : requêtes en vol, en attente, temps d'attente."""
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self.en_vol = 0
+        self.en_attente = 0
+        self.total = 0
+        self.rejetees = 0
+        self.attente_totale = 0.0
+        self.attente_max = 0.0
+
+    def entree_file(self):
+        with self._verrou:
+            self.en_attente += 1
+
+    def sortie_file(self, attente, admise):
+        with self._verrou:
+            self.en_attente -= 1
+            self.attente_totale += attente
+            self.attente_max = max(self.attente_max, attente)
+            if admise:
+                self.en_vol += 1
+                self.total += 1
+            else:
+                self.rejetees += 1
+
+    def fin(self):
+        with self._verrou:
+            self.en_vol -= 1
+
+    def instantane(self):
+        with self._verrou:
+            servies = self.total + self.rejetees
+            return {
+                "en_vol": self.en_vol,
+                "en_attente": self.en_attente,
+                "total": self.total,
+                "rejetees": self.rejetees,
+                "attente_moyenne": round(self.attente_totale / servies, 3) if servies else 0.0,
+                "attente_max": round(self.attente_max, 3),
+            }
+
+
+# ----------------------------
+# 2️⃣ Client (threads Streamlit, boucle asyncio)
+# ----------------------------
+class ClientOllama:
+    """
+    Une Session requests (connexions HTTP keep-alive réutilisées) et un sémaphore
+    qui limite à `max_en_vol` les générations simultanées : les autres attendent
+    dans la file, au plus jusqu'à leur délai maximal.
+    """
+
+    def __init__(self, max_en_vol=MAX_EN_VOL, delai_max=DELAI_MAX):
+        self.max_en_vol = max_en_vol
+        self.delai_max = delai_max
+        self.session = requests.Session()
+        adaptateur = HTTPAdapter(pool_connections=1, pool_maxsize=max_en_vol + 1)
+        self.session.mount("http://", adaptateur)
+        self.session.mount("https://", adaptateur)
+        self._places = threading.BoundedSemaphore(max_en_vol)
+        self.metriques = Metriques()
+
+    def limiter(self, max_en_vol):
+        """
+        Nouvelle limite de générations simultanées, à fixer avant le premier appel
+        (ex: processus du service, qui se partagent MAX_EN_VOL).
+        """
+        self.max_en_vol = max_en_vol
+        self._places = threading.BoundedSemaphore(max_en_vol)
+
+    def generer_flux(self, payload, url=GENERATE_URL, annulation=None, timeout=TIMEOUT_FLUX, delai_max=None):
+        """
+        Envoie `payload` à /api/generate avec "stream": true et produit chaque objet
+        JSON du flux NDJSON (champ 'response' = fragment de texte, 'done' = fin).
+        Si `annulation` (threading.Event) est levé, ou si l'appelant abandonne le
+        générateur, la connexion est fermée : Ollama arrête alors la génération.
+        Les erreurs réseau (requests.exceptions, DelaiDepasse) sont propagées à l'appelant.
+        """
+        echeance = time.monotonic() + (delai_max or self.delai_max)
+        self.metriques.entree_file()
+        debut = time.monotonic()
+        admise = self._places.acquire(timeout=max(0.0, echeance - debut))
+        self.metriques.sortie_file(time.monotonic() - debut, admise)
+        if not admise:
+            raise DelaiDepasse("file d'attente Ollama saturée")
+        try:
+            yield from self._flux(dict(payload, stream=True), url, annulation, timeout, echeance)
+        finally:
+            self._places.release()
+            self.metriques.fin()
+
+    async def generer_flux_async(self, payload, url=GENERATE_URL, annulation=None, timeout=TIMEOUT_FLUX,
+                                 delai_max=None):
+        """
+        Version asyncio de `generer_flux` (même file, même limite, mêmes métriques) :
+        le flux est lu dans un thread (asyncio.to_thread) et chaque objet est remis à
+        la boucle dès son arrivée. Si l'appelant abandonne ou annule le générateur,
+        `annulation` est levé : le thread ferme la connexion et libère sa place.
+        """
+        boucle = asyncio.get_running_loop()
+        file = asyncio.Queue()
+        annulation = annulation or threading.Event()
+
+        def remettre(element):
+            try:
+                boucle.call_soon_threadsafe(file.put_nowait, element)
+            except RuntimeError:  # boucle déjà fermée : plus personne ne lit
+                pass
+
+        def lire():
+            try:
+                for morceau in self.generer_flux(payload, url, annulation, timeout, delai_max):
+                    remettre((morceau, None))
+                remettre((None, None))
+            except Exception as e:
+                remettre((None, e))
+
+        lecteur = asyncio.ensure_future(asyncio.to_thread(lire))  # référence gardée pendant le flux
+        fini = False
+        try:
+            while True:
+                morceau, erreur = await file.get()
+                if erreur is not None:
+                    raise erreur
+                if morceau is None:
+                    fini = True
+                    return
+                yield morceau
+        finally:
+            if not fini:
+                annulation.set()
+
+    def _flux(self, payload, url, annulation, timeout, echeance):
+        connexion, lecture = timeout
+        lecture = min(lecture, max(0.1, echeance - time.monotonic()))
+        with self.session.post(url, json=payload, stream=True, timeout=(connexion, lecture)) as response:
+            if response.status_code != 200:
+                raise requests.exceptions.HTTPError(
+                    f"{response.status_code} - {response.text}", response=response
+                )
+            for ligne in _lignes(response):
+                if annulation is not None and annulation.is_set():
+                    return
+                if time.monotonic() > echeance:
+                    raise DelaiDepasse("délai maximal de la requête dépassé")
+                if not ligne:
+                    continue
+                morceau = json.loads(ligne)
+                if morceau.get("error"):
+                    raise requests.exceptions.HTTPError(morceau["error"], response=response)
+                yield morceau
+                if morceau.get("done"):
+                    return
+
+    def disponible(self, timeout=10):
+        """Vérifie que le serveur Ollama répond."""
+        try:
+            return self.session.get(TAGS_URL, timeout=timeout).status_code == 200
+        except Exception:
+            return False
+
+
+def _lignes(response):
+    """Lignes du flux ; un délai dépassé en cours de lecture reste un ReadTimeout."""
+    try:
+        yield from response.iter_lines()
+    except requests.exceptions.ConnectionError as e:
+        if "timed out" in str(e).lower():
+            raise requests.exceptions.ReadTimeout(e) from e
+        raise
+
+
+# Client unique partagé par toutes les sessions
+client = ClientOllama()
+
+
+def generer_flux(payload, url=GENERATE_URL, annulation=None, timeout=TIMEOUT_FLUX):
+    """Raccourci vers le client partagé (voir ClientOllama.generer_flux)."""
+    return client.generer_flux(payload, url=url, annulation=annulation, timeout=timeout)
+
+
+def generer_flux_async(payload, url=GENERATE_URL, annulation=None, timeout=TIMEOUT_FLUX):
+    """Raccourci vers le client partagé (voir ClientOllama.generer_flux_async)."""
+    return client.generer_flux_async(payload, url=url, annulation=annulation, timeout=timeout)
+
+
+def disponible(timeout=10):
+    return client.disponible(timeout)
@@ -1,25 +1,15 @@
 import pandas as pd
-import os
-
-# Charger le CSV produits
-DATA_DIR = "data"
-produits_file = os.path.join(DATA_DIR, "produits.csv")
-
-if os.path.exists(produits_file):
-    produits_df = pd.read_csv(produits_file)
-else:
-    produits_df = pd.DataFrame()
-    print("⚠ produits.csv manquant !")
+from data_store import store  # produits déjà chargés et indexés
 
 # Fonctions 
 def get_produit_info(ref):
     """
     Retourne toutes les informations d'un produit à partir de sa référence.
     """
-    df = produits_df[produits_df['Référence_Produit'].str.upper() == ref.upper()]
-    if df.empty:
+    info = store.premiere_ligne("produits", "Référence_Produit", ref)  # accès direct par l'index
+    if info is None:
         return f"❌ Produit {ref} non trouvé."
-    return df.to_dict(orient='records')[0]  # Retourne un dictionnaire avec toutes les colonnes
+    return info  # Retourne un dictionnaire avec toutes les colonnes
 
 
 def get_fournisseur_principal(ref):
@@ -76,6 +66,7 @@ def list_produits_par_famille(famille_name):
     """
     Retourne la liste des produits d'une famille donnée.
     """
+    produits_df = store.produits
     df = produits_df[produits_df['Famille'].str.lower() == famille_name.lower()]
     if df.empty:
         return f"❌ Aucune produit trouvé pour la famille '{famille_name}'."
@@ -86,6 +77,7 @@ def produit_plus_cher():
     """
     Retourne le produit avec le coût unitaire le plus élevé.
     """
+    produits_df = store.produits
     if produits_df.empty:
         return "⚠ Aucun produit disponible."
     max_cout = produits_df['Coût_Unitaire'].max()  # Trouve le coût maximum
@@ -97,6 +89,7 @@ def list_familles():
     """
     Retourne la liste unique de toutes les familles présentes dans le CSV.
     """
+    produits_df = store.produits
     if produits_df.empty:
         return "⚠ Aucun produit disponible."
     return produits_df['Famille'].unique().tolist()
@@ -106,6 +99,7 @@ def produits_par_famille(famille_name):
     """
     Retourne tous les produits d'une famille donnée.
     """
+    produits_df = store.produits
     df = produits_df[produits_df['Famille'].str.lower() == famille_name.lower()]
     if df.empty:
         return f"❌ Aucune produit trouvé pour la famille '{famille_name}'."
@@ -115,10 +109,10 @@ def get_famille_produit(ref):
     """
     Retourne la famille d'un produit à partir de sa référence.
     """
-    df = produits_df[produits_df['Référence_Produit'].str.upper() == ref.upper()]
-    if df.empty:
-        return f"❌ Produit {ref} non trouvé."
-    return df.iloc[0].get('Famille', 'Information non disponible')
+    info = get_produit_info(ref)
+    if isinstance(info, dict):
+        return info.get('Famille', 'Information non disponible')
+    return info
 
 def get_designation(ref):
     """Retourne la désignation du produit à partir de sa référence."""
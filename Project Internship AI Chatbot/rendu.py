@@ -0,0 +1,59 @@
+# ----------------------------
+# Fichier : rendu.py
+# Description : Mise en forme vectorisée des listes de lignes pour le chat (limite + pagination)
+# ----------------------------
+
+from string import Formatter
+import pandas as pd
+
+LIGNES_PAR_PAGE = 20
+VALEUR_MANQUANTE = "Non renseignée"
+
+
+def _texte(serie):
+    """Convertit une colonne entière en chaînes (dates AAAA-MM-JJ, valeurs manquantes lisibles)."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        texte = serie.dt.strftime("%Y-%m-%d")
+    else:
+        texte = serie.astype("string")
+    return texte.fillna(VALEUR_MANQUANTE)
+
+
+def formater_lignes(df, modele, page=1, par_page=LIGNES_PAR_PAGE):
+    """
+    Rend les lignes de `df` selon `modele` (ex: "📦 {Référence_Produit} | 📍 {Site}").
+    Seule la page demandée est convertie en texte, par concaténation colonne par
+    colonne (pas de boucle sur les lignes). Un pied de page indique la pagination.
+    """
+    total = len(df)
+    nb_pages = max(1, -(-total // par_page))
+    page = min(max(1, int(page)), nb_pages)
+    extrait = df.iloc[(page - 1) * par_page: page * par_page]
+
+    lignes = pd.Series("", index=extrait.index, dtype="string")
+    for litteral, champ, _, _ in Formatter().parse(modele):
+        lignes = lignes + litteral
+        if champ:
+            lignes = lignes + _texte(extrait[champ])
+
+    texte = "\n".join(lignes.tolist())
+    if nb_pages > 1:
+        texte += (
+            f"\n… {total} lignes au total — page {page}/{nb_pages}"
+            + (f" (demandez « page {page + 1} » pour la suite)" if page < nb_pages else "")
+        )
+    return texte
+
+
+def lignes_tableau(df, colonnes, separateur="|"):
+    """
+    Encodage tabulaire compact (en-tête puis une ligne par enregistrement, valeurs
+    séparées par `separateur`), construit colonne par colonne. Retourne la liste des lignes.
+    """
+    colonnes = [col for col in colonnes if col in df.columns]
+    if not colonnes:
+        return []
+    lignes = _texte(df[colonnes[0]])
+    for col in colonnes[1:]:
+        lignes = lignes + separateur + _texte(df[col])
+    return [separateur.join(colonnes)] + lignes.tolist()
@@ -0,0 +1,208 @@
+# ----------------------------
+# Fichier : reponses_lot.py
+# Description : Réponses à un lot de questions (rapports) : questions regroupées par
+#               intention, chaque groupe traité en une seule opération sur les données
+#               (mêmes textes que FAQBot.ask, question par question)
+# ----------------------------
+
+from datetime import date
+import numpy as np
+import pandas as pd
+from data_store import formater_date, normaliser_reference
+from routeur import INTENTIONS
+from series_stock import series_stock
+
+# Entités d'une route, comme les produit Routeur.analyser
+ENTITES = ("ref", "num", "site", "famille", "code", "type_commande", "date", "page")
+ENTITE_REQUISE = {i["nom"]: i.get("entite") for i in INTENTIONS}
+
+
+# ----------------------------
+# 1️⃣ Éléments du lot
+# ----------------------------
+def route_depuis_entites(intention, entites):
+    """Route équivalente à celle du routeur pour une intention et des entités données."""
+    if intention not in ENTITE_REQUISE:
+        raise ValueError(f"Intention inconnue : {intention}")
+    if intention == "analytique":
+        raise ValueError("Une question analytique doit être posée en texte")
+    route = {"intention": intention, "mots": set(), "message": None, **dict.fromkeys(ENTITES)}
+    route["page"] = 1
+    for cle, valeur in entites.items():
+        if cle not in ENTITES:
+            raise ValueError(f"Entité inconnue : {cle}")
+        if cle in ("ref", "num", "code") and valeur is not None:
+            valeur = normaliser_reference(valeur)
+        elif cle == "date" and valeur is not None and not isinstance(valeur, date):
+            valeur = pd.Timestamp(valeur).date()
+        route[cle] = valeur
+    route["code"] = route["code"] or route["num"] or route["ref"]
+    requise = ENTITE_REQUISE[intention]
+    if requise and route[requise] is None:
+        raise ValueError(f"Entité '{requise}' requise pour l'intention {intention}")
+    return route
+
+
+# ----------------------------
+# 2️⃣ Réponses groupées par intention
+# ----------------------------
+# Attributs lus sur la première ligne de la table : intention -> (colonne, gabarit)
+ATTRIBUTS_PRODUIT = {
+    "fournisseur_principal": ("Fournisseur_Principal", " Fournisseur principal de {ref} : {valeur}"),
+    "famille_produit": ("Famille", " Famille du produit {ref} : {valeur}"),
+    "cout_unitaire": ("Coût_Unitaire", " Coût unitaire de {ref} : {valeur}"),
+    "delai_livraison": ("Délai_Livraison_Jours", " Délai de livraison de {ref} : {valeur} jours"),
+    "seuil_reappro": ("Seuil_Réappro", " Seuil de réapprovisionnement du produit {ref} : {valeur}"),
+    "poids_unitaire": ("Poids_Unitaire", " Poids unitaire du produit {ref} : {valeur}"),
+}
+ATTRIBUTS_COMMANDE = {
+    "contrepartie": ("Contrepartie", " Contrepartie de la commande {num} : {valeur}"),
+    "statut_commande": ("Statut_Commande", " Statut de la commande {num} : {valeur}"),
+    "quantite_commande": ("Quantité", " Quantité de la commande {num} : {valeur}"),
+    "type_commande": ("Type_Commande", " Type de la commande {num} : {valeur}"),
+    "livraison_prevue": ("Date_Livraison_Prévue", " Livraison prévue de la commande {num} : {valeur}"),
+    "livraison_reelle": ("Date_Livraison_Réelle", " Livraison réelle de {num} : {valeur}"),
+}
+COLONNES_STOCK = {
+    "stock_initial": ("Stock_Initial", " Stock initial de {ref}{site}{date} : {valeur}", "❌ Pas de stock initial pour {ref}."),
+    "stock_final": ("Stock_Final", " Stock final de {ref}{site}{date} : {valeur}", "❌ Pas de stock final pour {ref}."),
+}
+
+
+def _premieres_lignes(data_store, table, colonne, cles):
+    """Première ligne (dictionnaire, comme DataStore.premiere_ligne) de chaque clé, None si absente."""
+    premieres = [data_store.positions(table, colonne, cle)[:1] for cle in cles]
+    trouvees = [i for i, p in enumerate(premieres) if len(p)]
+    lignes = [None] * len(cles)
+    if trouvees:
+        positions = np.concatenate([premieres[i] for i in trouvees])
+        for i, ligne in zip(trouvees, data_store.table(table).iloc[positions].to_dict(orient="records")):
+            lignes[i] = ligne
+    return lignes
+
+
+def _attributs_produit(bot, intention, routes):
+    colonne, gabarit = ATTRIBUTS_PRODUIT[intention]
+    reponses = []
+    for r, info in zip(routes, _premieres_lignes(bot.store, "produits", "Référence_Produit", [r["ref"] for r in routes])):
+        if info is None:
+            introuvable = f"❌ Produit {r['ref']} non trouvé."
+            # La famille est affichée sans vérification préalable du produit
+            reponses.append(gabarit.format(ref=r["ref"], valeur=introuvable) if intention == "famille_produit" else introuvable)
+        else:
+            reponses.append(gabarit.format(ref=r["ref"], valeur=info.get(colonne, "Information non disponible")))
+    return reponses
+
+
+def _attributs_commande(bot, intention, routes):
+    colonne, gabarit = ATTRIBUTS_COMMANDE[intention]
+    reponses = []
+    for r, info in zip(routes, _premieres_lignes(bot.store, "commandes", "Num_Commande", [r["num"] for r in routes])):
+        if info is None:
+            reponses.append(f"❌ Commande {r['num']} non trouvée.")
+            continue
+        valeur = info.get(colonne, "Information non disponible")
+        if colonne.startswith("Date_"):
+            valeur = formater_date(valeur)
+        # Valeur textuelle renvoyée telle quelle (comme les gestionnaires de FAQBot)
+        reponses.append(valeur if isinstance(valeur, str) else gabarit.format(num=r["num"], valeur=valeur))
+    return reponses
+
+
+def _stock_par_date(bot, intention, routes):
+    """
+    Stock initial / final : relevés à la date demandée (dernier relevé connu) par une
+    seule recherche dans les séries, historiques complets sans date ; une seule
+    extraction de lignes pour tout le groupe.
+    """
+    colonne, gabarit, absent = COLONNES_STOCK[intention]
+    requetes, df = series_stock.lignes_lot([r["ref"] for r in routes], [r["date"] for r in routes],
+                                           [r["site"] for r in routes])
+    lignes = [[] for _ in routes]
+    df = df[["Date", colonne]]
+    for i, enregistrement in zip(requetes.tolist(), df.assign(Date=df["Date"].dt.date).to_dict(orient="records")):
+        lignes[i].append(enregistrement)
+
+    reponses = []
+    for r, valeur in zip(routes, lignes):
+        if not valeur:
+            reponses.append(absent.format(ref=r["ref"]))
+            continue
+        site = f" ({r['site']})" if r["site"] else ""
+        date_str = f" au {r['date']}" if r["date"] else ""
+        reponses.append(gabarit.format(ref=r["ref"], site=site, date=date_str, valeur=valeur))
+    return reponses
+
+
+def _stock_total_produit(bot, intention, routes):
+    """Somme des Stock_Final par produit (et date) : positions des index, une seule somme par tranches."""
+    store = bot.store
+    etat = store.etat()  # index et table du même état
+    positions = []
+    for r in routes:
+        p = store.positions("stock", "Référence_Produit", r["ref"], etat)
+        if r["date"]:
+            p = np.intersect1d(p, store.positions("stock", "Date", r["date"], etat), assume_unique=True)
+        positions.append(p)
+    longueurs = np.array([len(p) for p in positions])
+    valeurs = etat.stock["Stock_Final"].to_numpy(dtype=np.int64, na_value=0)[np.concatenate(positions)]
+    # Un zéro final : une tranche vide en fin de lot reste un indice valide pour reduceat
+    sommes = np.add.reduceat(np.r_[valeurs, 0], np.r_[0, np.cumsum(longueurs)[:-1]])
+    return [f"📊 Stock total du produit {r['ref']} : {int(s) if n else 0}"
+            for r, s, n in zip(routes, sommes, longueurs)]
+
+
+# Intentions traitées par groupe : intention -> fonction(bot, intention, routes) -> réponses
+GROUPES = {
+    **dict.fromkeys(ATTRIBUTS_PRODUIT, _attributs_produit),
+    **dict.fromkeys(ATTRIBUTS_COMMANDE, _attributs_commande),
+    **dict.fromkeys(COLONNES_STOCK, _stock_par_date),
+    "stock_total_produit": _stock_total_produit,
+}
+
+
+# ----------------------------
+# 3️⃣ Lot complet
+# ----------------------------
+def repondre_lot(bot, elements):
+    """
+    Réponses (dans l'ordre) à une liste d'éléments : question en texte, ou tuple
+    (intention, {entité: valeur}) sans passer par le routeur (un tuple de stock
+    initial / final accepte aussi un 'site'). Les questions identiques
+    ne sont traitées qu'une fois ; les intentions de GROUPES sont regroupées et
+    traitées en une passe chacune, les autres (KPI, listes, requêtes structurées,
+    Ollama) comme avec FAQBot.ask.
+    """
+    reponses = [None] * len(elements)
+    groupes = {}   # intention -> ([indices], [routes])
+    deja_vues = {}  # question -> indice de sa première occurrence
+    doublons = []
+
+    for i, element in enumerate(elements):
+        if isinstance(element, str):
+            if element in deja_vues:
+                doublons.append((i, deja_vues[element]))
+                continue
+            deja_vues[element] = i
+            route = bot.routeur.analyser(element)
+            requete = bot._requete_applicable(element, route)
+            if route["message"] or route["intention"] not in GROUPES or requete is not None:
+                # Même réponse que FAQBot.ask, sans refaire l'analyse de la question
+                reponses[i] = "".join(bot.ask_flux(element, route=route, requete=requete))
+                continue
+        else:
+            intention, entites = element
+            route = route_depuis_entites(intention, entites)
+            if intention not in GROUPES:
+                reponses[i] = bot.repondre_route("", route)
+                continue
+        indices, routes = groupes.setdefault(route["intention"], ([], []))
+        indices.append(i)
+        routes.append(route)
+
+    for intention, (indices, routes) in groupes.items():
+        for i, reponse in zip(indices, GROUPES[intention](bot, intention, routes)):
+            reponses[i] = reponse
+    for i, premier in doublons:
+        reponses[i] = reponses[premier]
+    return reponses
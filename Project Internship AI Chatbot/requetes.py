@@ -0,0 +1,244 @@
+# ----------------------------
+# Fichier : requetes.py
+# Description : Petit moteur de requêtes structurées sur produits / stock / commandes
+#               (filtre, regroupement, somme / comptage / top N, jointure sur Référence_Produit)
+#               et analyseur qui traduit une question en requête, avant tout appel au LLM
+# ----------------------------
+
+import re
+import pandas as pd
+from data_store import store, INDEX_COLONNES
+from rendu import formater_lignes
+
+# Colonnes de produits.csv accessibles depuis stock / commandes par jointure sur la référence
+COLONNES_PRODUIT = ["Désignation", "Famille", "Fournisseur_Principal", "Délai_Livraison_Jours",
+                    "Seuil_Réappro", "Coût_Unitaire", "Poids_Unitaire"]
+
+
+# ----------------------------
+# 1️⃣ Exécution d'une requête
+# ----------------------------
+# Une requête est un dictionnaire :
+# - table    : 'stock', 'commandes' ou 'produits'
+# - colonne  : colonne mesurée (None pour un comptage) ; 'Valeur' = Stock_Final × Coût_Unitaire
+# - agregat  : 'somme' ou 'compte'
+# - filtres  : {colonne: valeur} (égalité, sans casse) ; colonnes indexées résolues par le DataStore
+# - groupe   : colonnes de regroupement (liste vide = un seul total)
+# - top      : nombre de groupes gardés (None = tous), `croissant` pour les plus petits
+# - instantane : niveau de stock lu à une date ; sans filtre Date, la dernière date des
+#               lignes retenues est utilisée et notée dans requete["date_implicite"]
+def _joindre(df, colonnes, produits):
+    """Ajoute à `df` les colonnes de produits.csv demandées (correspondance par référence)."""
+    manquantes = [col for col in colonnes if col in COLONNES_PRODUIT and col not in df.columns]
+    if not manquantes:
+        return df
+    df = df.copy()
+    attributs = produits.drop_duplicates("Référence_Produit").set_index("Référence_Produit")
+    for col in manquantes:
+        df[col] = df["Référence_Produit"].map(attributs[col])
+        if col == "Coût_Unitaire":
+            df[col] = df[col].astype(float)
+    return df
+
+
+def executer_requete(requete, data_store=store):
+    """
+    Retourne un nombre (sans regroupement) ou un DataFrame [groupe..., 'valeur'] ;
+    None pour une somme sur une sélection vide (aucune ligne n'est pas un total de 0).
+    """
+    table = requete["table"]
+    filtres = requete.get("filtres", {})
+    indexes = INDEX_COLONNES.get(table, [])
+
+    # Filtres sur colonnes indexées : accès direct aux positions, sans parcourir la table
+    criteres = {col: val for col, val in filtres.items() if col in indexes}
+    colonne = requete.get("colonne")
+    groupe = requete.get("groupe", [])
+    if requete.get("instantane") and "Date" not in filtres and "Date" not in groupe:
+        if criteres:
+            lignes = data_store.lignes(table, criteres)
+            jour = lignes["Date"].max() if not lignes.empty else None
+        else:
+            # Sans autre filtre : dernière date de la table des KPI (pas de parcours de l'historique)
+            kpi = data_store.kpi_journalier
+            jour = kpi.index.max() if not kpi.empty else None
+        if jour is not None and not pd.isna(jour):
+            criteres["Date"] = requete["date_implicite"] = jour.date()
+    df = data_store.lignes(table, criteres)
+    a_joindre = list(groupe) + list(filtres) + (["Coût_Unitaire"] if colonne == "Valeur" else [])
+    if table != "produits":
+        df = _joindre(df, a_joindre, data_store.produits)
+
+    for col, val in filtres.items():
+        if col not in indexes:
+            df = df[df[col].astype("string").str.lower() == str(val).lower()]
+
+    if colonne == "Valeur":
+        df = df.assign(Valeur=df["Stock_Final"].astype(float) * df["Coût_Unitaire"])
+
+    if not groupe:
+        if requete["agregat"] == "compte":
+            return len(df)
+        if df.empty:
+            return None
+        total = df[colonne].sum()
+        return round(float(total), 2) if df[colonne].dtype.kind == "f" else int(total)
+
+    groupes = df.groupby(groupe, observed=True, sort=False)
+    resultat = groupes.size() if requete["agregat"] == "compte" else groupes[colonne].sum()
+    if groupe == ["Date"] and not requete.get("top"):
+        resultat = resultat.sort_index()  # évolution dans le temps : ordre chronologique
+    else:
+        resultat = resultat.sort_values(ascending=requete.get("croissant", False))
+    if requete.get("top"):
+        resultat = resultat.head(requete["top"])
+    if resultat.dtype.kind == "f":
+        resultat = resultat.round(2)
+    return resultat.rename("valeur").reset_index()
+
+
+# ----------------------------
+# 2️⃣ Analyse de la question
+# ----------------------------
+# (mots-clés, table, colonne, agrégat, libellé, instantané) — le premier qui correspond l'emporte.
+# Une mesure "instantanée" (niveau de stock) se lit à une date : la dernière si aucune n'est donnée.
+MESURES = [
+    (("valeur du stock", "valeur de stock", "valeur stock"), "stock", "Valeur", "somme", "Valeur du stock (MAD)", True),
+    (("nombre de ruptures", "ruptures", "en rupture"), "stock", None, "compte", "Produits en rupture", True),
+    (("nombre de commandes", "combien de commandes", "nb commandes", "commandes en retard", "commandes livrées"),
+     "commandes", None, "compte", "Nombre de commandes", False),
+    (("quantité commandée", "quantités commandées", "quantité des commandes", "quantités des commandes"),
+     "commandes", "Quantité", "somme", "Quantité commandée", False),
+    (("entrées",), "stock", "Entrées", "somme", "Entrées", False),
+    (("sorties",), "stock", "Sorties", "somme", "Sorties", False),
+    (("nombre de produits", "combien de produits", "nb produits"), "produits", None, "compte", "Nombre de produits", False),
+    (("stock initial",), "stock", "Stock_Initial", "somme", "Stock initial", True),
+    (("stock total", "stock final", "quantité en stock", "niveau de stock", "niveau du stock", "stock"),
+     "stock", "Stock_Final", "somme", "Stock", True),
+]
+
+# "par X" -> colonne de regroupement
+GROUPES = {
+    "site": "Site", "entrepôt": "Site", "entrepot": "Site", "famille": "Famille", "produit": "Référence_Produit",
+    "référence": "Référence_Produit", "fournisseur": "Fournisseur_Principal", "type": "Type_Commande",
+    "date": "Date", "jour": "Date", "client": "Contrepartie", "contrepartie": "Contrepartie", "statut": "Statut",
+}
+
+# Nom au pluriel dans un classement ("les 5 sites les plus ...") -> colonne
+SUJETS = {"produits": "Référence_Produit", "références": "Référence_Produit", "sites": "Site",
+          "entrepôts": "Site", "familles": "Famille", "fournisseurs": "Fournisseur_Principal",
+          "clients": "Contrepartie"}
+
+_PAR = re.compile(r"\bpar\s+(" + "|".join(GROUPES) + r")s?\b")
+_TOP = re.compile(r"\btop\s*(\d+)|\b(\d+)\s+(" + "|".join(SUJETS) + r")\b")
+_SUJET = re.compile(r"\b(?:les|le|la|quels?|quelles?)\s+(" + "|".join(SUJETS) + r"|produit|site|famille|fournisseur|client)\b")
+_EXTREME = re.compile(r"\b(?:les?|la)\s+(plus|moins)\b")
+
+# Filtres de statut reconnus dans la question
+STATUTS = [
+    ("en retard", "commandes", "Statut_Commande", "Retard"),
+    ("livrées", "commandes", "Statut_Commande", "Livrée"),
+    ("livrée", "commandes", "Statut_Commande", "Livrée"),
+    ("en préparation", "commandes", "Statut_Commande", "En préparation"),
+    ("urgent", "stock", "Statut", "URGENT"),
+]
+
+
+# Questions ouvertes : réservées au LLM même si une mesure y apparaît
+QUESTIONS_OUVERTES = ("pourquoi", "comment", "explique", "analyse", "conseil", "recommand", "que faire",
+                      "prévoir", "prévision", "risque", "optimiser", "améliorer")
+
+
+def analyser_requete(question, route):
+    """
+    Traduit une question en requête structurée à partir des mots-clés de mesure,
+    de regroupement ("par site"), de classement ("top 5", "les plus") et des entités
+    déjà extraites par le routeur (site, date, référence, famille, type de commande).
+    Retourne None si aucune mesure n'est reconnue.
+    """
+    q = question.lower()
+    if any(mot in q for mot in QUESTIONS_OUVERTES):
+        return None
+    mesure = next((m for m in MESURES if any(mot in q for mot in m[0])), None)
+    if mesure is None:
+        return None
+    _, table, colonne, agregat, libelle, instantane = mesure
+
+    filtres = {}
+    if table != "produits":
+        if route.get("site") and table == "stock":
+            filtres["Site"] = route["site"]
+        if route.get("ref"):
+            filtres["Référence_Produit"] = route["ref"]
+        if route.get("date"):
+            filtres["Date"] = route["date"]
+        if table == "commandes" and route.get("type_commande") and not _PAR.search(q):
+            filtres["Type_Commande"] = route["type_commande"]
+    if route.get("famille"):
+        filtres["Famille"] = route["famille"]
+    for mot, table_statut, col, valeur in STATUTS:
+        if mot in q and table_statut == table:
+            filtres[col] = valeur
+            break
+    if colonne is None and libelle == "Produits en rupture":
+        filtres["Stock_Final"] = 0
+
+    groupe = []
+    for m in _PAR.finditer(q):
+        col = GROUPES[m.group(1)]
+        if col == "Statut" and table == "commandes":
+            col = "Statut_Commande"
+        if col not in groupe and col not in filtres:
+            groupe.append(col)
+
+    top, croissant = None, False
+    m_top = _TOP.search(q)
+    m_ext = _EXTREME.search(q)
+    if m_top or m_ext:
+        top = int(m_top.group(1) or m_top.group(2)) if m_top else (5 if re.search(r"\bles\s+(plus|moins)\b", q) else 1)
+        croissant = bool(m_ext and m_ext.group(1) == "moins")
+        if not groupe:
+            sujet = (m_top.group(3) if m_top and m_top.group(3) else None) or (_SUJET.search(q).group(1) if _SUJET.search(q) else "produits")
+            groupe = [SUJETS.get(sujet, SUJETS.get(sujet + "s", "Référence_Produit"))]
+
+    # Prioritaire sur une intention du routeur : regroupement/classement, ou filtre
+    # (site, famille) que les réponses à mot-clé ne savent pas appliquer. Le stock
+    # initial / final d'un produit sur un site reste à son gestionnaire : il lit le
+    # dernier relevé connu à la date, là où le filtre Date exige un fichier ce jour-là.
+    stock_produit = route.get("intention") in ("stock_initial", "stock_final") and "Référence_Produit" in filtres
+    prioritaire = bool(groupe) or "Famille" in filtres or ("Site" in filtres and not stock_produit)
+
+    return {"table": table, "colonne": colonne, "agregat": agregat, "libelle": libelle,
+            "filtres": filtres, "groupe": groupe, "top": top, "croissant": croissant,
+            "instantane": instantane, "date_implicite": None, "prioritaire": prioritaire}
+
+
+# ----------------------------
+# 3️⃣ Réponse
+# ----------------------------
+def _decrire_filtres(filtres):
+    morceaux = []
+    for col, val in filtres.items():
+        if col == "Stock_Final":
+            continue
+        valeur = val.strftime("%Y-%m-%d") if hasattr(val, "strftime") else val
+        morceaux.append(f"le {valeur}" if col == "Date" else f"{col} = {valeur}")
+    return f" ({', '.join(morceaux)})" if morceaux else ""
+
+
+def repondre_requete(requete, page=1, data_store=store):
+    """Exécute la requête et met le résultat en forme pour le chat."""
+    resultat = executer_requete(requete, data_store)
+    filtres = dict(requete["filtres"])
+    if requete["date_implicite"]:
+        filtres["Date"] = requete["date_implicite"]
+    titre = f"{requete['libelle']}{_decrire_filtres(filtres)}"
+    if resultat is None:
+        return f"📊 {titre} : aucune donnée."
+    if not isinstance(resultat, pd.DataFrame):
+        return f"📊 {titre} : {resultat}"
+    if resultat.empty:
+        return f"📊 {titre} : aucune donnée."
+    modele = " | ".join("{" + col + "}" for col in requete["groupe"]) + " : {valeur}"
+    par = ", ".join(requete["groupe"])
+    return f"📊 {titre} par {par} :\n" + formater_lignes(resultat, "▪ " + modele, page)
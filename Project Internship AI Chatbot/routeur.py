@@ -0,0 +1,255 @@
+# ----------------------------
+# Fichier : routeur.py
+# Description : Routeur d'intentions compilé pour FAQBot.ask
+#               (une seule expression régulière pour tous les mots-clés + extraction des entités)
+# ----------------------------
+
+from datetime import datetime
+import re
+from data_store import store, normaliser_reference
+
+# ----------------------------
+# 1️⃣ Table des intentions
+# ----------------------------
+# Chaque intention déclare :
+# - mots     : mots-clés déclencheurs (la correspondance la plus longue l'emporte) ;
+# - avec     : mots-clés dont au moins un doit aussi être présent (facultatif) ;
+# - entite   : entité obligatoire ('ref', 'num', 'famille', 'code', 'type_commande') ;
+# - si_absente : réponse si l'entité manque (sinon on passe à l'intention suivante).
+# À score égal, l'ordre de la liste (celui de l'ancienne cascade) départage.
+INTENTIONS = [
+    # ---------------- Produits ----------------
+    {"nom": "fournisseur_principal", "entite": "ref",
+     "mots": ["fournisseur principal", "fournisseur du produit", "fournisseur principal du produit", "qui fournit", "fournisseur de"]},
+    {"nom": "famille_produit", "entite": "ref",
+     "mots": ["famille", "catégorie", "type de produit", "famille du produit"]},
+    {"nom": "cout_unitaire", "entite": "ref",
+     "mots": ["cout unitaire du produit", "coût", "prix", "cout", "combien coûte"]},
+    {"nom": "delai_livraison", "entite": "ref",
+     "mots": ["délai de livraison du produit", "délai de livraison", "delai", "délai", "temps de livraison"]},
+    {"nom": "seuil_reappro", "entite": "ref",
+     "mots": ["seuil de réapprovisionnement du produit", "seuil de réappro du produit", "seuil de réappro",
+              "seuil de reappro", "seuil de réapprovisionnement", "seuil", "réapprovisionnement minimum"]},
+    {"nom": "poids_unitaire", "entite": "ref",
+     "mots": ["poids unitaire du produit", "poids", "poids unitaire"]},
+    {"nom": "liste_produits_famille", "entite": "famille",
+     "mots": ["liste des produits par la famille", "liste des produits", "produits du la famille", "produits dans la famille"]},
+    {"nom": "produit_plus_cher",
+     "mots": ["produits les plus cher", "les produits les plus cher", "plus cher", "coût maximum"]},
+    {"nom": "liste_familles",
+     "mots": ["liste des familles", "quelles familles", "familles disponibles"]},
+    {"nom": "details_famille", "entite": "famille",
+     "mots": ["détails famille", "infos famille", "les produits de la famille"]},
+
+    # ---------------- Commandes ----------------
+    {"nom": "contrepartie", "entite": "num",
+     "mots": ["la contrepartie de la commande", "contrepartie", "client", "fournisseur", "qui a commandé"]},
+    {"nom": "statut_commande", "entite": "num",
+     "mots": ["le statut de commande", "statut de commande", "statut", "état", "avancement", "situation", "où en est"]},
+    {"nom": "quantite_commande", "entite": "num",
+     "mots": ["la quantité de commande", "quantité de commande", "quantité", "nombre", "combien", "nb articles"]},
+    {"nom": "type_commande", "entite": "num",
+     "mots": ["le type de commande", "le type de la commande", "type", "catégorie", "nature"]},
+    {"nom": "livraison_prevue", "entite": "num",
+     "mots": ["la date de livraison prevue de la commande", "date de livraison prévue de commande", "livraison prévue",
+              "date prévue pour la livraison de commande", "date prévue pour la livraison de", "date prévue",
+              "quand sera livré", "quand est prévue"]},
+    {"nom": "livraison_reelle", "entite": "num",
+     "mots": ["livraison réelle de commande", "livraison reelle de commande", "livraison réelle", "livraison effectuée",
+              "date réelle", "quand a été livré"]},
+    {"nom": "commandes_retard",
+     "mots": ["commandes en retard", "retard de commande", "commandes qui sont en retard",
+              "quelles commandes sont en retard", "liste des commandes en retard"]},
+    {"nom": "commandes_par_produit", "entite": "ref",
+     "mots": ["donner les commandes du produit", "commandes du produit", "commandes pour le produit", "quel produit"]},
+    {"nom": "commandes_par_type", "entite": "type_commande",
+     "mots": ["commandes client", "commandes fournisseur", "type de commande"]},
+    {"nom": "details_commande_client", "entite": "code",
+     "mots": ["donner en détail la commande de"]},
+
+    # ---------------- Stock ----------------
+    {"nom": "stock_initial", "entite": "ref", "si_absente": " Référence produit introuvable dans la question.",
+     "mots": ["le stock initial", "le stock initial du produit", "stock initial du produit", "quel est le stock initial du produit",
+              "stock initial", "stock au départ", "stock début", "stock de départ"]},
+    {"nom": "stock_final", "entite": "ref", "si_absente": " Référence produit non détectée dans la question.",
+     "mots": ["stock final du produit", "stock final", "stockfin", "stock fin"]},
+    {"nom": "produits_rupture",
+     "mots": ["produits en rupture"]},
+    {"nom": "produits_urgents",
+     "mots": ["quels sont les produits urgents", "donner les produits urgents", "produits urgents", "stocks urgents",
+              "réapprovisionnement urgent"]},
+    {"nom": "evolution_stock", "entite": "ref",
+     "si_absente": "❌ Merci de préciser une référence produit (ex: évolution du stock P001).",
+     "mots": ["l'évolution du stock pour le produit", "donner l'évolution du stock du", "quel est l'évolution du stock",
+              "évolution du stock", "historique du stock", "suivi du stock", "stock passé"]},
+
+    # ---------------- Informations complètes ----------------
+    {"nom": "infos_completes",
+     "mots": ["de toutes les informations", "toutes les informations", "infos complètes", "détails complets", "tous les détails"]},
+
+    # ---------------- Analyse (Ollama avec contexte KPI) ----------------
+    {"nom": "analytique",
+     "mots": ["optimiser", "réduire les ruptures", "améliorer la gestion des stocks", "améliorer", "comment faire pour",
+              "réduction des ruptures", "gestion des stocks"]},
+
+    # ---------------- KPI ----------------
+    {"nom": "tendance_kpi",
+     "mots": ["évolution de la valeur du stock", "historique de la valeur du stock", "évolution du taux de livraison",
+              "historique du taux de livraison"]},
+    {"nom": "valeur_stock",
+     "mots": ["valeur du stock total", "valeur du stock", "valeur totale", "montant du stock"]},
+    {"nom": "taux_livraison",
+     "mots": ["taux de livraison", "pourcentage livraison", "livraison à temps"]},
+    {"nom": "produits_a_reapprovisionner",
+     "mots": ["produits à réapprovisionner", "réapprovisionnement nécessaire", "besoin de réappro"]},
+    {"nom": "commandes_clients_mois", "avec": ["ce mois"],
+     "mots": ["commandes pour les clients", "commandes des clients", "commandes clients"]},
+    {"nom": "commandes_fournisseurs_mois",
+     "mots": ["commandes pour les fournisseurs", "commandes des fournisseurs", "commandes fournisseurs",
+              "commandes fournisseurs ce mois", "commandes fournisseurs pour ce mois", "commandes fournisseurs de ce mois",
+              "commandes aux fournisseurs"]},
+    {"nom": "stock_total_mois", "avec": ["ce mois"],
+     "mots": ["stock total"]},
+    {"nom": "stock_total_produit", "entite": "ref",
+     "mots": ["donner le stock total de produit", "donner le stock total", "stock total de produit", "stock total",
+              "stock complet", "quantité totale"]},
+]
+
+
+# ----------------------------
+# 2️⃣ Routeur
+# ----------------------------
+class Routeur:
+    """
+    Analyse une question en un seul passage d'une expression régulière compilée qui
+    reconnaît à la fois les mots-clés de toutes les intentions, les dates, le numéro
+    de page et les autres mots. Les mots sont classés en entités (référence produit,
+    numéro de commande, site, famille) par simple accès aux index du DataStore.
+    """
+
+    def __init__(self, data_store=store, intentions=INTENTIONS):
+        self.store = data_store
+        self.intentions = intentions
+        self._familles = set()
+        self._version_familles = None
+
+        # mot-clé -> [(indice de l'intention, rôle 'mots' ou 'avec')]
+        self._mots = {}
+        for i, intention in enumerate(intentions):
+            for role in ("mots", "avec"):
+                for mot in intention.get(role, []):
+                    self._mots.setdefault(mot.strip().lower(), []).append((i, role))
+
+        # Un mot-clé trouvé vaut aussi pour les mots-clés plus courts qu'il contient
+        # (ex: "commandes clients" compte aussi pour "commandes client" et "client"),
+        # comme les sorties d'un automate d'Aho-Corasick
+        self._sorties = {
+            mot: [(i, role, len(sous_mot)) for sous_mot, roles in self._mots.items() if sous_mot in mot for i, role in roles]
+            for mot in self._mots
+        }
+
+        # Alternatives triées du plus long au plus court : à une même position,
+        # le mot-clé le plus spécifique est retenu
+        alternatives = "|".join(re.escape(mot) for mot in sorted(self._mots, key=len, reverse=True))
+        self._motif = re.compile(
+            r"(?P<date_fr>\b\d{1,2}/\d{1,2}/\d{4}\b)"
+            r"|(?P<date_iso>\b\d{4}-\d{2}-\d{2}\b)"
+            r"|\bpage\s+(?P<page>\d+)"
+            rf"|(?P<mot>(?<!\w)(?:{alternatives}))"
+            r"|(?P<jeton>\w+)"
+        )
+
+    # ---- Vocabulaire issu des données ----
+    def _est(self, table, col, jeton):
+        return normaliser_reference(jeton) in self.store.index.get(table, {}).get(col, {})
+
+    def _famille(self, jeton):
+        if self._version_familles != self.store.version:
+            produits = self.store.produits
+            familles = produits["Famille"].dropna().str.lower() if "Famille" in produits.columns else []
+            self._familles = set(familles)
+            self._version_familles = self.store.version
+        return jeton if jeton in self._familles else None
+
+    # ---- Analyse ----
+    def analyser(self, question):
+        """
+        Retourne un dictionnaire : intention retenue (ou None), mots-clés trouvés
+        et entités (ref, num, site, famille, code, type_commande, date, page).
+        """
+        q = question.lower()
+        trouves = set()
+        route = {"intention": None, "mots": trouves, "ref": None, "num": None, "site": None,
+                 "famille": None, "code": None, "type_commande": None, "date": None, "page": 1}
+        codes_inconnus = []
+
+        for m in self._motif.finditer(q):
+            genre = m.lastgroup
+            if genre == "mot":
+                trouves.add(m.group("mot"))
+            elif genre == "jeton":
+                jeton = m.group("jeton")
+                if route["famille"] is None:
+                    route["famille"] = self._famille(jeton)
+                if not (re.search(r"\d", jeton) or "_" in jeton):
+                    continue  # mot courant : ni référence, ni commande, ni site
+                if route["ref"] is None and self._est("produits", "Référence_Produit", jeton):
+                    route["ref"] = normaliser_reference(jeton)
+                elif route["num"] is None and self._est("commandes", "Num_Commande", jeton):
+                    route["num"] = normaliser_reference(jeton)
+                elif route["site"] is None and self._est("stock", "Site", jeton):
+                    route["site"] = self.store.premiere_ligne("stock", "Site", jeton)["Site"]  # libellé exact
+                elif re.search(r"[a-z]", jeton) and re.search(r"\d", jeton):
+                    codes_inconnus.append(normaliser_reference(jeton))
+            elif genre == "page":
+                route["page"] = int(m.group("page"))
+            elif route["date"] is None:
+                texte, format_date = (m.group("date_fr"), "%d/%m/%Y") if genre == "date_fr" else (m.group("date_iso"), "%Y-%m-%d")
+                try:
+                    route["date"] = datetime.strptime(texte, format_date).date()
+                except ValueError:
+                    pass
+
+        # Références inconnues : on les garde pour répondre "non trouvé" comme avant
+        if codes_inconnus:
+            route["code"] = codes_inconnus[0]
+            route["ref"] = route["ref"] or codes_inconnus[0]
+            route["num"] = route["num"] or codes_inconnus[0]
+        route["code"] = route["code"] or route["num"] or route["ref"]
+        if "fournisseur" in q:
+            route["type_commande"] = "Fournisseur"
+        elif "client" in q:
+            route["type_commande"] = "Client"
+
+        route["intention"], route["message"] = self._choisir(trouves, route)
+        return route
+
+    def _choisir(self, trouves, route):
+        """Intention de meilleur score (longueur du mot-clé le plus spécifique) dont les entités sont présentes."""
+        scores = {}
+        avec = {}
+        for mot in trouves:
+            for i, role, longueur in self._sorties[mot]:
+                if role == "mots":
+                    scores[i] = max(scores.get(i, 0), longueur)
+                else:
+                    avec[i] = max(avec.get(i, 0), longueur)
+
+        candidats = []
+        for i, score in scores.items():
+            intention = self.intentions[i]
+            if intention.get("avec"):
+                if i not in avec:
+                    continue
+                score += avec[i]
+            candidats.append((-score, i))
+
+        for _, i in sorted(candidats):
+            intention = self.intentions[i]
+            entite = intention.get("entite")
+            if entite and route.get(entite) is None:
+                if intention.get("si_absente"):
+                    return intention["nom"], intention["si_absente"]
+                continue
+            return intention["nom"], None
+        return None, None
@@ -0,0 +1,189 @@
+# ----------------------------
+# Fichier : series_stock.py
+# Description : Historique du stock en séries temporelles par (produit, site) : tableaux
+#               triés par date, requêtes « à la date D » par recherche dichotomique
+#               et requêtes de période pour l'évolution
+# ----------------------------
+
+import threading
+import numpy as np
+import pandas as pd
+from data_store import store, normaliser_reference, _normaliser_colonne
+
+_AUCUNE_POSITION = np.array([], dtype=np.intp)
+# Jours stockés dans les 32 bits bas des clés des séries (jour 0 : 1900-01-01)
+_JOUR_ZERO = int(np.datetime64("1900-01-01", "D").astype(np.int64))
+_JOUR_MAX = (1 << 32) - 1
+
+
+def _jour(valeur):
+    """Date (date, Timestamp ou texte) en datetime64[D], unité des tableaux de dates."""
+    return np.datetime64(pd.Timestamp(valeur).date(), "D")
+
+
+class SeriesStock:
+    """
+    Lignes de stock regroupées par (référence, site) et triées par date, dans trois
+    tableaux contigus : positions (iloc dans store.stock), dates et Stock_Final.
+    Chaque série est une tranche [debut, fin) de ces tableaux : la dernière ligne à
+    la date D ou avant se trouve par recherche dichotomique (O(log n)), y compris
+    pour une date sans fichier. Une clé (rang de la série, jour) par ligne permet
+    de chercher d'un coup toutes les dates d'un lot de requêtes. Reconstruit à la
+    première requête après un changement de version des données.
+    """
+
+    def __init__(self, data_store=store):
+        self.store = data_store
+        self._verrou = threading.Lock()
+        self._etat = None  # (version, positions, dates, stock_final, debuts, series par référence, clés, stock)
+
+    # ----------------------------
+    # 1️⃣ Construction
+    # ----------------------------
+    def _construire(self):
+        # Un seul état lu : version et table de stock publiées ensemble par le DataStore
+        donnees = self.store.etat()
+        df, version = donnees.stock, donnees.version
+        if df.empty:
+            vide = np.array([], dtype="datetime64[D]")
+            return version, _AUCUNE_POSITION, vide, _AUCUNE_POSITION, _AUCUNE_POSITION, {}, _AUCUNE_POSITION, df
+
+        codes_ref, refs = pd.factorize(_normaliser_colonne(df["Référence_Produit"]))
+        codes_site, sites = pd.factorize(_normaliser_colonne(df["Site"]))
+        groupe = codes_ref.astype(np.int64) * max(len(sites), 1) + codes_site
+        dates = df["Date"].to_numpy().astype("datetime64[D]")
+
+        positions = np.lexsort((dates, groupe))  # par série, puis par date
+        groupe = groupe[positions]
+        debuts = np.flatnonzero(np.r_[True, groupe[1:] != groupe[:-1]])
+        fins = np.r_[debuts[1:], len(positions)]
+
+        par_reference = {}
+        for debut, fin in zip(debuts, fins):
+            g = groupe[debut]
+            ref, site = refs[g // max(len(sites), 1)], sites[g % max(len(sites), 1)]
+            par_reference.setdefault(ref, {})[site] = (int(debut), int(fin))
+
+        stock_final = df["Stock_Final"].to_numpy(dtype=np.int64, na_value=0)[positions]
+        dates = dates[positions]
+        # Clé croissante (rang de la série << 32 | jour) : une seule recherche pour tout un lot
+        rangs = np.repeat(np.arange(len(debuts), dtype=np.int64), fins - debuts)
+        cles = (rangs << 32) + (dates.astype(np.int64) - _JOUR_ZERO)
+        for tableau in (positions, debuts, cles):
+            tableau.flags.writeable = False
+        return version, positions, dates, stock_final, debuts, par_reference, cles, df
+
+    def _actuel(self):
+        etat = self._etat
+        if etat is None or etat[0] != self.store.version:
+            with self._verrou:
+                etat = self._etat
+                if etat is None or etat[0] != self.store.version:
+                    etat = self._etat = self._construire()
+        return etat
+
+    def _tranches(self, etat, ref, site=None):
+        series = etat[5].get(normaliser_reference(ref), {})
+        if site is not None:
+            tranche = series.get(normaliser_reference(site))
+            return [tranche] if tranche else []
+        return list(series.values())
+
+    # ----------------------------
+    # 2️⃣ Requêtes
+    # ----------------------------
+    def au(self, ref, jour, site=None, etat=None):
+        """Positions (iloc) de la dernière ligne à la date `jour` ou avant, une par site."""
+        etat = etat or self._actuel()
+        dates, jour = etat[2], _jour(jour)
+        positions = []
+        for debut, fin in self._tranches(etat, ref, site):
+            k = np.searchsorted(dates[debut:fin], jour, side="right")
+            if k:
+                positions.append(etat[1][debut + k - 1])
+        return np.array(positions, dtype=np.intp)
+
+    def periode(self, ref, debut=None, fin=None, site=None, etat=None):
+        """Positions (iloc) des lignes de `ref` entre `debut` et `fin` inclus, par date croissante."""
+        etat = etat or self._actuel()
+        dates = etat[2]
+        morceaux = []
+        for d, f in self._tranches(etat, ref, site):
+            gauche = d + np.searchsorted(dates[d:f], _jour(debut), side="left") if debut is not None else d
+            droite = d + np.searchsorted(dates[d:f], _jour(fin), side="right") if fin is not None else f
+            morceaux.append(np.arange(gauche, droite))
+        if not morceaux:
+            return _AUCUNE_POSITION
+        indices = np.concatenate(morceaux)
+        indices = indices[np.argsort(dates[indices], kind="stable")]  # plusieurs sites : fusion par date
+        return etat[1][indices]
+
+    def au_lot(self, refs, jours, sites=None, etat=None):
+        """
+        Version groupée de `au` : pour chaque requête (refs[i], jours[i], sites[i]),
+        mêmes positions et même ordre. Retourne (requetes, positions) : numéro de la
+        requête et position (iloc) de chaque ligne trouvée, requêtes dans l'ordre.
+        """
+        etat = etat or self._actuel()
+        debuts, cles = etat[4], etat[6]
+        sites = sites if sites is not None else [None] * len(refs)
+        requetes, rangs, cibles = [], [], []
+        for i, (ref, jour, site) in enumerate(zip(refs, jours, sites)):
+            jour = min(max(int(_jour(jour).astype(np.int64)) - _JOUR_ZERO, -1), _JOUR_MAX)
+            for debut, _ in self._tranches(etat, ref, site):
+                requetes.append(i)
+                rangs.append(np.searchsorted(debuts, debut))
+                cibles.append(jour)
+        if not requetes:
+            return _AUCUNE_POSITION, _AUCUNE_POSITION
+        rangs = np.array(rangs, dtype=np.int64)
+        cibles = np.array(cibles, dtype=np.int64)
+        # Dernière clé <= (rang, jour) ; hors de la série si la série commence après ce jour
+        k = np.searchsorted(cles, (rangs << 32) + cibles, side="right") - 1
+        trouve = k >= debuts[rangs]
+        return np.array(requetes, dtype=np.intp)[trouve], etat[1][k[trouve]]
+
+    def lignes(self, ref, jour=None, site=None):
+        """Lignes de stock de `ref` à la date `jour` (dernier relevé connu), ou tout son historique."""
+        etat = self._actuel()  # positions et table du même état
+        positions = self.periode(ref, site=site, etat=etat) if jour is None else self.au(ref, jour, site, etat)
+        return etat[7].iloc[positions]
+
+    def lignes_lot(self, refs, jours, sites=None):
+        """
+        Version groupée de `lignes` : (requetes, lignes), numéro de la requête de chaque
+        ligne trouvée et lignes de stock ; jours[i] vide : tout l'historique de refs[i].
+        Positions et table lues dans le même état (pas de mélange avec une reconstruction).
+        """
+        etat = self._actuel()
+        sites = sites if sites is not None else [None] * len(refs)
+        avec_date = [i for i, jour in enumerate(jours) if jour]
+        requetes, positions = self.au_lot([refs[i] for i in avec_date], [jours[i] for i in avec_date],
+                                          [sites[i] for i in avec_date], etat)
+        morceaux = [(np.asarray(avec_date, dtype=np.intp)[requetes], positions)]
+        for i, (ref, jour, site) in enumerate(zip(refs, jours, sites)):
+            if not jour:
+                p = self.periode(ref, site=site, etat=etat)
+                morceaux.append((np.full(len(p), i, dtype=np.intp), p))
+        requetes = np.concatenate([m[0] for m in morceaux])
+        return requetes, etat[7].iloc[np.concatenate([m[1] for m in morceaux])]
+
+    def total_au(self, jour, depuis=None):
+        """
+        Somme des Stock_Final du dernier relevé de chaque (produit, site) à la date `jour`
+        ou avant ; avec `depuis`, seuls les relevés datés de `depuis` ou après comptent.
+        """
+        etat = self._actuel()
+        _, _, dates, stock_final, debuts, _, _, _ = etat
+        if len(dates) == 0:
+            return 0
+        # Nombre de relevés <= jour dans chaque série (séries triées par date)
+        nb = np.add.reduceat((dates <= _jour(jour)).astype(np.int64), debuts)
+        derniers = (debuts + nb - 1)[nb > 0]
+        if depuis is not None:
+            derniers = derniers[dates[derniers] >= _jour(depuis)]
+        return int(stock_final[derniers].sum())
+
+
+# Instance unique partagée (comme le DataStore)
+series_stock = SeriesStock()
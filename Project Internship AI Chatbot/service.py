@@ -0,0 +1,268 @@
+# ----------------------------
+# Fichier : service.py
+# Description : Service HTTP JSON du chatbot sans Streamlit (application ASGI) pour les
+#               intégrations ERP, servi par un ou plusieurs processus qui partagent les
+#               données chargées avant le fork (seul le processus parent les actualise)
+# Usage : python service.py [--hote 127.0.0.1] [--port 8000] [--workers 4]
+#         POST /question {"question": "..."}            -> {"reponse": "..."}
+#         POST /lot {"questions": ["...", {"intention": "stock_final", "entites": {"ref": "P001"}}]}
+#                                                       -> {"reponses": [...]}
+#         GET  /sante                                   -> {"statut": "ok", ...}
+# ----------------------------
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from data_store import store
+from faqbot import FAQBot
+from ollama_client import MAX_EN_VOL, client as client_ollama
+from tableau_bord import INTERVALLE_ACTUALISATION, tableau_bord
+
+TAILLE_MAX_CORPS = 1024 * 1024  # octets
+MAX_QUESTIONS_LOT = 10000
+
+_bot = None
+# Faux dans les processus forkés : le parent actualise les données à leur place
+_actualisation_locale = True
+
+
+class RequeteInvalide(ValueError):
+    """Corps de requête refusé (réponse 4xx avec le message)."""
+
+    def __init__(self, message, statut=400):
+        super().__init__(message)
+        self.statut = statut
+
+
+def moteur():
+    """FAQBot du processus (créé au premier appel, sur les données déjà chargées)."""
+    global _bot
+    if _bot is None:
+        store.actualiser_si_necessaire()
+        _bot = FAQBot()
+    return _bot
+
+
+# ----------------------------
+# 1️⃣ Points d'entrée JSON
+# ----------------------------
+def _element_lot(element):
+    """Question en texte, ou {"intention": ..., "entites": {...}} -> tuple pour FAQBot.ask_lot."""
+    if isinstance(element, str):
+        return element
+    if isinstance(element, dict) and isinstance(element.get("intention"), str) \
+            and isinstance(element.get("entites", {}), dict):
+        return element["intention"], element.get("entites", {})
+    raise RequeteInvalide("Chaque élément de 'questions' est un texte ou {\"intention\", \"entites\"}")
+
+
+def _question(donnees):
+    question = donnees.get("question")
+    if not isinstance(question, str) or not question.strip():
+        raise RequeteInvalide("Champ 'question' (texte non vide) manquant")
+    return {"reponse": moteur().ask(question)}
+
+
+def _lot(donnees):
+    questions = donnees.get("questions")
+    if not isinstance(questions, list):
+        raise RequeteInvalide("Champ 'questions' (liste) manquant")
+    if len(questions) > MAX_QUESTIONS_LOT:
+        raise RequeteInvalide(f"Au plus {MAX_QUESTIONS_LOT} questions par lot", 413)
+    return {"reponses": moteur().ask_lot([_element_lot(e) for e in questions])}
+
+
+def _sante(donnees=None):
+    return {"statut": "ok", "version_donnees": store.version, "processus": os.getpid(),
+            "stock": len(store.stock), "commandes": len(store.commandes)}
+
+
+ROUTES = {("POST", "/question"): _question, ("POST", "/lot"): _lot, ("GET", "/sante"): _sante}
+
+
+# ----------------------------
+# 2️⃣ Application ASGI
+# ----------------------------
+async def _lire_corps(receive):
+    corps = bytearray()
+    while True:
+        message = await receive()
+        corps += message.get("body", b"")
+        if len(corps) > TAILLE_MAX_CORPS:
+            raise RequeteInvalide("Corps de requête trop volumineux", 413)
+        if not message.get("more_body"):
+            return bytes(corps)
+
+
+async def _envoyer(send, statut, contenu):
+    corps = json.dumps(contenu, ensure_ascii=False, default=str).encode("utf-8")
+    await send({"type": "http.response.start", "status": statut,
+                "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                            (b"content-length", str(len(corps)).encode())]})
+    await send({"type": "http.response.body", "body": corps})
+
+
+async def _cycle_de_vie(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            moteur()
+            if _actualisation_locale:
+                # Thread d'arrière-plan (processus unique) : nouveaux fichiers et instantané des KPI
+                tableau_bord.demarrer()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            tableau_bord.arreter()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """Application ASGI : une route par point d'entrée, réponses calculées dans un thread."""
+    if scope["type"] == "lifespan":
+        await _cycle_de_vie(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    cle = (scope["method"], scope["path"].rstrip("/") or "/")
+    traitement = ROUTES.get(cle)
+    if traitement is None:
+        chemins = {chemin for _, chemin in ROUTES}
+        await _envoyer(send, 405 if cle[1] in chemins else 404, {"erreur": "Route inconnue"})
+        return
+    try:
+        donnees = {}
+        if scope["method"] == "POST":
+            try:
+                donnees = json.loads(await _lire_corps(receive) or b"{}")
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                raise RequeteInvalide("Corps JSON invalide") from None
+            if not isinstance(donnees, dict):
+                raise RequeteInvalide("Le corps JSON doit être un objet")
+        # Recherches pandas / appel Ollama synchrones : hors de la boucle d'événements
+        resultat = await asyncio.to_thread(traitement, donnees)
+    except RequeteInvalide as e:
+        await _envoyer(send, e.statut, {"erreur": str(e)})
+    except ValueError as e:  # intention ou entité inconnue dans un lot
+        await _envoyer(send, 400, {"erreur": str(e)})
+    except Exception as e:
+        print(f"Erreur service {cle[1]}: {e}")
+        await _envoyer(send, 500, {"erreur": "Erreur interne"})
+    else:
+        await _envoyer(send, 200, resultat)
+
+
+# ----------------------------
+# 3️⃣ Serveur multi-processus
+# ----------------------------
+def _lancer_processus(sock, limite_ollama):
+    """Fork d'un processus uvicorn qui sert `sock` ; retourne son pid (dans le parent)."""
+    pid = os.fork()
+    if pid == 0:
+        import uvicorn
+
+        # Gestionnaires du parent remplacés : uvicorn installe les siens (arrêt propre)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        client_ollama.limiter(limite_ollama)
+        config = uvicorn.Config(application, log_level="warning")
+        uvicorn.Server(config).run(sockets=[sock])
+        os._exit(0)
+    return pid
+
+
+def _signaler(pids, signum=signal.SIGTERM):
+    for pid in pids:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def servir(hote="127.0.0.1", port=8000, workers=1, intervalle=INTERVALLE_ACTUALISATION):
+    """
+    Charge les données et le routeur une fois, puis sert l'application.
+    Un seul processus par défaut : son thread d'arrière-plan ingère les nouveaux fichiers.
+    Avec `workers` > 1 (systèmes avec fork), `workers` processus uvicorn forkés sur une
+    même socket partagent les DataFrames et index, jamais modifiés (copie à l'écriture).
+    Seul le parent vérifie les fichiers toutes les `intervalle` secondes : à chaque
+    nouvelle version des données, il lance des processus neufs qui en héritent puis
+    arrête les anciens (requêtes en cours terminées). Les processus se partagent la
+    limite d'appels simultanés à Ollama : MAX_EN_VOL // workers chacun, au moins un.
+    """
+    global _actualisation_locale
+    import uvicorn  # dépendance du seul mode service
+
+    moteur()
+    if workers <= 1 or not hasattr(os, "fork"):
+        gc.freeze()
+        uvicorn.run(application, host=hote, port=port, log_level="warning")
+        return
+
+    _actualisation_locale = False
+    tableau_bord.actualiser()  # instantané des KPI calculé avant le fork, hérité par les processus
+    sock = socket.socket(socket.AF_INET6 if ":" in hote else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((hote, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    limite_ollama = max(1, MAX_EN_VOL // workers)
+
+    def lancer():
+        gc.freeze()  # objets déjà chargés hors du ramasse-miettes : leurs pages ne sont pas recopiées
+        return [_lancer_processus(sock, limite_ollama) for _ in range(workers)]
+
+    arret = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: arret.append(signum))
+    signal.signal(signal.SIGINT, lambda signum, frame: arret.append(signum))
+
+    enfants = lancer()
+    print(f"Service du chatbot sur http://{hote}:{port} ({workers} processus)")
+    version, prochaine = store.version, time.monotonic() + intervalle
+    while not arret:
+        time.sleep(1)
+        # Processus terminés : anciens processus arrêtés, ou processus courant à remplacer
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid == 0:
+                break
+            if pid in enfants and not arret:
+                enfants[enfants.index(pid)] = _lancer_processus(sock, limite_ollama)
+        if time.monotonic() >= prochaine:
+            tableau_bord.actualiser()  # seul écrivain du dossier de cache
+            prochaine = time.monotonic() + intervalle
+            if store.version != version:
+                version = store.version
+                anciens, enfants = enfants, lancer()
+                _signaler(anciens)
+
+    _signaler(enfants)
+    while True:
+        try:
+            os.waitpid(-1, 0)
+        except ChildProcessError:
+            break
+    sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service HTTP JSON du chatbot.")
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processus uvicorn (1 par défaut ; plusieurs : fork, données partagées)")
+    args = parser.parse_args(argv)
+    servir(args.hote, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,63 +1,50 @@
 import pandas as pd
-import os
-import glob
+from data_store import store  # historique de stock déjà chargé et indexé
+from series_stock import series_stock  # même historique, en séries triées par (produit, site)
+from rendu import formater_lignes
 
-# Chargement dynamique des fichiers de stock
+def _enregistrements(df):
+    """Lignes sous forme de dictionnaires, avec la colonne Date affichée sans heure."""
+    return df.assign(Date=df['Date'].dt.date).to_dict(orient="records")
 
-DATA_DIR = "data"
-stock_files = glob.glob(os.path.join(DATA_DIR, "stock_*.csv"))
-
-# Fusionner tous les fichiers de stock dans un seul DataFrame
-stocks_df_list = []
-for f in stock_files:
-    df = pd.read_csv(f)
-    stocks_df_list.append(df)
-
-if stocks_df_list:
-    stocks_df = pd.concat(stocks_df_list, ignore_index=True)
-else:
-    stocks_df = pd.DataFrame()
-    print("⚠ Aucun fichier de stock trouvé !")
 # ------
 def get_stock_produit(ref, date=None):
     """
     Retourne toutes les infos de stock pour un produit donné.
-    Si 'date' est fournie, filtre sur cette date.
+    Si 'date' est fournie, dernier relevé à cette date ou avant (même sans fichier ce jour-là).
     """
-    df = stocks_df[stocks_df['Référence_Produit'].str.upper() == ref.upper()]
-    if date:
-        df = df[df['Date'] == date]
+    df = series_stock.lignes(ref, date or None)
 
     if df.empty:
         return f"❌ Aucune donnée trouvée pour le produit {ref}."
-    return df.to_dict(orient="records")
+    return _enregistrements(df)
 
 # ---- Stock Initial & Final ----
 
-def get_stock_initial(ref, date=None):
+def get_stock_initial(ref, date=None, site=None):
     """
-    Retourne le stock initial d’un produit à une date donnée (ou toutes les dates si None).
+    Retourne le stock initial d’un produit à une date donnée (ou toutes les dates si None),
+    sur un seul site si 'site' est fourni.
+    Sans fichier à cette date, le dernier relevé antérieur fait foi.
     """
-    df = stocks_df[stocks_df['Référence_Produit'].str.upper() == ref.upper()]
-    if date:
-        df = df[df['Date'] == date]
+    df = series_stock.lignes(ref, date or None, site=site)
 
     if df.empty:
         return f"❌ Pas de stock initial pour {ref}."
-    return df[['Date', 'Stock_Initial']].to_dict(orient="records")
+    return _enregistrements(df[['Date', 'Stock_Initial']])
 
 
-def get_stock_final(ref, date=None):
+def get_stock_final(ref, date=None, site=None):
     """
-    Retourne le stock final d’un produit à une date donnée (ou toutes les dates si None).
+    Retourne le stock final d’un produit à une date donnée (ou toutes les dates si None),
+    sur un seul site si 'site' est fourni.
+    Sans fichier à cette date, le dernier relevé antérieur fait foi.
     """
-    df = stocks_df[stocks_df['Référence_Produit'].str.upper() == ref.upper()]
-    if date:
-        df = df[df['Date'] == date]
+    df = series_stock.lignes(ref, date or None, site=site)
 
     if df.empty:
         return f"❌ Pas de stock final pour {ref}."
-    return df[['Date', 'Stock_Final']].to_dict(orient="records")
+    return _enregistrements(df[['Date', 'Stock_Final']])
 
 # ---- Statut ----
 
@@ -65,102 +52,63 @@ def get_statut_stock(ref, date=None):
     """
     Retourne le statut (OK, URGENT, RUPTURE) d’un produit.
     """
-    df = stocks_df[stocks_df['Référence_Produit'].str.upper() == ref.upper()]
-    if date:
-        df = df[df['Date'] == date]
+    df = series_stock.lignes(ref, date or None)
 
     if df.empty:
         return f"❌ Pas de statut trouvé pour {ref}."
-    return df[['Date', 'Statut']].to_dict(orient="records")
+    return _enregistrements(df[['Date', 'Statut']])
 # ---- Site ----
 
 def get_stock_site(site_name, date=None):
     """
     Retourne tous les produits et leurs stocks d’un site donné.
     """
-    df = stocks_df[stocks_df['Site'].str.lower() == site_name.lower()]
-    if date:
-        df = df[df['Date'] == date]
+    df = store.lignes("stock", {"Site": site_name, "Date": date or None})
 
     if df.empty:
         return f"❌ Aucun produit trouvé pour le site {site_name}."
-    return df.to_dict(orient="records")
+    return _enregistrements(df)
 
 
 def get_stock_produit_site(ref, site_name, date=None):
     """
     Retourne les infos de stock d’un produit précis dans un site donné.
     """
-    df = stocks_df[
-        (stocks_df['Référence_Produit'].str.upper() == ref.upper()) &
-        (stocks_df['Site'].str.lower() == site_name.lower())
-    ]
-    if date:
-        df = df[df['Date'] == date]
+    df = series_stock.lignes(ref, date or None, site=site_name)
 
     if df.empty:
         return f"❌ Pas de stock trouvé pour {ref} dans {site_name}."
-    return df.to_dict(orient="records")
+    return _enregistrements(df)
 
 # ---- Produits par statut ----
 
-def produits_en_rupture(date=None):
-    df = stocks_df[stocks_df['Statut'] == "RUPTURE"]
-    if date:
-        df = df[df['Date'] == date]
+def produits_en_rupture(date=None, page=1):
+    df = store.lignes("stock", {"Date": date or None})
+    df = df[df['Statut'] == "RUPTURE"]
     if df.empty:
         return "✅ Aucun produit en rupture."
-    ruptures = df[['Référence_Produit', 'Site', 'Date']].to_dict(orient="records")
-    lignes = []
-    for r in ruptures:
-        lignes.append(f"📦 {r['Référence_Produit']} | 📍 {r['Site']} | 📅 {r['Date']}")
+    return formater_lignes(df, "📦 {Référence_Produit} | 📍 {Site} | 📅 {Date}", page)
 
-    return "\n".join(lignes)
-
-def produits_urgents(date=None):
-    df = stocks_df[stocks_df['Statut'] == "URGENT"]
-    if date:
-        df = df[df['Date'] == date]
+def produits_urgents(date=None, page=1):
+    df = store.lignes("stock", {"Date": date or None})
+    df = df[df['Statut'] == "URGENT"]
     if df.empty:
         return "✅ Aucun produit en URGENT."
-    urgents = df[['Référence_Produit', 'Site', 'Date']].to_dict(orient="records")
     # Formater en liste lisible
-    lignes = []
-    for u in urgents:
-        lignes.append(f"⚡ {u['Référence_Produit']} | 📍 {u['Site']} | 📅 {u['Date']}")
-
-    return "\n".join(lignes)
+    return formater_lignes(df, "⚡ {Référence_Produit} | 📍 {Site} | 📅 {Date}", page)
     
 # ---- Evolution ----
 
-def evolution_stock(ref):
+def evolution_stock(ref, page=1):
     """
     Retourne l’évolution du stock final d’un produit sur toutes les dates disponibles.
     """
-    df = stocks_df[stocks_df['Référence_Produit'].str.upper() == ref.upper()]
+    df = series_stock.lignes(ref)
     if df.empty:
         return f"❌ Pas d’historique pour le produit {ref}."
-    historique = df[['Date', 'Stock_Initial', 'Stock_Final', 'Statut']].to_dict(orient="records")
     # Formatage lisible
-    lignes = []
-    for h in historique:
-        lignes.append(
-            f"📅 {h['Date']} | 📦 Stock Initial: {h['Stock_Initial']} | 🔻 Stock Final: {h['Stock_Final']} | 📊 Statut: {h['Statut']}"
-        )
-    return "\n".join(lignes)
-# Ajoutez cette méthode pour formater les résultats du stock
-def _format_stock_result(self, result):
-    """Formate les résultats complexes du stock pour l'affichage"""
-    if isinstance(result, str):
-        return result
-    elif isinstance(result, list) and result:
-        if len(result) == 1:
-            # Retourne juste la valeur si un seul élément
-            item = result[0]
-            if 'Stock_Initial' in item:
-                return item['Stock_Initial']
-            elif 'Stock_Final' in item:
-                return item['Stock_Final']
-        return f"{len(result)} enregistrement(s) trouvé(s)"
-    return "Aucune donnée disponible"
-    
\ No newline at end of file
+    return formater_lignes(
+        df,
+        "📅 {Date} | 📦 Stock Initial: {Stock_Initial} | 🔻 Stock Final: {Stock_Final} | 📊 Statut: {Statut}",
+        page,
+    )
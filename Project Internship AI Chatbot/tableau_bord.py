@@ -0,0 +1,124 @@
+# ----------------------------
+# Fichier : tableau_bord.py
+# Description : Instantané des KPI du tableau de bord, recalculé en arrière-plan
+#               à l'ingestion de nouveaux fichiers journaliers (jamais à l'affichage)
+# ----------------------------
+
+from datetime import date
+import threading
+import time
+from data_store import store
+from kpi import (
+    commandes_clients_ce_mois, commandes_fournisseurs_ce_mois, kpi_du_jour, stock_total_ce_mois,
+    taux_livraison, valeur_stock,
+)
+from traces import etape
+
+# Vérification des nouveaux fichiers par le thread d'arrière-plan (secondes)
+INTERVALLE_ACTUALISATION = 30
+
+# Séries affichées en graphique : indicateur -> libellé
+SERIES = {"valeur_stock": "Valeur du stock (MAD)", "taux_livraison": "Taux de livraison à temps (%)"}
+
+
+# ----------------------------
+# 1️⃣ Calcul de l'instantané
+# ----------------------------
+def calculer_instantane(data_store=store):
+    """
+    Tous les KPI du tableau de bord en un seul passage : ceux du dernier jour
+    (table précalculée), ceux du mois en cours et les séries par date.
+    """
+    # Un seul état lu (version, tables et KPI cohérents) : une ingestion pendant le calcul
+    # publie une nouvelle version, qui relancera l'actualisation
+    donnees = data_store.etat()
+    version, kpi = donnees.version, donnees.kpi_journalier
+    dernier_jour = kpi.index.max().date() if not kpi.empty else None
+    du_jour = kpi_du_jour(dernier_jour) if dernier_jour else kpi_du_jour()
+    return {
+        "version": version,
+        "mois": date.today().replace(day=1),
+        "calcule_le": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "dernier_jour": dernier_jour,
+        "valeur_stock_jour": du_jour["valeur_stock"],
+        "nb_ruptures": du_jour["nb_ruptures"],
+        "nb_reappro": du_jour["nb_reappro"],
+        "nb_commandes_retard": du_jour["nb_commandes_retard"],
+        # Mêmes valeurs que les réponses du chat
+        "valeur_stock": valeur_stock(),
+        "taux_livraison": taux_livraison(),
+        "stock_total_ce_mois": stock_total_ce_mois(donnees.stock),
+        "commandes_clients_ce_mois": commandes_clients_ce_mois(donnees.commandes),
+        "commandes_fournisseurs_ce_mois": commandes_fournisseurs_ce_mois(donnees.commandes),
+        "series": kpi.reindex(columns=list(SERIES)).rename(columns=SERIES),
+    }
+
+
+# ----------------------------
+# 2️⃣ Actualisation en arrière-plan
+# ----------------------------
+class TableauDeBord:
+    """
+    Garde le dernier instantané des KPI, partagé par toutes les sessions. Un thread
+    démon vérifie les fichiers toutes les `intervalle` secondes et ne recalcule que si
+    la version des données (ou le mois) a changé ; l'instantané est remplacé d'un bloc,
+    les lecteurs voient donc toujours un état complet.
+    """
+
+    def __init__(self, data_store=store, intervalle=INTERVALLE_ACTUALISATION):
+        self.store = data_store
+        self.intervalle = intervalle
+        self._instantane = None
+        self._thread = None
+        self._verrou = threading.Lock()
+        self._arret = threading.Event()
+
+    def demarrer(self):
+        """Lance le thread d'actualisation (une seule fois par processus)."""
+        with self._verrou:
+            if self._thread is None or not self._thread.is_alive():
+                self._arret.clear()
+                self._thread = threading.Thread(target=self._boucle, name="tableau-de-bord", daemon=True)
+                self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+
+    def _boucle(self):
+        while not self._arret.is_set():
+            self.actualiser()
+            self._arret.wait(self.intervalle)
+
+    def actualiser(self):
+        """
+        Un passage du thread : nouveaux fichiers ingérés, instantané recalculé s'il
+        n'est plus à jour (appelé directement par le processus parent du service).
+        """
+        try:
+            self.store.actualiser_si_necessaire()
+            if not self.a_jour():
+                self._instantane = calculer_instantane(self.store)
+        except Exception as e:
+            print(f"Erreur actualisation tableau de bord: {e}")
+
+    def a_jour(self, instantane=None):
+        """Vrai si l'instantané correspond aux données chargées et au mois en cours."""
+        instantane = instantane or self._instantane
+        return (instantane is not None and instantane["version"] == self.store.version
+                and instantane["mois"] == date.today().replace(day=1))
+
+    def instantane(self):
+        """Dernier instantané calculé (None tant que le premier calcul n'est pas terminé)."""
+        return self._instantane
+
+    def valeur(self, cle, calcul):
+        """KPI de l'instantané s'il est à jour ; sinon `calcul()` pour ce seul KPI."""
+        instantane = self._instantane
+        if self.a_jour(instantane):
+            return instantane[cle]
+        with etape("kpi_recalcul"):
+            return calcul()
+
+
+# Instance unique partagée (comme le DataStore)
+tableau_bord = TableauDeBord()
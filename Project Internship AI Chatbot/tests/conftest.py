@@ -0,0 +1,65 @@
+# ----------------------------
+# Fichier : tests/conftest.py
+# Description : Environnement des tests : les modules du chatbot chargent le DataStore partagé
+#               à l'import (dossier data/ du dossier courant) ; les CSV de tests/donnees sont
+#               copiés dans un dossier de travail temporaire avant tout import
+# Usage : python -m pytest -q   (depuis le dossier du chatbot)
+# ----------------------------
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import pandas as pd
+import pytest
+
+DOSSIER_TESTS = os.path.dirname(os.path.abspath(__file__))
+DONNEES = os.path.join(DOSSIER_TESTS, "donnees")
+
+sys.path.insert(0, os.path.dirname(DOSSIER_TESTS))
+os.environ["CHATBOT_TRACES"] = "0"  # aucune mesure écrite pendant les tests
+
+# Dossier de travail du magasin partagé (store) : data/ = tests/donnees, cache/ vide
+_TRAVAIL = tempfile.mkdtemp(prefix="chatbot-tests-")
+shutil.copytree(DONNEES, os.path.join(_TRAVAIL, "data"))
+os.chdir(_TRAVAIL)
+atexit.register(shutil.rmtree, _TRAVAIL, ignore_errors=True)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Mesures (tests/test_performances.py) exécutées une seule fois sans chronométrage dans
+    # la suite ordinaire ; chronométrées avec --benchmark-only ou --benchmark-enable
+    if not config.pluginmanager.hasplugin("benchmark"):
+        return
+    if not config.getoption("benchmark_only"):
+        config.option.benchmark_disable = True
+    # Passages enregistrés dans le dossier du chatbot, pas dans le dossier de travail temporaire
+    if config.getoption("benchmark_storage") == "file://./.benchmarks":
+        config.option.benchmark_storage = "file://" + os.path.join(os.path.dirname(DOSSIER_TESTS), ".benchmarks")
+
+
+@pytest.fixture
+def dossiers(tmp_path):
+    """(data_dir, cache_dir) neufs pour un DataStore propre au test (CSV de tests/donnees)."""
+    data_dir = tmp_path / "data"
+    shutil.copytree(DONNEES, data_dir)
+    return str(data_dir), str(tmp_path / "cache")
+
+
+def ecrire_stock(data_dir, jour, lignes):
+    """Ajoute un fichier stock_<jour>.csv : lignes (référence, site, stock initial, stock final, statut)."""
+    df = pd.DataFrame(lignes, columns=["Référence_Produit", "Site", "Stock_Initial", "Stock_Final", "Statut"])
+    df.insert(0, "Date", jour)
+    df["Entrées"] = 0
+    df["Sorties"] = df["Stock_Initial"] - df["Stock_Final"]
+    chemin = os.path.join(data_dir, f"stock_{jour}.csv")
+    df.to_csv(chemin, index=False)
+    return chemin
+
+
+def trier(df):
+    """Lignes dans un ordre indépendant de l'ordre d'ingestion, pour comparer deux chargements."""
+    cles = [col for col in ("Date", "Référence_Produit", "Site", "Num_Commande") if col in df.columns]
+    return df.sort_values(cles, key=lambda serie: serie.astype(str), ignore_index=True)
@@ -0,0 +1,109 @@
+# ----------------------------
+# Fichier : tests/test_ingestion.py
+# Description : Manifeste des fichiers ingérés, ingestion incrémentale comparée à une lecture
+#               complète, redémarrage sur l'historique Feather, extension des catégories
+# ----------------------------
+
+import os
+import pandas as pd
+import pytest
+import data_store
+import ingestion
+from conftest import ecrire_stock, trier
+from data_store import DataStore
+
+
+def test_manifeste_enregistre_chaque_fichier(dossiers):
+    store = DataStore(*dossiers)
+    fichiers = store.manifeste.fichiers
+    assert sorted(fichiers) == ["commandes_2025-01-01.csv", "commandes_2025-01-03.csv",
+                                "stock_2025-01-01.csv", "stock_2025-01-03.csv"]
+    assert store.manifeste.lignes("stock") == len(store.stock) == 7
+    assert store.manifeste.lignes("commandes") == len(store.commandes) == 5
+    assert os.path.exists(os.path.join(dossiers[1], ingestion.MANIFESTE_FILE))
+
+
+def test_ingestion_incrementale_egale_lecture_complete(dossiers, tmp_path):
+    data_dir, cache_dir = dossiers
+    store = DataStore(data_dir, cache_dir)
+    version = store.version
+    ecrire_stock(data_dir, "2025-01-04", [("P001", "Entrepot_A", 90, 70, "OK"),
+                                          ("P005", "Entrepot_D", 0, 12, "URGENT")])
+
+    assert store.actualiser() == ["stock_2025-01-04.csv"]
+    assert store.version == version + 1
+    assert store.actualiser() == []  # rien de nouveau : même version
+    assert store.version == version + 1
+
+    complet = DataStore(data_dir, str(tmp_path / "autre_cache"))
+    attendu = trier(complet.stock)
+    obtenu = trier(store.stock)
+    assert obtenu.dtypes.to_dict() == attendu.dtypes.to_dict()
+    pd.testing.assert_frame_equal(obtenu, attendu, check_categorical=False)
+    # Catégories de l'historique conservées, nouvelles valeurs ajoutées à la suite
+    assert list(store.stock["Site"].cat.categories) == ["Entrepot_A", "Entrepot_B", "Entrepot_C", "Entrepot_D"]
+    assert len(store.positions("stock", "Référence_Produit", "P005")) == 1
+
+
+def test_fichier_modifie_relit_toute_la_table(dossiers, tmp_path):
+    data_dir, cache_dir = dossiers
+    store = DataStore(data_dir, cache_dir)
+    ecrire_stock(data_dir, "2025-01-03", [("P001", "Entrepot_A", 110, 100, "OK")])
+
+    store.actualiser()
+    assert len(store.stock) == 5
+    pd.testing.assert_frame_equal(trier(store.stock), trier(DataStore(data_dir, str(tmp_path / "c")).stock),
+                                  check_categorical=False)
+
+
+def test_redemarrage_relit_l_historique_sans_csv(dossiers, monkeypatch):
+    pytest.importorskip("pyarrow")
+    premier = DataStore(*dossiers)
+
+    def interdit(*args, **kwargs):
+        raise AssertionError("CSV relu au redémarrage")
+
+    monkeypatch.setattr(data_store, "lire_fichiers_journaliers", interdit)
+    second = DataStore(*dossiers)
+    for table in ingestion.TABLES_JOURNALIERES:
+        pd.testing.assert_frame_equal(second.table(table), premier.table(table))
+
+
+def test_ajout_ecrit_un_seul_fragment(dossiers):
+    pytest.importorskip("pyarrow")
+    data_dir, cache_dir = dossiers
+    store = DataStore(data_dir, cache_dir)
+    dossier_stock = ingestion.chemin_consolide(cache_dir, "stock")
+    avant = sorted(os.listdir(dossier_stock))
+    ecrire_stock(data_dir, "2025-01-04", [("P002", "Entrepot_A", 80, 75, "OK")])
+
+    store.actualiser()
+    apres = sorted(os.listdir(dossier_stock))
+    assert apres[:len(avant)] == avant and len(apres) == len(avant) + 1
+    assert len(ingestion.lire_consolide(cache_dir, "stock")) == len(store.stock) == 8
+
+
+def test_historique_incoherent_reconstruit(dossiers):
+    pytest.importorskip("pyarrow")
+    data_dir, cache_dir = dossiers
+    attendu = DataStore(data_dir, cache_dir).stock
+    ecrire_stock(data_dir, "2025-01-04", [("P002", "Entrepot_A", 80, 75, "OK")])
+    DataStore(data_dir, cache_dir)
+    # Fragment perdu : historique plus court que le manifeste
+    dossier_stock = ingestion.chemin_consolide(cache_dir, "stock")
+    os.remove(os.path.join(dossier_stock, sorted(os.listdir(dossier_stock))[-1]))
+
+    store = DataStore(data_dir, cache_dir)
+    assert len(store.stock) == len(attendu) + 1
+    assert store.manifeste.lignes("stock") == len(store.stock)
+
+
+def test_prolonger_table_sans_modifier_l_historique():
+    ancien = ingestion.typer_table(pd.DataFrame({"Site": ["B", "A"], "Stock_Final": [1, 2]}))
+    ajout = ingestion.typer_table(pd.DataFrame({"Site": ["C", "A"], "Stock_Final": [3, 4]}))
+
+    complet = ingestion.prolonger_table(ancien, ajout)
+    assert list(complet["Site"].cat.categories) == ["A", "B", "C"]
+    assert complet["Site"].tolist() == ["B", "A", "C", "A"]
+    assert complet["Stock_Final"].dtype == "int32"
+    assert list(ancien["Site"].cat.categories) == ["A", "B"] and len(ancien) == 2
@@ -0,0 +1,27 @@
+# ----------------------------
+# Fichier : tests/test_lecture_parallele.py
+# Description : Lecture des fichiers journaliers en parallèle (pyarrow, plusieurs processus)
+#               identique à la lecture séquentielle
+# ----------------------------
+
+import os
+import pandas as pd
+import pytest
+import ingestion
+from conftest import ecrire_stock
+
+
+def test_lecture_parallele_identique(dossiers, monkeypatch):
+    pytest.importorskip("pyarrow")
+    data_dir, _ = dossiers
+    for jour in range(4, 10):
+        ecrire_stock(data_dir, f"2025-01-{jour:02d}", [("P001", "Entrepot_A", 90, 90 - jour, "OK"),
+                                                      ("P00" + str(jour % 3 + 1), "Entrepot_B", 10, 0, "RUPTURE")])
+    chemins = [os.path.join(data_dir, nom) for nom in ingestion.lister_fichiers(data_dir, "stock")]
+
+    sequentiel, lignes_seq = ingestion.lire_fichiers_journaliers(chemins, "stock", processus=1)
+    monkeypatch.setattr(ingestion, "SEUIL_LECTURE_PARALLELE", 2)
+    parallele, lignes_par = ingestion.lire_fichiers_journaliers(chemins, "stock", processus=2)
+
+    assert lignes_par == lignes_seq == [4, 3] + [2] * 6
+    pd.testing.assert_frame_equal(parallele, sequentiel)
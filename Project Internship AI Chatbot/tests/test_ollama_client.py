@@ -0,0 +1,62 @@
+# ----------------------------
+# Fichier : tests/test_ollama_client.py
+# Description : Flux Ollama synchrone et asyncio sur le même client : même limite de
+#               générations simultanées, mêmes métriques, place libérée à l'abandon
+# ----------------------------
+
+import asyncio
+import threading
+import pytest
+from ollama_client import ClientOllama, DelaiDepasse
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = ClientOllama(max_en_vol=1)
+    fragments = [{"response": "A", "done": False}, {"response": "B", "done": False}, {"response": "", "done": True}]
+
+    def flux(payload, url, annulation, timeout, echeance):
+        for morceau in fragments:
+            if annulation is not None and annulation.is_set():
+                return
+            yield morceau
+
+    monkeypatch.setattr(client, "_flux", flux)
+    return client
+
+
+def test_flux_async_identique_au_flux(client):
+    async def lire():
+        return [m async for m in client.generer_flux_async({"prompt": "q"})]
+
+    assert asyncio.run(lire()) == list(client.generer_flux({"prompt": "q"}))
+    metriques = client.metriques.instantane()
+    assert (metriques["total"], metriques["en_vol"]) == (2, 0)
+
+
+def test_limite_partagee(client):
+    occupe = client.generer_flux({"prompt": "q"})
+    next(occupe)  # la seule place est prise par un appel synchrone
+
+    async def lire():
+        return [m async for m in client.generer_flux_async({"prompt": "q"}, delai_max=0.2)]
+
+    with pytest.raises(DelaiDepasse):
+        asyncio.run(lire())
+    occupe.close()
+    assert asyncio.run(lire())[-1]["done"]
+
+
+def test_abandon_libere_la_place(client):
+    annulation = threading.Event()
+
+    async def premier():
+        async with asyncio.timeout(5):
+            flux = client.generer_flux_async({"prompt": "q"}, annulation=annulation)
+            morceau = await anext(flux)
+            await flux.aclose()
+            return morceau
+
+    assert asyncio.run(premier())["response"] == "A"
+    assert annulation.is_set()
+    assert client._places.acquire(timeout=2)
@@ -0,0 +1,123 @@
+# ----------------------------
+# Fichier : tests/test_performances.py
+# Description : Mesures des chemins critiques (pytest-benchmark) sur les données des tests :
+#               chargement, chaque KPI, chaque fonction de recherche, routage et réponse
+#               de bout en bout (FAQBot.ask et ask_lot, sans appel à Ollama)
+# Usage : python -m pytest tests/test_performances.py --benchmark-only --benchmark-autosave
+#         puis, pour comparer au dernier passage enregistré (échec si le médian régresse) :
+#         python -m pytest tests/test_performances.py --benchmark-only --benchmark-compare
+#               --benchmark-compare-fail=median:25%
+#         (suite ordinaire : chaque mesure exécutée une fois, sans chronométrage)
+# ----------------------------
+
+import shutil
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import commandes_utils
+import faqbot
+import kpi
+import produits_utils
+import stock_utils
+from cache_reponses import CacheReponses
+from data_store import DataStore, store
+from requetes import analyser_requete
+from series_stock import series_stock
+from test_routeur import QUESTIONS
+
+JOUR = store.stock["Date"].max().date()
+REF, SITE, COMMANDE = "P001", "Entrepot_A", "F001"
+
+CAS = {
+    # KPI
+    "kpi.valeur_stock": lambda: kpi.valeur_stock(),
+    "kpi.valeur_stock(date)": lambda: kpi.valeur_stock(JOUR),
+    "kpi.produits_en_rupture": lambda: kpi.produits_en_rupture(),
+    "kpi.taux_livraison": lambda: kpi.taux_livraison(),
+    "kpi.commandes_en_retard": lambda: kpi.commandes_en_retard(),
+    "kpi.produits_a_reapprovisionner(date)": lambda: kpi.produits_a_reapprovisionner(JOUR),
+    "kpi.commandes_clients_ce_mois": lambda: kpi.commandes_clients_ce_mois(store.commandes),
+    "kpi.commandes_fournisseurs_ce_mois": lambda: kpi.commandes_fournisseurs_ce_mois(store.commandes),
+    "kpi.stock_total_ce_mois": lambda: kpi.stock_total_ce_mois(store.stock),
+    "kpi.stock_total_produit": lambda: kpi.stock_total_produit(REF, store.stock),
+    "kpi.kpi_du_jour(date)": lambda: kpi.kpi_du_jour(JOUR),
+    "kpi.evolution_kpi": lambda: kpi.evolution_kpi("valeur_stock"),
+    # Recherches stock
+    "stock.get_stock_produit": lambda: stock_utils.get_stock_produit(REF),
+    "stock.get_stock_initial(date)": lambda: stock_utils.get_stock_initial(REF, JOUR),
+    "stock.get_stock_final(date)": lambda: stock_utils.get_stock_final(REF, JOUR),
+    "stock.get_statut_stock": lambda: stock_utils.get_statut_stock(REF),
+    "stock.get_stock_site(date)": lambda: stock_utils.get_stock_site(SITE, JOUR),
+    "stock.get_stock_produit_site": lambda: stock_utils.get_stock_produit_site(REF, SITE),
+    "stock.produits_urgents(date)": lambda: stock_utils.produits_urgents(JOUR),
+    "stock.evolution_stock": lambda: stock_utils.evolution_stock(REF),
+    "series.total_au": lambda: series_stock.total_au(JOUR),
+    # Recherches commandes
+    "commandes.get_commande_info": lambda: commandes_utils.get_commande_info(COMMANDE),
+    "commandes.get_statut_commande": lambda: commandes_utils.get_statut_commande(COMMANDE),
+    "commandes.commandes_en_retard": lambda: commandes_utils.commandes_en_retard(),
+    "commandes.lister_commandes_par_produit": lambda: commandes_utils.lister_commandes_par_produit(REF),
+    "commandes.lister_commandes_par_type": lambda: commandes_utils.lister_commandes_par_type("Client"),
+    # Recherches produits
+    "produits.get_produit_info": lambda: produits_utils.get_produit_info(REF),
+    "produits.list_produits_par_famille": lambda: produits_utils.list_produits_par_famille("Câble"),
+    "produits.produit_plus_cher": lambda: produits_utils.produit_plus_cher(),
+}
+
+
+@pytest.fixture(scope="module")
+def bot():
+    # Ollama remplacé par une réponse fixe ; cache en mémoire seulement
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(faqbot, "generer_flux", lambda *a, **k: iter([{"response": "Analyse.", "done": True}]))
+        yield faqbot.FAQBot(cache=CacheReponses(persistant=False))
+
+
+@pytest.fixture(scope="module")
+def questions(bot):
+    """Questions du corpus traitées sans LLM (intention reconnue ou requête structurée)."""
+    retenues = []
+    for question, _ in QUESTIONS:
+        route = bot.routeur.analyser(question)
+        if route["intention"] not in (None, "analytique") or analyser_requete(question, route):
+            retenues.append(question)
+    return retenues
+
+
+@pytest.mark.parametrize("nom", list(CAS))
+def test_recherche(benchmark, nom):
+    fonction = CAS[nom]
+    fonction()  # premier appel hors mesure (structures construites à la demande)
+    benchmark.group = nom.split(".")[0]
+    benchmark(fonction)
+
+
+@pytest.mark.benchmark(group="bout en bout")
+def test_routeur_corpus(benchmark, bot, questions):
+    benchmark(lambda: [bot.routeur.analyser(q) for q in questions])
+
+
+@pytest.mark.benchmark(group="bout en bout")
+def test_ask_corpus(benchmark, bot, questions):
+    benchmark(lambda: [bot.ask(q) for q in questions])
+
+
+@pytest.mark.benchmark(group="bout en bout")
+def test_ask_lot_corpus(benchmark, bot, questions):
+    bot.ask_lot(questions)
+    benchmark(bot.ask_lot, questions)
+
+
+@pytest.mark.benchmark(group="chargement")
+def test_chargement_a_froid(benchmark, dossiers):
+    data_dir, cache_dir = dossiers
+    # Cache vidé avant chaque passage : CSV lus et consolidés
+    benchmark.pedantic(DataStore, args=(data_dir, cache_dir), rounds=5,
+                       setup=lambda: shutil.rmtree(cache_dir, ignore_errors=True))
+
+
+@pytest.mark.benchmark(group="chargement")
+def test_chargement_a_chaud(benchmark, dossiers):
+    DataStore(*dossiers)
+    benchmark(DataStore, *dossiers)
@@ -0,0 +1,64 @@
+# ----------------------------
+# Fichier : tests/test_reponses_lot.py
+# Description : FAQBot.ask_lot donne, question par question, les mêmes réponses que FAQBot.ask
+#               (questions en texte, tuples (intention, entités), doublons)
+# ----------------------------
+
+import pytest
+import faqbot
+from cache_reponses import CacheReponses
+
+MODELES = [
+    "Quel est le stock final du produit {ref}{site}{date} ?", "stock initial de {ref}{site}{date}",
+    "Quel est le fournisseur principal de {ref} ?", "famille du produit {ref}", "coût unitaire de {ref}",
+    "délai de livraison de {ref}", "seuil de réappro de {ref}", "poids unitaire de {ref}",
+    "stock total du produit {ref}{date}", "évolution du stock de {ref}", "commandes du produit {ref}",
+]
+MODELES_COMMANDE = [
+    "statut de la commande {num}", "quantité de la commande {num}", "contrepartie de la commande {num}",
+    "livraison prévue de la commande {num}", "livraison réelle de {num}", "type de la commande {num}",
+]
+AUTRES = ["stock total par site", "valeur du stock", "produits en rupture", "commandes en retard",
+          "top 2 produits par stock", "liste des familles", "Bonjour", "comment réduire les ruptures ?"]
+
+QUESTIONS = sorted({
+    modele.format(ref=ref, site=site, date=jour)
+    for modele in MODELES for ref in ("P001", "P004", "P999")
+    for site in ("", " à Entrepot_A", " sur le site Entrepot_B") for jour in ("", " le 02/01/2025", " le 2025-01-03")
+} | {modele.format(num=num) for modele in MODELES_COMMANDE for num in ("C001", "F001", "X999")}) + AUTRES
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    # Ollama remplacé par une réponse fixe ; cache en mémoire seulement
+    monkeypatch.setattr(faqbot, "generer_flux", lambda *a, **k: iter([{"response": "Analyse.", "done": True}]))
+    return faqbot.FAQBot(cache=CacheReponses(persistant=False))
+
+
+def test_lot_identique_a_ask(bot):
+    attendu = [bot.ask(question) for question in QUESTIONS]
+    assert bot.ask_lot(QUESTIONS) == attendu
+
+
+def test_tuples_et_doublons(bot):
+    elements = [
+        ("stock_final", {"ref": "p001", "date": "2025-01-02", "site": "Entrepot_B"}),
+        "Quel est le stock final du produit P001 sur le site Entrepot_B le 02/01/2025 ?",
+        ("statut_commande", {"num": "F001"}),
+        "statut de la commande F001",
+        "statut de la commande F001",
+        ("valeur_stock", {}),
+    ]
+    reponses = bot.ask_lot(elements)
+    assert reponses[0] == reponses[1] == bot.ask(elements[1])
+    # Site sans relevé ce jour-là : dernier relevé connu (01/01)
+    assert "'Stock_Final': 30" in reponses[0]
+    assert reponses[2] == reponses[3] == reponses[4] == bot.ask("statut de la commande F001")
+    assert reponses[5] == bot.ask("valeur du stock")
+
+
+def test_element_invalide(bot):
+    with pytest.raises(ValueError):
+        bot.ask_lot([("intention_inconnue", {})])
+    with pytest.raises(ValueError):
+        bot.ask_lot([("stock_final", {})])
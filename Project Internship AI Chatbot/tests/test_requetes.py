@@ -0,0 +1,66 @@
+# ----------------------------
+# Fichier : tests/test_requetes.py
+# Description : Requêtes structurées (filtre, regroupement, top N, jointure produits),
+#               sélection vide, et priorité des requêtes sur les intentions du routeur
+# ----------------------------
+
+from datetime import date
+import pytest
+from data_store import DataStore
+from requetes import analyser_requete, executer_requete, repondre_requete
+from routeur import Routeur
+
+
+@pytest.fixture
+def magasin(dossiers):
+    return DataStore(*dossiers)
+
+
+def _requete(store, question):
+    return analyser_requete(question, Routeur(store).analyser(question))
+
+
+def test_somme_a_une_date(magasin):
+    requete = {"table": "stock", "colonne": "Stock_Final", "agregat": "somme",
+               "filtres": {"Date": date(2025, 1, 1)}, "groupe": []}
+    assert executer_requete(requete, magasin) == 110 + 30 + 0 + 150
+
+
+def test_regroupement_par_site_a_la_derniere_date(magasin):
+    requete = _requete(magasin, "stock total par site")
+    assert requete["groupe"] == ["Site"] and requete["prioritaire"]
+    resultat = executer_requete(requete, magasin)
+    assert requete["date_implicite"] == date(2025, 1, 3)
+    assert dict(zip(resultat["Site"].astype(str), resultat["valeur"])) == {"Entrepot_A": 170, "Entrepot_C": 20}
+
+
+def test_jointure_famille_et_valeur(magasin):
+    requete = {"table": "stock", "colonne": "Valeur", "agregat": "somme",
+               "filtres": {"Date": date(2025, 1, 3), "Famille": "Câble"}, "groupe": []}
+    assert executer_requete(requete, magasin) == round(90 * 5.5 + 20 * 0.5, 2)
+
+
+def test_top_produits(magasin):
+    requete = _requete(magasin, "top 2 produits par stock le 01/01/2025")
+    resultat = executer_requete(requete, magasin)
+    assert resultat["Référence_Produit"].astype(str).tolist() == ["P003", "P001"]
+
+
+def test_selection_vide(magasin):
+    requete = _requete(magasin, "stock total du site Entrepot_C le 01/01/2025")
+    assert executer_requete(requete, magasin) is None
+    assert repondre_requete(requete, data_store=magasin).endswith(": aucune donnée.")
+    comptage = dict(requete, agregat="compte", colonne=None)
+    assert executer_requete(comptage, magasin) == 0
+
+
+def test_site_d_un_produit_laisse_au_gestionnaire(magasin):
+    # Stock d'un produit sur un site : lu au dernier relevé connu par le gestionnaire, pas par la requête
+    requete = _requete(magasin, "stock final du produit P001 à Entrepot_B le 02/01/2025")
+    assert requete is not None and not requete["prioritaire"]
+    assert _requete(magasin, "stock total du site Entrepot_B")["prioritaire"]
+    assert _requete(magasin, "stock total de la famille Câble")["prioritaire"]
+
+
+def test_questions_ouvertes_pour_le_llm(magasin):
+    assert _requete(magasin, "pourquoi le stock baisse par site ?") is None
@@ -0,0 +1,46 @@
+# ----------------------------
+# Fichier : tests/test_routeur.py
+# Description : Intentions du routeur sur le corpus étiqueté des benchmarks, et entités
+#               extraites des questions (référence, commande, site, date, page)
+# ----------------------------
+
+import csv
+import os
+from datetime import date
+import pytest
+from conftest import DOSSIER_TESTS
+from data_store import store
+from routeur import Routeur
+
+CORPUS = os.path.join(os.path.dirname(DOSSIER_TESTS), "benchmarks", "questions_routeur.csv")
+
+with open(CORPUS, newline="", encoding="utf-8") as f:
+    QUESTIONS = [(ligne["question"], ligne["intention"] or None) for ligne in csv.DictReader(f)]
+
+
+@pytest.fixture(scope="module")
+def routeur():
+    return Routeur(store)
+
+
+@pytest.mark.parametrize("question, intention", QUESTIONS)
+def test_intention_du_corpus(routeur, question, intention):
+    assert routeur.analyser(question)["intention"] == intention
+
+
+def test_entites_produit_site_date(routeur):
+    route = routeur.analyser("Quel est le stock final du produit p001 à entrepot_b le 02/01/2025 ?")
+    assert route["intention"] == "stock_final"
+    assert (route["ref"], route["site"], route["date"]) == ("P001", "Entrepot_B", date(2025, 1, 2))
+
+
+def test_entites_commande_et_page(routeur):
+    route = routeur.analyser("statut de la commande F001")
+    assert (route["intention"], route["num"], route["code"]) == ("statut_commande", "F001", "F001")
+    assert routeur.analyser("commandes en retard page 3")["page"] == 3
+
+
+def test_reference_requise_absente(routeur):
+    route = routeur.analyser("quel est le fournisseur principal ?")
+    assert route["ref"] is None
+    assert route["message"] or route["intention"] != "fournisseur_principal"
@@ -0,0 +1,89 @@
+# ----------------------------
+# Fichier : tests/test_series_stock.py
+# Description : Stock « à la date D » (dernier relevé connu) par SeriesStock.au et au_lot,
+#               et reconstruction des séries sur l'état publié par le DataStore
+# ----------------------------
+
+from datetime import date
+import numpy as np
+import pytest
+from conftest import ecrire_stock
+from data_store import DataStore
+from series_stock import SeriesStock
+
+
+@pytest.fixture
+def magasin(dossiers):
+    return DataStore(*dossiers)
+
+
+def _releves(store, positions):
+    lignes = store.stock.iloc[positions]
+    return sorted(zip(lignes["Site"].astype(str), lignes["Date"].dt.date, lignes["Stock_Final"]))
+
+
+def test_au_dernier_releve_par_site(magasin):
+    series = SeriesStock(magasin)
+    # 2025-01-02 : aucun fichier ce jour-là, relevés du 01/01
+    assert _releves(magasin, series.au("P001", date(2025, 1, 2))) == [
+        ("Entrepot_A", date(2025, 1, 1), 110), ("Entrepot_B", date(2025, 1, 1), 30)]
+    # Site B absent du fichier du 03/01 : son dernier relevé reste celui du 01/01
+    assert _releves(magasin, series.au("P001", "2025-01-03")) == [
+        ("Entrepot_A", date(2025, 1, 3), 90), ("Entrepot_B", date(2025, 1, 1), 30)]
+    assert _releves(magasin, series.au("p001", date(2025, 1, 5), site="entrepot_a")) == [
+        ("Entrepot_A", date(2025, 1, 3), 90)]
+
+
+def test_au_avant_le_premier_releve_ou_reference_inconnue(magasin):
+    series = SeriesStock(magasin)
+    assert len(series.au("P004", date(2025, 1, 2))) == 0
+    assert len(series.au("P999", date(2025, 1, 3))) == 0
+    assert len(series.au("P001", date(2025, 1, 3), site="Entrepot_Z")) == 0
+
+
+def test_au_lot_identique_a_au(magasin):
+    series = SeriesStock(magasin)
+    refs, jours, sites = [], [], []
+    for ref in ("P001", "P002", "P003", "P004", "P999"):
+        for jour in (date(2024, 12, 31), date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3), date(2025, 2, 1)):
+            for site in (None, "Entrepot_A", "Entrepot_B"):
+                refs.append(ref), jours.append(jour), sites.append(site)
+
+    requetes, positions = series.au_lot(refs, jours, sites)
+    attendu = [(i, p) for i, (r, j, s) in enumerate(zip(refs, jours, sites)) for p in series.au(r, j, s)]
+    assert list(zip(requetes.tolist(), positions.tolist())) == attendu
+
+
+def test_total_au(magasin):
+    series = SeriesStock(magasin)
+    assert series.total_au(date(2025, 1, 1)) == 110 + 30 + 0 + 150
+    assert series.total_au(date(2025, 1, 3)) == 90 + 30 + 80 + 150 + 20
+    assert series.total_au(date(2025, 1, 3), depuis=date(2025, 1, 3)) == 90 + 80 + 20
+
+
+def test_series_reconstruites_apres_ingestion(dossiers):
+    data_dir, cache_dir = dossiers
+    store = DataStore(data_dir, cache_dir)
+    series = SeriesStock(store)
+    etat = store.etat()
+    assert len(series.au("P001", date(2025, 1, 4), site="Entrepot_A")) == 1
+
+    ecrire_stock(data_dir, "2025-01-04", [("P001", "Entrepot_A", 90, 70, "OK")])
+    store.actualiser()
+    assert _releves(store, series.au("P001", date(2025, 1, 4), site="Entrepot_A")) == [
+        ("Entrepot_A", date(2025, 1, 4), 70)]
+    assert series.lignes("P001", date(2025, 1, 4), site="Entrepot_A")["Stock_Final"].tolist() == [70]
+    # L'état publié avant l'ingestion n'a pas changé (tables et index)
+    assert len(etat.stock) == 7
+    assert np.all(etat.index["stock"]["Référence_Produit"]["P001"] < 7)
+
+
+def test_lignes_lot_identique_a_lignes(magasin):
+    series = SeriesStock(magasin)
+    refs = ["P001", "P001", "P003", "P999", "P001"]
+    jours = [date(2025, 1, 2), None, "2025-01-03", date(2025, 1, 3), date(2025, 1, 3)]
+    sites = [None, "Entrepot_B", None, None, "Entrepot_A"]
+    requetes, lignes = series.lignes_lot(refs, jours, sites)
+    for i, (ref, jour, site) in enumerate(zip(refs, jours, sites)):
+        attendu = series.lignes(ref, jour, site=site)
+        assert lignes[requetes == i]["Stock_Final"].tolist() == attendu["Stock_Final"].tolist()
@@ -0,0 +1,75 @@
+# ----------------------------
+# Fichier : tests/test_service.py
+# Description : Routes du service HTTP JSON, appelées directement sur l'application ASGI
+# ----------------------------
+
+import asyncio
+import json
+import pytest
+import service
+
+
+def appeler(methode, chemin, corps=None):
+    """Requête HTTP simulée sur service.application ; retourne (statut, JSON de la réponse)."""
+    messages = [{"type": "http.request", "body": corps if isinstance(corps, bytes) else
+                 json.dumps(corps).encode() if corps is not None else b"", "more_body": False}]
+    envoyes = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        envoyes.append(message)
+
+    scope = {"type": "http", "method": methode, "path": chemin}
+    asyncio.run(service.application(scope, receive, send))
+    return envoyes[0]["status"], json.loads(envoyes[1]["body"])
+
+
+@pytest.fixture(autouse=True)
+def ollama_factice(monkeypatch):
+    monkeypatch.setattr("faqbot.generer_flux", lambda *a, **k: iter([{"response": "Analyse.", "done": True}]))
+
+
+def test_sante():
+    statut, reponse = appeler("GET", "/sante")
+    assert statut == 200
+    assert reponse["statut"] == "ok" and reponse["stock"] == 7 and reponse["commandes"] == 5
+
+
+def test_question():
+    statut, reponse = appeler("POST", "/question", {"question": "statut de la commande F001"})
+    assert statut == 200
+    assert reponse == {"reponse": service.moteur().ask("statut de la commande F001")}
+
+
+def test_lot():
+    questions = ["statut de la commande F001", {"intention": "stock_final", "entites": {"ref": "P002"}}]
+    statut, reponse = appeler("POST", "/lot/", {"questions": questions})
+    assert statut == 200
+    assert reponse["reponses"] == service.moteur().ask_lot(["statut de la commande F001", ("stock_final", {"ref": "P002"})])
+
+
+@pytest.mark.parametrize("methode, chemin, corps, attendu", [
+    ("POST", "/question", {}, 400),
+    ("POST", "/question", {"question": "  "}, 400),
+    ("POST", "/question", b"{pas du json", 400),
+    ("POST", "/question", ["liste"], 400),
+    ("POST", "/lot", {"questions": "texte"}, 400),
+    ("POST", "/lot", {"questions": [{"intention": "inconnue"}]}, 400),
+    ("POST", "/lot", {"questions": [42]}, 400),
+    ("POST", "/lot", {"questions": ["q"] * (service.MAX_QUESTIONS_LOT + 1)}, 413),
+    ("POST", "/question", b" " * (service.TAILLE_MAX_CORPS + 1), 413),
+    ("GET", "/question", None, 405),
+    ("GET", "/inconnue", None, 404),
+])
+def test_requetes_refusees(methode, chemin, corps, attendu):
+    statut, reponse = appeler(methode, chemin, corps)
+    assert statut == attendu and "erreur" in reponse
+
+
+def test_un_seul_processus_par_defaut(monkeypatch):
+    appels = []
+    monkeypatch.setattr(service, "servir", lambda hote, port, workers: appels.append(workers))
+    service.main([])
+    assert appels == [1]
@@ -0,0 +1,229 @@
+# ----------------------------
+# Fichier : traces.py
+# Description : Mesure du temps passé dans chaque étape d'une question (routage, recherche
+#               dans les données, KPI, contexte, cache, attente et génération Ollama),
+#               enregistré localement pour calculer p50 / p95 par intention
+# ----------------------------
+
+from contextlib import nullcontext
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+from ingestion import CACHE_DIR
+
+# CHATBOT_TRACES=0 désactive les mesures (les étapes deviennent des contextes vides)
+ACTIF = os.environ.get("CHATBOT_TRACES", "1") != "0"
+METRIQUES_FILE = "metriques.db"
+RETENTION = 7 * 24 * 3600  # secondes
+PURGE_TOUTES_LES = 1000    # questions enregistrées entre deux purges
+
+_RIEN = nullcontext()
+_local = threading.local()
+
+
+# ----------------------------
+# 1️⃣ Trace d'une question
+# ----------------------------
+class _Etape:
+    """Chronomètre d'une étape : sa durée s'ajoute à la trace à la sortie du bloc."""
+    __slots__ = ("trace", "nom", "debut")
+
+    def __init__(self, trace, nom):
+        self.trace = trace
+        self.nom = nom
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.ajouter(self.nom, time.perf_counter() - self.debut)
+        return False
+
+
+class _Reprise:
+    """
+    Une reprise du producteur de la réponse : durée ajoutée au total de la trace, qui
+    n'est la trace courante du thread que pendant ce bloc (jamais entre deux fragments).
+    """
+    __slots__ = ("trace", "precedente", "debut")
+
+    def __init__(self, trace):
+        self.trace = trace
+
+    def __enter__(self):
+        self.precedente = getattr(_local, "trace", None)
+        _local.trace = self.trace
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.duree += time.perf_counter() - self.debut
+        _local.trace = self.precedente
+        return False
+
+
+class Trace:
+    """
+    Durées cumulées (secondes) de chaque étape d'une question, et `duree` : temps
+    passé à produire la réponse (hors temps du lecteur entre deux fragments).
+    """
+
+    def __init__(self):
+        self.duree = 0.0
+        self.intention = None
+        self.etapes = {}
+
+    def etape(self, nom):
+        return _Etape(self, nom)
+
+    def reprise(self):
+        return _Reprise(self)
+
+    def ajouter(self, nom, duree):
+        self.etapes[nom] = self.etapes.get(nom, 0.0) + duree
+
+
+def etape(nom):
+    """Mesure un bloc dans la trace de la question en cours (aucun effet hors question ou si désactivé)."""
+    trace = getattr(_local, "trace", None)
+    return trace.etape(nom) if trace is not None else _RIEN
+
+
+def ajouter(nom, duree):
+    """Ajoute une durée mesurée à part (ex: attente du premier fragment d'Ollama)."""
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.ajouter(nom, duree)
+
+
+def relayer(trace, flux):
+    """
+    Relaie les fragments du générateur `flux` (et sa valeur de retour). Chaque reprise
+    de `flux` est chronométrée dans `trace` et en fait la trace courante du thread le
+    temps de la reprise : le temps passé par le lecteur entre deux fragments n'est pas
+    compté, et la reprise peut avoir lieu dans un autre thread que la précédente.
+    """
+    if trace is None:
+        return (yield from flux)
+    try:
+        while True:
+            with trace.reprise():
+                try:
+                    fragment = next(flux)
+                except StopIteration as fin:
+                    return fin.value
+            yield fragment
+    finally:
+        with trace.reprise():
+            flux.close()  # réponse abandonnée : fin du producteur mesurée aussi
+
+
+# ----------------------------
+# 2️⃣ Magasin local des mesures
+# ----------------------------
+class MagasinMetriques:
+    """
+    Mesures par étape dans SQLite (journal WAL) : une ligne par (question, étape),
+    insérées en une transaction par question ; les mesures de plus de `retention`
+    secondes sont purgées périodiquement.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, retention=RETENTION):
+        self.chemin = os.path.join(cache_dir, METRIQUES_FILE)
+        self.retention = retention
+        self._local = threading.local()
+        self._compteur = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._connexion() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS mesures (
+                    horodatage REAL NOT NULL,
+                    intention  TEXT NOT NULL,
+                    etape      TEXT NOT NULL,
+                    ms         REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS mesures_horodatage ON mesures (horodatage);
+            """)
+
+    def _connexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.chemin, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enregistrer(self, intention, etapes):
+        """Enregistre les durées (secondes) `etapes` d'une question."""
+        maintenant = time.time()
+        lignes = [(maintenant, intention, nom, duree * 1000) for nom, duree in etapes.items()]
+        with self._connexion() as conn:
+            conn.executemany("INSERT INTO mesures VALUES (?, ?, ?, ?)", lignes)
+            self._compteur += 1
+            if self._compteur % PURGE_TOUTES_LES == 0:
+                conn.execute("DELETE FROM mesures WHERE horodatage < ?", (maintenant - self.retention,))
+
+    def statistiques(self, periode=24 * 3600):
+        """
+        p50 / p95 (ms) et nombre de questions par intention et par étape sur la
+        dernière `periode` (secondes). DataFrame [intention, etape, questions, p50, p95].
+        """
+        df = pd.read_sql_query(
+            "SELECT intention, etape, ms FROM mesures WHERE horodatage >= ?",
+            self._connexion(), params=(time.time() - periode,),
+        )
+        if df.empty:
+            return pd.DataFrame(columns=["intention", "etape", "questions", "p50", "p95"])
+        groupes = df.groupby(["intention", "etape"])["ms"]
+        stats = pd.DataFrame({
+            "questions": groupes.size(),
+            "p50": groupes.quantile(0.5).round(2),
+            "p95": groupes.quantile(0.95).round(2),
+        }).reset_index()
+        return stats.sort_values(["intention", "etape"], ignore_index=True)
+
+    def vider(self):
+        with self._connexion() as conn:
+            conn.execute("DELETE FROM mesures")
+
+
+# ----------------------------
+# 3️⃣ Début / fin d'une question
+# ----------------------------
+class Traceur:
+    """Ouvre la trace d'une question (voir relayer) et l'enregistre à la fin."""
+
+    def __init__(self, actif=ACTIF, magasin=None):
+        self.actif = actif
+        self._magasin = magasin
+
+    @property
+    def magasin(self):
+        # Créé au premier besoin : rien n'est ouvert sur disque si les traces sont désactivées
+        if self._magasin is None:
+            self._magasin = MagasinMetriques()
+        return self._magasin
+
+    def demarrer(self):
+        """Nouvelle trace pour la question en cours (None si désactivé)."""
+        if not self.actif:
+            return None
+        return Trace()
+
+    def terminer(self, trace):
+        """Ajoute la durée totale de production et enregistre la trace (sans effet si `trace` est None)."""
+        if trace is None:
+            return
+        trace.ajouter("total", trace.duree)
+        try:
+            self.magasin.enregistrer(trace.intention or "inconnue", trace.etapes)
+        except sqlite3.Error as e:
+            print(f"Erreur enregistrement des traces: {e}")
+
+
+# Instance unique partagée (comme le DataStore)
+traceur = Traceur()